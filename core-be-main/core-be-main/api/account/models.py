@@ -204,6 +204,8 @@ class Contract(AbstractModel):
     )
     signer_count = models.JSONField(default=dict)
     s3_file_path = models.TextField(null=True)
+    # Hash of the template version and the context the PDF was rendered from
+    content_hash = models.CharField(max_length=64, null=True)
     signed_file_path = models.TextField(null=True)
     template_id = models.ForeignKey(
         ContractTemplate,
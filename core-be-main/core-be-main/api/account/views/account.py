@@ -11,8 +11,11 @@ from api.account.models import Account, IndustryType, AccountHistory
 from api.account.serializers.account import AccountSerializer, IndustryTypeSerializer, \
     AccountCreateSerializer
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import AccountDoesNotExistsException, \
     IndustryTypeDoesNotExistsException
@@ -101,7 +104,7 @@ class AccountViewSet(ModelViewSet):
             # Create audit history entry
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     account_history_data = {
                         "admin_user_id": request.auth[1],
@@ -154,7 +157,7 @@ class AccountViewSet(ModelViewSet):
             try:
                 if request.auth and request.auth[0]:
                     tenant_id = get_tenant_id_from_email(request.user[0])
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     account_history_data = {
                         "admin_user_id": request.auth[1],
@@ -196,7 +199,7 @@ class AccountViewSet(ModelViewSet):
         # Create audit history entry
         try:
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 account_history_data = {
                     "admin_user_id": request.auth[1],
@@ -12,9 +12,13 @@ from api.utils.responses import ResponseBuilder
 from ..models import Opportunity, Account, Contract, OpportunityStage, OpportunityType, OpportunityHistory
 from ..serializers.opportunity import OpportunitySerializer
 from ...auth.authentication import CognitoAuthentication
-from ...tenant.models import Tenant
-from ...user.models import User, UserRole, UserRoleMapping
-from ...user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from ...user.models import User, UserRole
+from ...user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_user_role_names,
+    get_tenant_obj_from_id,
+)
 from ...utils.common.common_utils import CommonUtils
 from ...utils.custom_exception_handler import OpportunityDoesNotExistsException
 
@@ -29,9 +33,7 @@ class OpportunityViewSet(viewsets.ModelViewSet):
         tenant_id = get_tenant_id_from_email(self.request.user[0])
         user_obj = get_user_obj_from_email(self.request.user[0])
 
-        user_role_names = UserRoleMapping.objects.filter(
-            user_id=user_obj.id, is_deleted=False
-        ).values_list("user_role_id__name", flat=True)
+        user_role_names = get_user_role_names(self.request.user[0])
 
         is_deal_desk = "Deal Desk" in user_role_names
         is_implementation_analyst = "Implementation Analyst" in user_role_names
@@ -144,7 +146,7 @@ class OpportunityViewSet(viewsets.ModelViewSet):
             try:
                 if request.auth and request.auth[0]:
                     tenant_id = get_tenant_id_from_email(request.user[0])
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     opportunity_history_data = {
                         "admin_user_id": request.auth[1],
@@ -224,7 +226,7 @@ class OpportunityViewSet(viewsets.ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_history_data = {
                     "admin_user_id": request.auth[1],
@@ -259,7 +261,7 @@ class OpportunityViewSet(viewsets.ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_history_data = {
                     "admin_user_id": request.auth[1],
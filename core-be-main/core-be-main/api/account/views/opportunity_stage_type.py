@@ -12,8 +12,11 @@ from api.account.serializers.opportunity_stage_type import (
     OpportunityTypeSerializer,
 )
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import OpportunityStageDoesNotExistsException, \
     OpportunityTypeDoesNotExistsException, OpportunityStageNameAlreadyExistsException, \
@@ -71,7 +74,7 @@ class OpportunityStageViewSet(ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_stage_history_data = {
                     "admin_user_id": request.auth[1],
@@ -105,7 +108,7 @@ class OpportunityStageViewSet(ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_stage_history_data = {
                     "admin_user_id": request.auth[1],
@@ -151,7 +154,7 @@ class OpportunityStageViewSet(ModelViewSet):
         # Create audit history entry for update
         try:
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_stage_history_data = {
                     "admin_user_id": request.auth[1],
@@ -219,7 +222,7 @@ class OpportunityTypeViewSet(ModelViewSet):
             try:
                 if request.auth and request.auth[0]:
                     tenant_id = get_tenant_id_from_email(request.user[0])
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     opportunity_type_history_data = {
                         "admin_user_id": request.auth[1],
@@ -256,7 +259,7 @@ class OpportunityTypeViewSet(ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_type_history_data = {
                     "admin_user_id": request.auth[1],
@@ -303,7 +306,7 @@ class OpportunityTypeViewSet(ModelViewSet):
         # Create audit history entry for update
         try:
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 opportunity_type_history_data = {
                     "admin_user_id": request.auth[1],
@@ -7,3 +7,4 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import api.plan.signals.tier_signals
+        import api.pricing.signals.addon_signals
@@ -1,6 +1,8 @@
 import json
 import os
 import re
+import threading
+import time
 
 import jwt
 import requests
@@ -8,9 +10,11 @@ from rest_framework import authentication
 from rest_framework.exceptions import AuthenticationFailed
 
 from api.auth.cognito import AwsCognito
+from api.auth.token_cache import verified_token_cache
 from api.user.models import UserRole, UserRoleMapping, User
 from api.user.utils import get_user_obj_from_email
 from api.utils.logger import logger
+from api.utils.request_context import RequestContext, set_request_context
 
 
 class CognitoAuthentication(authentication.BaseAuthentication):
@@ -18,6 +22,12 @@ class CognitoAuthentication(authentication.BaseAuthentication):
     aws_region = os.getenv("REGION")
     cognito_base_url = f"https://cognito-idp.{aws_region}.amazonaws.com/{user_pool_id}"
     jwks_url = f"{cognito_base_url}/.well-known/jwks.json"
+    jwks_cache_ttl = int(os.getenv("JWKS_CACHE_TTL", default=3600))
+    # Minimum gap between refreshes forced by an unknown kid
+    jwks_refresh_interval = int(os.getenv("JWKS_REFRESH_INTERVAL", default=30))
+    _public_keys = {}
+    _public_keys_fetched_at = None
+    _public_keys_lock = threading.Lock()
 
     @staticmethod
     def get_auth_token(request):
@@ -36,6 +46,24 @@ class CognitoAuthentication(authentication.BaseAuthentication):
             public_keys[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
         return public_keys
 
+    @classmethod
+    def get_public_key(cls, kid):
+        """
+        Returns the public key for the kid from the per-process JWKS cache. The
+        key set is refreshed once its TTL expires, or early when the kid is not
+        in it (e.g. after Cognito rotated its keys).
+        """
+        with cls._public_keys_lock:
+            fetched_at = cls._public_keys_fetched_at
+            age = time.monotonic() - fetched_at if fetched_at is not None else None
+            is_expired = age is None or age >= cls.jwks_cache_ttl
+            is_unknown_kid = kid not in cls._public_keys
+            if is_expired or (is_unknown_kid and age >= cls.jwks_refresh_interval):
+                logger.info("Refreshing Cognito public keys")
+                cls._public_keys = cls.get_public_keys()
+                cls._public_keys_fetched_at = time.monotonic()
+            return cls._public_keys.get(kid)
+
     def authenticate(self, request):
         exclusion_list = ["/", "/login"]
         if request.path in exclusion_list:
@@ -44,25 +72,23 @@ class CognitoAuthentication(authentication.BaseAuthentication):
         if not access_token:
             return None
         try:
-            unverified_header = jwt.get_unverified_header(access_token)
-            token_kid = unverified_header.get("kid")
-            public_keys = CognitoAuthentication.get_public_keys()
-            key = public_keys.get(token_kid)
-
-            token_decoded = jwt.decode(
-                jwt=access_token,
-                key=key,
-                algorithms=["RS256"],
-                issuer=CognitoAuthentication.cognito_base_url,
-                options={"verify_signature": True},
-            )
-
-            user_attr = self.get_user_email_from_cognito_id_or_access_token(
-                token_decoded.get("sub"), access_token
-            )
-            user_attr, is_impersonate, root_admin_user = self.check_allow_for_user(
-                request, user_attr
+            cache_key = verified_token_cache.get_key(
+                access_token, request.headers.get("impersonation-user-email")
             )
+            verified_user = verified_token_cache.get(cache_key)
+            if not verified_user:
+                verified_user = self.verify_and_resolve_user(request, access_token)
+                verified_token_cache.set(
+                    cache_key, verified_user, expires_at=verified_user["exp"]
+                )
+            set_request_context(request, RequestContext(**verified_user["context"]))
+            user_attr = list(verified_user["user_attr"])
+            is_impersonate = verified_user["is_impersonate"]
+            root_admin_user = None
+            if verified_user["root_admin_user_id"]:
+                root_admin_user = User.objects.filter(
+                    id=verified_user["root_admin_user_id"]
+                ).first()
             logger.info(
                 "\nUser detail - %s, Is_impersonate - %s, Root Admin User - %s",
                 user_attr,
@@ -80,6 +106,57 @@ class CognitoAuthentication(authentication.BaseAuthentication):
         except Exception:
             raise AuthenticationFailed("Invalid Token")
 
+    def verify_and_resolve_user(self, request, access_token):
+        """
+        Verifies the access token and resolves the user it was issued for, along
+        with the impersonation result and the request context values of the
+        effective user.
+        """
+        unverified_header = jwt.get_unverified_header(access_token)
+        token_kid = unverified_header.get("kid")
+        key = CognitoAuthentication.get_public_key(token_kid)
+
+        token_decoded = jwt.decode(
+            jwt=access_token,
+            key=key,
+            algorithms=["RS256"],
+            issuer=CognitoAuthentication.cognito_base_url,
+            options={"verify_signature": True},
+        )
+
+        user_attr = self.get_user_email_from_cognito_id_or_access_token(
+            token_decoded.get("sub"), access_token
+        )
+        user_attr, is_impersonate, root_admin_user = self.check_allow_for_user(
+            request, user_attr
+        )
+        user_obj, tenant_id, roles = None, None, []
+        if user_attr:
+            user_obj = (
+                User.objects.filter(email=user_attr[0], is_deleted=False)
+                .select_related("tenant_id")
+                .first()
+            )
+        if user_obj:
+            if user_obj.tenant_id and not user_obj.tenant_id.is_deleted:
+                tenant_id = user_obj.tenant_id.id
+            roles = UserRoleMapping.objects.filter(
+                user_id=user_obj.id, is_deleted=False
+            ).values_list("user_role_id__name", flat=True)
+        # Only plain values are cached, instances are loaded by every request
+        return {
+            "exp": token_decoded.get("exp"),
+            "user_attr": tuple(user_attr) if user_attr else user_attr,
+            "is_impersonate": is_impersonate,
+            "root_admin_user_id": root_admin_user.id if root_admin_user else None,
+            "context": {
+                "email": user_attr[0] if user_attr else None,
+                "user_id": user_obj.id if user_obj else None,
+                "tenant_id": tenant_id,
+                "roles": tuple(roles),
+            },
+        }
+
     @staticmethod
     def check_allow_for_user(request, user_attr):
         """
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", default=2048))
+
+
+class VerifiedTokenCache:
+    """
+    Bounded per-process cache of access tokens which passed verification.
+
+    Entries are keyed by the token hash and the impersonation header, and hold
+    the resolved identity as plain values (user id, email, tenant id and role
+    names) until the token expires, never model instances. Role or tenant
+    reassignments are therefore picked up once the user gets a new access
+    token.
+    """
+
+    def __init__(self, max_size=VERIFIED_TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(access_token, impersonation_user_email=None):
+        token_hash = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        return token_hash, impersonation_user_email
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        if not expires_at or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache()
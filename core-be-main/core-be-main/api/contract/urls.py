@@ -35,6 +35,11 @@ urlpatterns = [
         name="cancel-signature-request-access",
     ),
     path("", ContractViewSet.as_view({"post": "create"}), name="contract_creation"),
+    path(
+        "/batch",
+        ContractViewSet.as_view({"post": "batch_create"}),
+        name="contract_batch_creation",
+    ),
     path(
         "/<str:id>", ContractViewSet.as_view({"get": "retrieve"}), name="contract_get"
     ),
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 
@@ -24,7 +25,13 @@ from api.utils.custom_exception_handler import (
     QuoteDoesNotExistsException)
 from api.utils.logger import logger
 from api.utils.responses import ResponseBuilder
+from api.utils.template.contract_batch import (
+    CONTRACT_BATCH_MAX_ITEMS,
+    ContractBatchItem,
+    ContractBatchPipeline,
+)
 from api.utils.template.doctopdf import DocxToPdfConverter
+from api.utils.template.template_cache import get_compiled_template
 
 
 class ContractViewSet(ViewSet):
@@ -423,125 +430,41 @@ class ContractViewSet(ViewSet):
             quote_id = request.query_params.get("quote_id")
             contract_template_id = request.query_params.get("contract_template_id")
 
-            # Fetch data based on quote_id (You might need to implement this)
-            quote_data = ContractViewSet.transform_data(quote_id, tenant_id)
-
-            contract_related_data = quote_data.pop("contract_data")
-
-            # Generate a fixed contract number or use the existing one
-            quote = contract_related_data.get("quote_object")
-            if quote.contract_id:
-                contract_number = quote.contract_id.contract_number
-            else:
-                contract_number = ContractViewSet.generate_contract_number(tenant_id)
-
-            quote_data["contract_number"] = contract_number
-
-            # Get the input S3 URL from your template_path_url
-            template_object = ContractTemplate.objects.filter(
-                id=contract_template_id, tenant_id=tenant_id, is_deleted=False
-            ).first()
-            if not template_object:
-                raise ContractTemplateNotFoundException("Contract Template not found")
-            template_s3_url = template_object.s3_doc_file_path
-
-            # Remove the filename and extension from the end of the S3 path
-            output_dir, _ = os.path.split(template_s3_url)
-            output = output_dir
-            quote_details = quote_data.get("quote")
-            # Create an instance of DocxToPdfConverter
-            converter = DocxToPdfConverter()
-            template_filename = (
-                f"{quote_details.get('quote_name')}_{template_object.name}"
-            )
-            template_filename = template_filename.replace(" ", "_")
-
-            contract_name = f"contract_{quote_details.get('quote_name')}"
-            contract_name = contract_name.replace(" ", "_")
-            # Process the template and get the success status, message, and output S3 path
-            (
-                success,
-                response_message,
-                output_path,
-                signature_count,
-            ) = converter.process_contract_template_to_pdf(
-                template_s3_url, output, quote_data, template_filename
+            job = ContractViewSet.prepare_contract(
+                tenant_id, quote_id, contract_template_id
             )
+            cached_contract = job["cached_contract"]
+            if cached_contract:
+                # Neither the template nor the quote changed, the PDF is reused
+                logger.info(f"Contract {cached_contract.id} is up to date")
+                success = True
+                output_path = cached_contract.s3_file_path
+                signature_count = json.loads(cached_contract.signer_count)
+            else:
+                # Create an instance of DocxToPdfConverter
+                converter = DocxToPdfConverter()
+                # Process the template and get the success status, message, and output S3 path
+                (
+                    success,
+                    response_message,
+                    output_path,
+                    signature_count,
+                ) = converter.process_contract_template_to_pdf(
+                    job["template_s3_url"],
+                    job["output_dir"],
+                    job["quote_data"],
+                    job["template_filename"],
+                    ContractViewSet.get_compiled_template(job),
+                )
 
             # Create a Contract instance
             if success:
-                quote = Quote.objects.filter(id=quote_id, is_deleted=False).first()
-                if quote.contract_id:
-                    contract = Contract.objects.get(
-                        id=quote.contract_id.id, is_deleted=False
-                    )
-                    if contract.s3_file_path and contract.s3_file_path != output_path:
-                        S3Service.delete_s3_object(contract.s3_file_path)
-                    contract.s3_file_path = output_path
-                    contract.template_id = template_object
-                    contract.status = None
-                    contract.signer_count = json.dumps(signature_count)
-                    contract.contract_url = os.getenv("CONTRACT_URL")
-                    contract.save()
-                else:
-                    opportunity = Opportunity.objects.filter(
-                        id=contract_related_data.get("opportunity_object").id,
-                        is_deleted=False,
-                        tenant_id=tenant_id,
-                    ).first()
-
-                    if not opportunity:
-                        raise OpportunityDoesNotExistsException("Opportunity not found")
-
-                    if opportunity.contract_id and opportunity.op_external_id:
-                        contract_id = opportunity.contract_id.id
-                        contract = Contract.objects.get(
-                            id=contract_id, is_deleted=False
-                        )
-                        contract.signer_count = json.dumps(signature_count)
-                        if (
-                            contract.s3_file_path
-                            and contract.s3_file_path != output_path
-                        ):
-                            S3Service.delete_s3_object(contract.s3_file_path)
-                        contract.s3_file_path = output_path
-                        contract.status = None
-                        contract.contract_url = os.getenv("CONTRACT_URL")
-                        contract.save()
-                    else:
-                        # TODO: Need to update contract link
-                        # Create a Contract instance
-                        contract = Contract(
-                            account_id=contract_related_data.get("account_object"),
-                            name=contract_name,
-                            contract_number=contract_number,
-                            tenant_id=Tenant.objects.get(
-                                id=tenant_id, is_deleted=False
-                            ),
-                            s3_file_path=output_path,
-                            contract_url=os.getenv("CONTRACT_URL"),
-                            signer_count=json.dumps(signature_count),
-                            template_id=template_object,
-                            status=None,
-                        )
-                        contract.save()
-
-                    quote = Quote.objects.filter(id=quote_id, is_deleted=False).first()
-                    if not quote:
-                        raise QuoteDoesNotExistsException("Quote Does Not Exist")
-                    quote.contract_id = contract
-                    quote.save()
-
-                # Serialize the contract object
-                contract_serializer = ContractSerializer(contract)
-
-                # Add the presigned URL to the serialized response
-                response_data = contract_serializer.data
-                response_data["signer_count"] = json.loads(
-                    response_data["signer_count"]
+                contract = ContractViewSet.save_contract(
+                    tenant_id, quote_id, job, output_path, signature_count
                 )
                 return ResponseBuilder.success(
-                    data=response_data, status_code=status.HTTP_200_OK
+                    data=ContractViewSet.contract_response_data(contract),
+                    status_code=status.HTTP_200_OK,
                 )
             else:
                 return ResponseBuilder.errors(
@@ -553,6 +476,339 @@ class ContractViewSet(ViewSet):
                 message=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "contracts": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "quote_id": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                            ),
+                            "contract_template_id": openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                            ),
+                        },
+                    ),
+                )
+            },
+        )
+    )
+    def batch_create(self, request, *args, **kwargs):
+        """
+        Generate the contracts of many quotes, each with its template.
+
+        The distinct templates are downloaded once and the contracts are
+        rendered, converted and uploaded in parallel. Returns the status of
+        every requested contract, in order.
+        """
+        try:
+            logger.info("Batch Contract Generation invoked!")
+            tenant_id = get_tenant_id_from_email(request.user[0])
+            contracts = request.data.get("contracts")
+            if not isinstance(contracts, list) or not contracts:
+                return ResponseBuilder.errors(
+                    message="contracts must be a non empty list",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            if len(contracts) > CONTRACT_BATCH_MAX_ITEMS:
+                return ResponseBuilder.errors(
+                    message=f"At most {CONTRACT_BATCH_MAX_ITEMS} contracts per batch",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+
+            results = []
+            jobs = []
+            quote_ids = set()
+            contract_number = None
+            for entry in contracts:
+                quote_id = entry.get("quote_id")
+                contract_template_id = entry.get("contract_template_id")
+                result = {
+                    "quote_id": quote_id,
+                    "contract_template_id": contract_template_id,
+                    "success": False,
+                    "message": None,
+                    "contract": None,
+                }
+                results.append(result)
+                if quote_id in quote_ids:
+                    result["message"] = "Quote is repeated in the batch"
+                    continue
+                quote_ids.add(quote_id)
+                try:
+                    # New contracts of the batch get consecutive numbers
+                    if contract_number is None:
+                        contract_number = ContractViewSet.generate_contract_number(
+                            tenant_id
+                        )
+                    job = ContractViewSet.prepare_contract(
+                        tenant_id, quote_id, contract_template_id, contract_number
+                    )
+                except Exception as e:
+                    result["message"] = str(e)
+                    continue
+                if job["contract_number"] == contract_number:
+                    contract_number = ContractViewSet.next_contract_number(
+                        contract_number
+                    )
+                if job["cached_contract"]:
+                    # Up to date contracts are not generated again
+                    jobs.append((result, job, None))
+                    continue
+                item = ContractBatchItem(
+                    job["template_s3_url"],
+                    job["output_dir"],
+                    job["quote_data"],
+                    job["template_filename"],
+                    ContractViewSet.get_compiled_template(job),
+                )
+                jobs.append((result, job, item))
+
+            ContractBatchPipeline().run([item for _, _, item in jobs if item])
+
+            for result, job, item in jobs:
+                if item is None:
+                    cached_contract = job["cached_contract"]
+                    output_path = cached_contract.s3_file_path
+                    signature_count = json.loads(cached_contract.signer_count)
+                    message = "Contract is up to date"
+                elif item.success:
+                    output_path = item.output_path
+                    signature_count = item.signature_count
+                    message = item.message
+                else:
+                    result["message"] = item.message or "Contract generation failed"
+                    continue
+                try:
+                    contract = ContractViewSet.save_contract(
+                        tenant_id, result["quote_id"], job, output_path, signature_count
+                    )
+                except Exception as e:
+                    result["message"] = str(e)
+                    continue
+                result["success"] = True
+                result["message"] = message
+                result["contract"] = ContractViewSet.contract_response_data(contract)
+
+            return ResponseBuilder.success(
+                data=results, status_code=status.HTTP_200_OK
+            )
+        except Exception as e:
+            return ResponseBuilder.errors(
+                message=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @staticmethod
+    def prepare_contract(
+        tenant_id, quote_id, contract_template_id, contract_number=None
+    ):
+        """
+        Collect what is needed to generate the contract of a quote.
+
+        Args:
+            tenant_id (str): The ID of the tenant of the quote.
+            quote_id (str): The ID of the quote.
+            contract_template_id (str): The ID of the contract template.
+            contract_number (str): The number of the contract if the quote has
+                none yet, a new number is generated when it is not given.
+
+        Returns:
+            dict: The rendering context of the contract, its template and names.
+        """
+        # Fetch data based on quote_id (You might need to implement this)
+        quote_data = ContractViewSet.transform_data(quote_id, tenant_id)
+
+        contract_related_data = quote_data.pop("contract_data")
+
+        # Generate a fixed contract number or use the existing one
+        quote = contract_related_data.get("quote_object")
+        if quote.contract_id:
+            contract_number = quote.contract_id.contract_number
+        elif not contract_number:
+            contract_number = ContractViewSet.generate_contract_number(tenant_id)
+
+        quote_data["contract_number"] = contract_number
+
+        # Get the input S3 URL from your template_path_url
+        template_object = ContractTemplate.objects.filter(
+            id=contract_template_id, tenant_id=tenant_id, is_deleted=False
+        ).first()
+        if not template_object:
+            raise ContractTemplateNotFoundException("Contract Template not found")
+        template_s3_url = template_object.s3_doc_file_path
+
+        # Remove the filename and extension from the end of the S3 path
+        output_dir, _ = os.path.split(template_s3_url)
+        quote_details = quote_data.get("quote")
+        template_filename = f"{quote_details.get('quote_name')}_{template_object.name}"
+        template_filename = template_filename.replace(" ", "_")
+
+        contract_name = f"contract_{quote_details.get('quote_name')}"
+        contract_name = contract_name.replace(" ", "_")
+
+        template_version = ContractViewSet.get_template_version(template_s3_url)
+        content_hash = ContractViewSet.content_hash(
+            template_s3_url, template_version, template_filename, quote_data
+        )
+        return {
+            "quote_data": quote_data,
+            "contract_related_data": contract_related_data,
+            "contract_number": contract_number,
+            "template_object": template_object,
+            "template_s3_url": template_s3_url,
+            "output_dir": output_dir,
+            "template_filename": template_filename,
+            "contract_name": contract_name,
+            "template_version": template_version,
+            "content_hash": content_hash,
+            "cached_contract": ContractViewSet.get_cached_contract(
+                contract_related_data, content_hash
+            ),
+        }
+
+    @staticmethod
+    def get_template_version(template_s3_url):
+        """The S3 ETag of a template, None when it can not be read"""
+        try:
+            return S3Service.get_object_etag(template_s3_url)
+        except Exception as e:
+            logger.error(f"Could not get the version of {template_s3_url}: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_compiled_template(job):
+        """
+        The compiled template of a contract, None when it can not be compiled
+        and the template has to be downloaded and scanned while rendering
+        """
+        try:
+            return get_compiled_template(
+                job["template_object"], job["template_version"]
+            )
+        except Exception as e:
+            logger.error(f"Could not compile contract template: {str(e)}")
+            return None
+
+    @staticmethod
+    def content_hash(template_s3_url, template_version, template_filename, quote_data):
+        """
+        Hash of the inputs of a contract PDF: the template and its version, the
+        name the PDF is uploaded under and the canonical rendering context.
+        Returns None when the version of the template is not known.
+        """
+        if not template_version:
+            return None
+        content = json.dumps(
+            {
+                "template": template_s3_url,
+                "template_etag": template_version,
+                "file_name": template_filename,
+                "context": quote_data,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_cached_contract(contract_related_data, content_hash):
+        """
+        The contract the quote generates into when its PDF was rendered from
+        the same inputs, None otherwise.
+        """
+        if not content_hash:
+            return None
+        quote = contract_related_data.get("quote_object")
+        opportunity = contract_related_data.get("opportunity_object")
+        contract = quote.contract_id
+        if not contract and opportunity and opportunity.op_external_id:
+            contract = opportunity.contract_id
+        if (
+            contract
+            and not contract.is_deleted
+            and contract.s3_file_path
+            and contract.content_hash == content_hash
+        ):
+            return contract
+        return None
+
+    @staticmethod
+    def save_contract(tenant_id, quote_id, job, output_path, signature_count):
+        """Create or update the contract of a generated PDF and link the quote"""
+        contract_related_data = job["contract_related_data"]
+        template_object = job["template_object"]
+        quote = Quote.objects.filter(id=quote_id, is_deleted=False).first()
+        if quote.contract_id:
+            contract = Contract.objects.get(id=quote.contract_id.id, is_deleted=False)
+            if contract.s3_file_path and contract.s3_file_path != output_path:
+                S3Service.delete_s3_object(contract.s3_file_path)
+            contract.s3_file_path = output_path
+            contract.content_hash = job["content_hash"]
+            contract.template_id = template_object
+            contract.status = None
+            contract.signer_count = json.dumps(signature_count)
+            contract.contract_url = os.getenv("CONTRACT_URL")
+            contract.save()
+        else:
+            opportunity = Opportunity.objects.filter(
+                id=contract_related_data.get("opportunity_object").id,
+                is_deleted=False,
+                tenant_id=tenant_id,
+            ).first()
+
+            if not opportunity:
+                raise OpportunityDoesNotExistsException("Opportunity not found")
+
+            if opportunity.contract_id and opportunity.op_external_id:
+                contract_id = opportunity.contract_id.id
+                contract = Contract.objects.get(id=contract_id, is_deleted=False)
+                contract.signer_count = json.dumps(signature_count)
+                if contract.s3_file_path and contract.s3_file_path != output_path:
+                    S3Service.delete_s3_object(contract.s3_file_path)
+                contract.s3_file_path = output_path
+                contract.content_hash = job["content_hash"]
+                contract.status = None
+                contract.contract_url = os.getenv("CONTRACT_URL")
+                contract.save()
+            else:
+                # TODO: Need to update contract link
+                # Create a Contract instance
+                contract = Contract(
+                    account_id=contract_related_data.get("account_object"),
+                    name=job["contract_name"],
+                    contract_number=job["contract_number"],
+                    tenant_id=Tenant.objects.get(id=tenant_id, is_deleted=False),
+                    s3_file_path=output_path,
+                    content_hash=job["content_hash"],
+                    contract_url=os.getenv("CONTRACT_URL"),
+                    signer_count=json.dumps(signature_count),
+                    template_id=template_object,
+                    status=None,
+                )
+                contract.save()
+
+            quote = Quote.objects.filter(id=quote_id, is_deleted=False).first()
+            if not quote:
+                raise QuoteDoesNotExistsException("Quote Does Not Exist")
+            quote.contract_id = contract
+            quote.save()
+        return contract
+
+    @staticmethod
+    def contract_response_data(contract):
+        # Serialize the contract object
+        contract_serializer = ContractSerializer(contract)
+
+        # Add the presigned URL to the serialized response
+        response_data = contract_serializer.data
+        response_data["signer_count"] = json.loads(response_data["signer_count"])
+        return response_data
+
     @staticmethod
     def generate_contract_number(tenant_id):
         """
@@ -591,6 +847,11 @@ class ContractViewSet(ViewSet):
 
         return next_contract_number
 
+    @staticmethod
+    def next_contract_number(contract_number):
+        """The contract number following a number of the format 'C_000001'"""
+        return f"C_{str(int(contract_number[2:]) + 1).zfill(6)}"
+
     def retrieve(self, request, id):
         queryset = Contract.objects.all()
         contract = get_object_or_404(queryset, pk=id)
@@ -8,6 +8,7 @@ from rest_framework.viewsets import ViewSet
 from api.auth.authentication import CognitoAuthentication
 from api.plan.models import Tier
 from api.pricebook.models import PriceBookEntry
+from api.pricing.details_cache import pricing_details_cache
 from api.pricing.models import PricingModelDetails
 from api.pricing_calculator.models import Quote
 from api.product.models import Product
@@ -133,7 +134,7 @@ class ContractSpecificConfig(ViewSet):
                     column_data = []
                     value_data = []
 
-                    tier_details = json.loads(pricing_model_detail.details)
+                    tier_details = pricing_details_cache.get(pricing_model_detail)
                     core_data = tier_details["core"]
                     columns = core_data["columns"]
                     values = core_data["values"]
@@ -172,7 +173,7 @@ class ContractSpecificConfig(ViewSet):
                     for value in values:
                         # Check if any value is None before adding the dictionary to value_data
                         if any(val for val in value.values()):
-
+                            value = dict(value)
                             for key, dup_key in duplicated_values.items():
                                 value[key] = value.get(dup_key, None)
 
@@ -8,6 +8,9 @@ class ContractTemplate(AbstractModel):
     s3_doc_file_path = models.CharField(default=255)
     s3_pdf_file_path = models.CharField(default="Pdf not Found")
     description = models.TextField(default=None)
+    # S3 ETag of the DOCX file and the signature placeholders found in it
+    template_version = models.CharField(max_length=255, null=True)
+    placeholders = models.JSONField(null=True)
     tenant_id = models.ForeignKey(
         "Tenant", on_delete=models.SET_NULL, db_column="tenant_id", null=True
     )
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 
 from drf_yasg import openapi
 from rest_framework import status, parsers
@@ -6,8 +8,11 @@ from rest_framework.viewsets import ModelViewSet
 from drf_yasg.utils import swagger_auto_schema
 
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.aws_utils.s3 import S3Service
 from api.utils.logger import logger
 from api.utils.responses import ResponseBuilder
@@ -15,6 +20,7 @@ from api.utils.responses import ResponseBuilder
 from .models import ContractTemplate
 from .serializer import ContractTemplateCreateSerializer, ContractTemplateSerializer
 from ..utils.template.doctopdf import DocxToPdfConverter
+from ..utils.template.template_cache import CompiledTemplate, contract_template_cache
 
 
 class ContractTemplateViewSet(ModelViewSet):
@@ -34,20 +40,26 @@ class ContractTemplateViewSet(ModelViewSet):
         )
 
     def handle_file_upload(self, file_data, tenant_id, template_id):
-        # Make a temp directory
-        temp_dir = "/tmp/doc-to-upload"
-        os.makedirs(temp_dir, exist_ok=True)
+        # Make a temp directory of the upload
+        temp_dir = tempfile.mkdtemp(prefix="doc-to-upload-")
 
         local_path = os.path.join(temp_dir, file_data.name)
 
         try:
+            content = file_data.read()
             with open(local_path, 'wb+') as path:
-                path.write(file_data.read())
+                path.write(content)
 
             file_name = file_data.name
             file_path = f"{tenant_id}/{template_id}/{file_name}"  # Updated file_path format
             S3Service.upload_file_from_path(local_file_path=local_path, s3_file_path=file_path)
 
+            # Scan the placeholders once, contracts are rendered from the compiled template
+            compiled_template = CompiledTemplate.from_content(
+                S3Service.get_object_etag(file_path), content
+            )
+            contract_template_cache.put(template_id, compiled_template)
+
             pdf_s3_file_path = f"{tenant_id}/{template_id}"
 
             document_upload = DocxToPdfConverter()
@@ -57,10 +69,10 @@ class ContractTemplateViewSet(ModelViewSet):
 
             pdf_s3_file_path = f"{tenant_id}/{template_id}/{pdf_file_name}"
         finally:
-            # Remove the temporary file, even if there was an issue with S3 upload
-            os.remove(local_path)
+            # Remove the temporary files, even if there was an issue with S3 upload
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
-        return file_path, pdf_s3_file_path
+        return file_path, pdf_s3_file_path, compiled_template
 
     @swagger_auto_schema(
         operation_description="Upload a file with name and description",
@@ -79,7 +91,7 @@ class ContractTemplateViewSet(ModelViewSet):
         tenant_id = get_tenant_id_from_email(request.user[0])
         logger.info("Contract template creation for tenant id %s", tenant_id)
         user = get_user_obj_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
 
         form_data = {
             "created_by": user,
@@ -100,9 +112,13 @@ class ContractTemplateViewSet(ModelViewSet):
                     # Create the contract template object without saving it yet
                     contract_template = ContractTemplate(**form_data)
                     template_id = str(contract_template.id)  # Get the template_id
-                    file_path, s3_pdf_file_path = self.handle_file_upload(file_data, tenant_id, template_id)
+                    file_path, s3_pdf_file_path, compiled_template = self.handle_file_upload(
+                        file_data, tenant_id, template_id
+                    )
                     contract_template.s3_doc_file_path = file_path  # Update the object
                     contract_template.s3_pdf_file_path = s3_pdf_file_path
+                    contract_template.template_version = compiled_template.version
+                    contract_template.placeholders = compiled_template.placeholders
                     contract_template.save()  # Save the updated object
 
                     return ResponseBuilder.success(
@@ -158,12 +174,16 @@ class ContractTemplateViewSet(ModelViewSet):
                 file_name = file_data.name
                 if file_name.lower().endswith('.docx'):
                     template_id = str(instance.id)  # Get the template_id
-                    file_path, s3_pdf_file_path = self.handle_file_upload(file_data, tenant_id, template_id)
+                    file_path, s3_pdf_file_path, compiled_template = self.handle_file_upload(
+                        file_data, tenant_id, template_id
+                    )
                     if instance.s3_doc_file_path != file_path:
                         S3Service.delete_s3_object(instance.s3_doc_file_path)
                         S3Service.delete_s3_object(instance.s3_pdf_file_path)
                     instance.s3_doc_file_path = file_path
                     instance.s3_pdf_file_path = s3_pdf_file_path
+                    instance.template_version = compiled_template.version
+                    instance.placeholders = compiled_template.placeholders
                 else:
                     return ResponseBuilder.errors(
                         message="Uploaded file extension is not supported. Only .docx files are allowed",
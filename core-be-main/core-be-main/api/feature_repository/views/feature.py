@@ -13,8 +13,11 @@ from api.feature_repository.serializers import (
     FeatureSerializer,
     FeatureUpdateSerializer,
 )
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import FeatureNotExistsException
 from api.utils.logger import logger
 from api.utils.responses import ResponseBuilder
@@ -122,7 +125,7 @@ class FeatureUpdateView(GenericAPIView):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info('update feature - this request is for user impersonation')
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 FeatureHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -164,7 +167,7 @@ class FeatureUpdateView(GenericAPIView):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info('delete feature - this request is for user impersonation')
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             FeatureHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
@@ -14,8 +14,11 @@ from api.feature_repository.serializers import (
     FeatureGroupSerializer,
     FeatureGroupUpdateSerializer,
 )
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import RepositoryNotExistsException, \
     FeatureGroupNotExistsException
 from api.utils.logger import logger
@@ -120,7 +123,7 @@ class FeatureGroupUpdateView(GenericAPIView):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info('update feature group - this request is for user impersonation')
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 FeatureGroupHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -168,7 +171,7 @@ class FeatureGroupUpdateView(GenericAPIView):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info('delete feature group - this request is for user impersonation')
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             FeatureGroupHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
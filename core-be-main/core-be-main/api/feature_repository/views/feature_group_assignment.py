@@ -15,8 +15,11 @@ from api.feature_repository.models import (
     FeatureRepositoryHistory,
 )
 from api.feature_repository.serializers import FeatureAssignmentDataSerializer
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import RepositoryNotExistsException, \
     FeatureGroupNotExistsException, FeatureNotExistsException
 from api.utils.logger import logger
@@ -80,7 +83,7 @@ class FeatureRepositoryDetailView(APIView):
     )
     def put(self, request, id):
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant_obj = get_tenant_obj_from_id(tenant_id)
         feature_repository_id = id
         serializer = FeatureAssignmentDataSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -350,7 +353,7 @@ class FeatureRepositoryDetailView(APIView):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info('feature assignments - this request is for user impersonation')
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 response = self.get(request, id)
                 new_data = json.loads(response.content).get("data")
@@ -11,8 +11,11 @@ from api.feature_repository.models import Feature, FeatureGroup, FeatureReposito
     FeatureRepositoryHistory
 from api.feature_repository.serializers import RepositorySerializer
 from api.plan.models import Plan
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import RepositoryNotExistsException, \
     ProductAssociatedWithRepository, FeatureGroupAssociatedWithRepository, \
     FeatureAssociatedWithRepository, PlanAssociatedWithRepository
@@ -40,7 +43,7 @@ class RepositoryCreateView(generics.GenericAPIView):
         logger.info('creating a repository')
         existing_repository_id = request.query_params.get("source")
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
         request.data.update({"tenant_id": tenant_id})
         repository_data = request.data
         description = 'Create a feature repository'
@@ -119,7 +122,7 @@ class RepositoryCreateView(generics.GenericAPIView):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info('create/clone repository - this request is for user impersonation')
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             FeatureRepositoryHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
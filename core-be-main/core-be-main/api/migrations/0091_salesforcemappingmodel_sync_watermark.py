@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0090_tenant_date_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="salesforcemappingmodel",
+            name="sync_watermark",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0091_salesforcemappingmodel_sync_watermark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contract",
+            name="content_hash",
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0092_contract_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contracttemplate",
+            name="template_version",
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="contracttemplate",
+            name="placeholders",
+            field=models.JSONField(null=True),
+        ),
+    ]
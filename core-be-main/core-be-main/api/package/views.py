@@ -9,8 +9,11 @@ from rest_framework.exceptions import ValidationError
 from ..auth.authentication import CognitoAuthentication
 from ..feature_repository.models import Feature, FeatureGroup
 from ..plan.models import Plan, Tier
-from ..tenant.models import Tenant
-from ..user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from ..user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from ..utils.custom_exception_handler import (
     PackageDoesNotExistsException,
     PlanDoesNotExistsException, PackageDoesNotHaveTiersException,
@@ -74,7 +77,7 @@ class PackageViewSet(viewsets.ModelViewSet):
     )
     def create(self, request, *args, **kwargs):
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
         request.data.update({"tenant_id": tenant_id})
 
         package_id = request.query_params.get("source")
@@ -123,7 +126,7 @@ class PackageViewSet(viewsets.ModelViewSet):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info("package cloned - this request is for user impersonation")
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 PackageHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -170,7 +173,7 @@ class PackageViewSet(viewsets.ModelViewSet):
             package = Package.objects.get(
                 id=obj["id"], tenant_id=tenant_id, is_deleted=False
             )
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             for item in tier_details:
                 tier = Tier.objects.get(
                     id=item.id, tenant_id=tenant_id, is_deleted=False
@@ -185,7 +188,7 @@ class PackageViewSet(viewsets.ModelViewSet):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info("package created - this request is for user impersonation")
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 PackageHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -325,7 +328,7 @@ class PackageViewSet(viewsets.ModelViewSet):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info("package updated - this request is for user impersonation")
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             package_obj = Package.objects.get(
                 id=kwargs["pk"], tenant_id=tenant_id, is_deleted=False
             )
@@ -13,8 +13,11 @@ from api.plan.serializers import (
     PlanCreateSerializer,
     PlanUpdateSerializer,
 )
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import PlanDoesNotExistsException
 from api.utils.logger import logger
 from api.utils.responses import ResponseBuilder
@@ -159,7 +162,7 @@ class PlanCreateView(GenericAPIView):
                 # check for user impersonation
                 if request.auth and request.auth[0]:
                     logger.info('create plan - this request is for user impersonation')
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     plan_obj = Plan.objects.get(
                         id=response.get('id'), is_deleted=False, tenant_id=tenant_id)
                     PlanHistory.objects.create(
@@ -12,8 +12,11 @@ from api.plan.serializers import (
     TierSerializer,
     TierUpdateSerializer,
 )
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import (
     TierDoesNotExistsException,
     TierAlreadyExistsException, PackageDoesNotHaveTiersException,
@@ -67,7 +70,7 @@ class TierCreateView(GenericAPIView):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info("Adding new tiers - this request is for user impersonation")
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             plan_obj = Plan.objects.get(
                 id=plan_id, is_deleted=False, tenant_id=tenant_id
             )
@@ -122,7 +125,7 @@ class TierView(GenericAPIView):
                     logger.info(
                         "updating tiers - this request is for user impersonation"
                     )
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     plan_obj = Plan.objects.get(
                         id=tier.plan_id.id, is_deleted=False, tenant_id=tenant_id
                     )
@@ -177,7 +180,7 @@ class TierView(GenericAPIView):
         # check for user impersonation
         if request.auth and request.auth[0]:
             logger.info("deleting tiers - this request is for user impersonation")
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             plan_obj = Plan.objects.get(
                 id=tier.plan_id.id, is_deleted=False, tenant_id=tenant_id
             )
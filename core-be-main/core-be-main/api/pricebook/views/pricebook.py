@@ -24,12 +24,16 @@ from api.pricebook.serializers.pricebook import (
     PriceBookEntrySerializer,
     PriceBookSerializer,
 )
+from api.pricing.details_cache import pricing_details_cache
 from api.pricing.formula_calculator import FormulaCalculator
 from api.pricing.models import PricingModel, PricingModelDetails
 from api.product.models import Product
-from api.tenant.models import Tenant
-from api.user.models import UserRole, UserRoleMapping
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_user_role_names,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.logger import logger
 from api.utils.responses import ResponseBuilder
@@ -163,7 +167,7 @@ class PriceBookViewSet(viewsets.ModelViewSet):
 
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     pricebook_obj = PriceBook.objects.get(
                         id=pricebook_id, is_deleted=False
                     )
@@ -397,7 +401,7 @@ class PriceBookViewSet(viewsets.ModelViewSet):
 
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     pricebook_obj = PriceBook.objects.get(
                         id=pricebook_id, is_deleted=False
                     )
@@ -493,20 +497,11 @@ class PriceBookViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         logger.info("Getting all the price book")
         tenant_id = get_tenant_id_from_email(self.request.user[0])
-        dd_ie_role_obj = UserRole.objects.filter(
-            name__in=["Deal Desk", "Implementation Analyst"], tenant_id=tenant_id, is_deleted=False
-        )
-        user_role_id = [item.id for item in dd_ie_role_obj]
         user_obj = get_user_obj_from_email(self.request.user[0])
-        is_deal_desk_or_ie = False
-        if user_role_id:
-            user_role_map_obj = UserRoleMapping.objects.filter(
-                user_id=user_obj.id,
-                user_role_id__in=user_role_id,
-                is_deleted=False,
-            )
-            if user_role_map_obj:
-                is_deal_desk_or_ie = True
+        is_deal_desk_or_ie = bool(
+            {"Deal Desk", "Implementation Analyst"}
+            & set(get_user_role_names(self.request.user[0]))
+        )
         user_id = user_obj.id
         queryset = self.filter_queryset(self.get_queryset())
         org_hierarchy_id = user_obj.org_hierarchy_id
@@ -627,8 +622,8 @@ class PriceBookViewSet(viewsets.ModelViewSet):
                     if pricing_model_detail.tier_id == package.tier_id:
                         current_pricing_model_detail = pricing_model_detail
 
-                pricing_model_details_data = json.loads(
-                    current_pricing_model_detail.details
+                pricing_model_details_data = pricing_details_cache.get(
+                    current_pricing_model_detail
                 )
 
                 pricing_model_detail_addons = pricing_model_details_data.get(
@@ -770,7 +765,7 @@ class PriceBookViewSet(viewsets.ModelViewSet):
 
         try:
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 # Create PriceBookHistory entry
                 pricebook_history_data = {
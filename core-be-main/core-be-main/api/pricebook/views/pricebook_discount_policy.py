@@ -14,9 +14,12 @@ from api.pricebook.serializers.pricebook_discount_policy import (
     PriceBookDiscountPolicySerializer,
 )
 from api.product.models import Product
-from api.tenant.models import Tenant
 from api.user.models import User, OrgHierarchy
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import PriceBookDoesNotExistsException
 from api.utils.responses import ResponseBuilder
@@ -96,7 +99,7 @@ class PriceBookDiscountPolicyViewSet(viewsets.ModelViewSet):
 
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     pricebook_policy_obj = PriceBookDiscountPolicy.objects.get(id=serializer.data["id"],
                                                                                is_deleted=False)
                     new_data = CommonUtils.convert_uuids_to_strings(new_data)
@@ -192,7 +195,7 @@ class PriceBookDiscountPolicyViewSet(viewsets.ModelViewSet):
 
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     # Create PriceBookDiscountPolicyHistory entries for each deleted policy
                     policy_history_data = {
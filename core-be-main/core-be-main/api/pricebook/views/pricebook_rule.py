@@ -10,8 +10,11 @@ from rest_framework.viewsets import ModelViewSet
 from api.auth.authentication import CognitoAuthentication
 from api.pricebook.models import PriceBookRule, PriceBookRuleHistory
 from api.pricebook.serializers.pricebook_rule import PriceBookRuleSerializer
-from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import PriceBookRuleDoesNotExistsException, PriceBookRuleExistsException
 from api.utils.responses import ResponseBuilder
@@ -112,7 +115,7 @@ class PriceBookRuleViewSet(ModelViewSet):
             try:
                 if request.auth and request.auth[0]:
                     tenant_id = get_tenant_id_from_email(request.user[0])
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     # Create PriceBookRuleHistory entry
                     pricebook_rule_history_data = {
@@ -199,7 +202,7 @@ class PriceBookRuleViewSet(ModelViewSet):
 
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     # Create PriceBookRuleHistory entry
                     pricebook_rule_history_data = {
@@ -234,7 +237,7 @@ class PriceBookRuleViewSet(ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 # Create PriceBookRuleHistory entry for deletion
                 pricebook_rule_history_data = {
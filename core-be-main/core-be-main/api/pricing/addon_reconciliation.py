@@ -0,0 +1,209 @@
+import json
+import threading
+import uuid
+
+from django.db import transaction
+
+from api.feature_repository.models import Feature
+from api.package.models import PackageDetail
+from api.pricing.details_cache import pricing_details_cache
+from api.pricing.models import PricingModelDetails
+from api.utils.logger import logger
+
+
+def _load_details(details):
+    if isinstance(details, str):
+        return json.loads(details) if details else {}
+    return details or {}
+
+
+def _to_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def get_addon_features(tenant_id, addon_ids):
+    """Maps the id of every non deleted addon feature to its feature group id"""
+    addon_ids = set(filter(None, map(_to_uuid, addon_ids)))
+    if not addon_ids:
+        return {}
+    return dict(
+        Feature.objects.filter(
+            id__in=addon_ids, tenant_id=tenant_id, is_deleted=False
+        ).values_list("id", "feature_group_id")
+    )
+
+
+def get_package_addon_ids(tenant_id, package_tier_ids):
+    """
+    Maps (package_id, tier_id) to the ids of the features marked as addons in
+    the feature groups of its package detail. Pairs without a package detail
+    are left out.
+    """
+    package_ids = set(package_id for package_id, _ in package_tier_ids)
+    tier_ids = set(tier_id for _, tier_id in package_tier_ids)
+    if not package_ids or not tier_ids:
+        return {}
+
+    package_details = PackageDetail.objects.filter(
+        package_id__in=package_ids,
+        tier_id__in=tier_ids,
+        is_deleted=False,
+        tenant_id=tenant_id,
+    ).order_by("created_on")
+
+    package_addon_ids = {}
+    for package_detail in package_details:
+        key = (package_detail.package_id_id, package_detail.tier_id_id)
+        if key in package_addon_ids:
+            # The first package detail of a tier is the one in use
+            continue
+        addon_ids = set()
+        for feature_group in _load_details(package_detail.details).get(
+            "feature_groups", []
+        ):
+            for feature in feature_group.get("features", []):
+                if feature.get("is_addon"):
+                    addon_ids.add(_to_uuid(feature.get("feature_id")))
+        package_addon_ids[key] = addon_ids
+    return package_addon_ids
+
+
+def filter_addons(addons, addon_features, package_addon_ids=None):
+    """
+    Returns the addons which are still offered. An addon is dropped once its
+    feature is deleted or not in a feature group, or when the package detail
+    of the tier no longer marks the feature as an addon.
+    """
+    return [
+        addon
+        for addon in prune_addons(addons, package_addon_ids)
+        if addon_features.get(_to_uuid(addon.get("id")))
+    ]
+
+
+def prune_addons(addons, package_addon_ids=None):
+    """
+    Returns the addons which the package detail of the tier still marks as
+    addons. Every addon is kept when the tier has no package detail.
+    """
+    if package_addon_ids is None:
+        return list(addons)
+    return [
+        addon for addon in addons if _to_uuid(addon.get("id")) in package_addon_ids
+    ]
+
+
+def reconcile_pricing_model_details(tenant_id, pricing_model_details):
+    """
+    Removes the addons which the package detail of their tier no longer marks
+    as addons from the pricing model details. Addons of deleted or ungrouped
+    features are kept, they are only left out when the details are read.
+    Details which are already in sync are not written, so running it again is
+    a no-op. Returns the number of updated details.
+    """
+    pricing_model_details = list(pricing_model_details)
+    if not pricing_model_details:
+        return 0
+
+    package_addon_ids = get_package_addon_ids(
+        tenant_id,
+        [
+            (item.pricing_model_id.package_id_id, item.tier_id_id)
+            for item in pricing_model_details
+        ],
+    )
+
+    updated = 0
+    for item in pricing_model_details:
+        tier_addon_ids = package_addon_ids.get(
+            (item.pricing_model_id.package_id_id, item.tier_id_id)
+        )
+        addons = pricing_details_cache.get(item).get("addons", [])
+        if len(prune_addons(addons, tier_addon_ids)) == len(addons):
+            continue
+
+        details = pricing_details_cache.get_copy(item)
+        details["addons"] = prune_addons(details["addons"], tier_addon_ids)
+        item.details = json.dumps(details)
+        item.save()
+        pricing_details_cache.invalidate(item.id)
+        updated += 1
+    return updated
+
+
+def reconcile_addons(tenant_id, package_ids=None):
+    """
+    Reconciles the addons of the pricing models of the given packages, or of
+    all the pricing models of the tenant when no packages are given.
+    """
+    pricing_model_details = PricingModelDetails.objects.filter(
+        tenant_id=tenant_id,
+        is_deleted=False,
+        pricing_model_id__is_deleted=False,
+    ).select_related("pricing_model_id")
+    if package_ids is not None:
+        pricing_model_details = pricing_model_details.filter(
+            pricing_model_id__package_id__in=package_ids
+        )
+
+    try:
+        updated = reconcile_pricing_model_details(tenant_id, pricing_model_details)
+    except Exception as e:
+        logger.error(f"Failed to reconcile pricing model addons: {e}")
+        return 0
+    if updated:
+        logger.info(f"Removed stale addons from {updated} pricing model details")
+    return updated
+
+
+class AddonReconciliation:
+    """
+    The addon reconciliations scheduled in a transaction, merged by tenant so
+    that each tenant is reconciled once when the transaction commits.
+    """
+
+    def __init__(self):
+        # None stands for all the pricing models of the tenant
+        self.tenants = {}
+        self.done = False
+
+    def add(self, tenant_id, package_ids=None):
+        if package_ids is None:
+            self.tenants[tenant_id] = None
+        elif self.tenants.setdefault(tenant_id, set()) is not None:
+            self.tenants[tenant_id].update(package_ids)
+
+    def run(self):
+        if self.done:
+            return
+        self.done = True
+        if getattr(_scheduled, "reconciliation", None) is self:
+            _scheduled.reconciliation = None
+        for tenant_id, package_ids in self.tenants.items():
+            if package_ids is None:
+                reconcile_addons(tenant_id)
+            else:
+                reconcile_addons(tenant_id, package_ids=list(package_ids))
+
+
+# The reconciliation of the current thread until it has run
+_scheduled = threading.local()
+
+
+def schedule_addon_reconciliation(tenant_id, package_ids=None):
+    """
+    Runs reconcile_addons once the current transaction commits. Requests
+    made before the reconciliation runs are merged into it.
+    """
+    if not tenant_id:
+        return
+    reconciliation = getattr(_scheduled, "reconciliation", None)
+    if reconciliation is None:
+        reconciliation = _scheduled.reconciliation = AddonReconciliation()
+    reconciliation.add(tenant_id, package_ids)
+    # Each request registers the run, so that it is kept when a savepoint of
+    # an earlier request rolls back. Only the first of them reconciles.
+    transaction.on_commit(reconciliation.run)
@@ -0,0 +1,347 @@
+import ast
+import hashlib
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.utils.logger import logger
+from .builtin_func import builtin_types_and_functions
+
+CODE_EDITOR_CACHE_SIZE = int(os.getenv("CODE_EDITOR_CACHE_SIZE", default=256))
+CODE_EDITOR_MAX_STEPS = int(os.getenv("CODE_EDITOR_MAX_STEPS", default=10000000))
+CODE_EDITOR_TIMEOUT = float(os.getenv("CODE_EDITOR_TIMEOUT", default=5))
+# Worker processes for code editor formulas, 0 runs them in the request thread.
+# Not supported on AWS Lambda, where formulas always run in the request thread.
+CODE_EDITOR_POOL_SIZE = int(os.getenv("CODE_EDITOR_POOL_SIZE", default=0))
+# Time a worker gets beyond CODE_EDITOR_TIMEOUT before the pool is restarted
+CODE_EDITOR_POOL_GRACE = float(os.getenv("CODE_EDITOR_POOL_GRACE", default=1))
+
+
+class CodeEditorBudgetExceeded(Exception):
+    pass
+
+
+# Names of the budget checks compiled into formulas, formulas can not use them
+CODE_EDITOR_STEP = "__code_editor_step__"
+CODE_EDITOR_ITER = "__code_editor_iter__"
+
+
+class BudgetTransformer(ast.NodeTransformer):
+    """
+    Compiles a step into every loop iteration, function call and
+    comprehension item of a formula, the only ways for it to run long.
+    """
+
+    @staticmethod
+    def step_call():
+        return ast.Call(
+            func=ast.Name(id=CODE_EDITOR_STEP, ctx=ast.Load()), args=[], keywords=[]
+        )
+
+    @staticmethod
+    def check_name(name):
+        if name in (CODE_EDITOR_STEP, CODE_EDITOR_ITER):
+            raise SyntaxError(f"{name} can not be used in a formula")
+
+    def visit_Name(self, node):
+        self.check_name(node.id)
+        return node
+
+    def visit_arg(self, node):
+        self.check_name(node.arg)
+        return self.generic_visit(node)
+
+    def _step_body(self, node):
+        self.generic_visit(node)
+        node.body.insert(0, ast.Expr(value=self.step_call()))
+        return node
+
+    visit_For = visit_While = visit_FunctionDef = _step_body
+
+    def visit_Lambda(self, node):
+        self.generic_visit(node)
+        node.body = ast.BoolOp(op=ast.Or(), values=[self.step_call(), node.body])
+        return node
+
+    def visit_comprehension(self, node):
+        self.generic_visit(node)
+        node.iter = ast.Call(
+            func=ast.Name(id=CODE_EDITOR_ITER, ctx=ast.Load()),
+            args=[node.iter],
+            keywords=[],
+        )
+        return node
+
+
+class CodeEditorEngine:
+    """
+    Executes the advance formula of code editor columns.
+
+    Compiled code objects are cached by the hash of their source. Every call
+    runs in its own namespace with budget checks compiled into its loops and
+    functions, so a formula is interrupted once it exceeds its step or time
+    budget without tracing it, and several requests can execute formulas
+    concurrently.
+    """
+
+    def __init__(
+        self,
+        cache_size=CODE_EDITOR_CACHE_SIZE,
+        max_steps=CODE_EDITOR_MAX_STEPS,
+        timeout=CODE_EDITOR_TIMEOUT,
+    ):
+        self.cache_size = cache_size
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, source):
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        with self._lock:
+            code = self._compiled.get(key)
+            if code:
+                self._compiled.move_to_end(key)
+                return code
+
+        tree = BudgetTransformer().visit(ast.parse(source, "<string>", "exec"))
+        code = compile(ast.fix_missing_locations(tree), "<string>", "exec")
+        with self._lock:
+            self._compiled[key] = code
+            while len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        return code
+
+    @staticmethod
+    def _get_budget(max_steps, timeout):
+        deadline = time.monotonic() + timeout
+        steps = 0
+
+        def step():
+            nonlocal steps
+            steps += 1
+            if steps > max_steps:
+                raise CodeEditorBudgetExceeded(f"Formula exceeded {max_steps} steps")
+            if not steps % 1000 and time.monotonic() > deadline:
+                raise CodeEditorBudgetExceeded(f"Formula exceeded {timeout}s")
+
+        def iterate(iterable):
+            for item in iterable:
+                step()
+                yield item
+
+        return step, iterate
+
+    def execute(self, source, variables, max_steps=None, timeout=None):
+        """Runs the formula and returns the value it assigns to `result`"""
+        code = self.compile(source)
+        namespace = dict(variables)
+        namespace["__builtins__"] = builtin_types_and_functions
+        namespace[CODE_EDITOR_STEP], namespace[CODE_EDITOR_ITER] = self._get_budget(
+            max_steps or self.max_steps, timeout or self.timeout
+        )
+        exec(code, namespace)
+        return self.parse_result(namespace["result"])
+
+    @staticmethod
+    def parse_result(result):
+        """
+        Formulas used to print their result and have it evaluated back, so a
+        string such as '5' results in 5. Results are still parsed that way,
+        only literals are accepted, anything else raises ValueError.
+        """
+        if result is None or isinstance(result, (bool, int, float)):
+            return result
+        return ast.literal_eval(str(result))
+
+
+code_editor_engine = CodeEditorEngine()
+
+
+# Every worker of the pool has a slot of (pid, job id, start time) values in
+# shared memory, where it reports the job it is running
+_SLOT_SIZE = 3
+_worker_slots = None
+_worker_slot = None
+
+
+def _process_is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _init_pool_worker(slots=None):
+    global _worker_slots, _worker_slot
+    if slots is not None:
+        with slots.get_lock():
+            # A worker replacing one which died takes over its slot
+            for index in range(0, len(slots), _SLOT_SIZE):
+                pid = int(slots[index])
+                if not pid or not _process_is_alive(pid):
+                    slots[index : index + _SLOT_SIZE] = [os.getpid(), 0, 0]
+                    _worker_slots, _worker_slot = slots, index
+                    break
+    # Warm the compile cache and the restricted builtins before the first job
+    code_editor_engine.execute("result = 0", {})
+
+
+def _set_running_job(job_id, started):
+    if _worker_slots is None:
+        return
+    with _worker_slots.get_lock():
+        _worker_slots[_worker_slot + 1] = job_id
+        _worker_slots[_worker_slot + 2] = started
+
+
+def _execute_job(formula, variables, job_id=0):
+    if job_id:
+        _set_running_job(job_id, time.monotonic())
+    try:
+        return code_editor_engine.execute(formula, variables)
+    except Exception as e:
+        logger.info("An error occurred: %s", e)
+        return 0
+    finally:
+        if job_id:
+            _set_running_job(0, 0)
+
+
+class _PoolRestarted(Exception):
+    pass
+
+
+class CodeEditorPool:
+    """
+    Warm pool of worker processes for code editor formulas.
+
+    Not supported on AWS Lambda, which has no /dev/shm for the locks of
+    multiprocessing: when the pool can not start, formulas run in the
+    calling thread. The workers come from a forkserver, so they are not
+    forked from the threads of the server.
+
+    Every job runs with the engine budget inside its worker, and the worker
+    reports when it started the job. A job still running its timeout (plus
+    a grace period) after it started, e.g. stuck in a builtin, resolves to 0
+    and gets the pool terminated and restarted. Time spent waiting in the
+    queue behind the jobs of other requests does not count, and the jobs the
+    restart interrupted are submitted again to the new pool.
+    """
+
+    def __init__(
+        self,
+        size=CODE_EDITOR_POOL_SIZE,
+        timeout=CODE_EDITOR_TIMEOUT,
+        grace=CODE_EDITOR_POOL_GRACE,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.grace = grace
+        # The running pool and the slots of its workers
+        self._workers = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+
+    def start(self):
+        """The worker pool and its slots, None when it can not run here"""
+        with self._lock:
+            if self._workers is None and not self._unavailable:
+                try:
+                    context = multiprocessing.get_context("forkserver")
+                    # Spare slots in case the pid of a dead worker is reused
+                    slots = context.Array("d", 2 * self.size * _SLOT_SIZE)
+                    pool = context.Pool(
+                        self.size, initializer=_init_pool_worker, initargs=(slots,)
+                    )
+                    self._workers = (pool, slots)
+                except (ImportError, OSError, ValueError) as e:
+                    logger.error("Code editor pool is not available: %s", e)
+                    self._unavailable = True
+            return self._workers
+
+    def _restart(self, workers):
+        with self._lock:
+            if self._workers is workers:
+                workers[0].terminate()
+                self._workers = None
+
+    @staticmethod
+    def _get_started(slots, job_id):
+        """When a worker started the job, None while it is queued or done"""
+        with slots.get_lock():
+            for index in range(0, len(slots), _SLOT_SIZE):
+                if slots[index + 1] == job_id:
+                    return slots[index + 2]
+        return None
+
+    def _wait(self, workers, job_id, async_result):
+        """The result of a job, raises _PoolRestarted once it can not come"""
+        limit = self.timeout + self.grace
+        while True:
+            if self._workers is not workers and not async_result.ready():
+                raise _PoolRestarted()
+            started = self._get_started(workers[1], job_id)
+            if started is None:
+                wait = limit
+            else:
+                wait = started + limit - time.monotonic()
+            try:
+                return async_result.get(timeout=max(wait, 0))
+            except multiprocessing.TimeoutError:
+                pass
+            started = self._get_started(workers[1], job_id)
+            if started is not None and time.monotonic() - started >= limit:
+                logger.error("Code editor job timed out, restarting worker pool")
+                self._restart(workers)
+                return 0
+
+    def execute_many(self, jobs):
+        """Returns the result of every job, in order"""
+        results = [None] * len(jobs)
+        remaining = list(range(len(jobs)))
+        while remaining:
+            workers = self.start()
+            if workers is None:
+                for index in remaining:
+                    results[index] = _execute_job(*jobs[index])
+                break
+            try:
+                pending = []
+                for index in remaining:
+                    job_id = next(self._job_ids)
+                    pending.append(
+                        (
+                            index,
+                            job_id,
+                            workers[0].apply_async(
+                                _execute_job, (*jobs[index], job_id)
+                            ),
+                        )
+                    )
+            except ValueError:
+                # Restarted by another request in the meantime
+                continue
+            try:
+                for index, job_id, async_result in pending:
+                    try:
+                        results[index] = self._wait(workers, job_id, async_result)
+                    except _PoolRestarted:
+                        raise
+                    except Exception as e:
+                        logger.info("An error occurred: %s", e)
+                        results[index] = 0
+                    remaining.remove(index)
+            except _PoolRestarted:
+                logger.info("Code editor pool restarted, submitting jobs again")
+        return results
+
+
+code_editor_pool = CodeEditorPool() if CODE_EDITOR_POOL_SIZE else None
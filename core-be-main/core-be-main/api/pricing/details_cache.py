@@ -0,0 +1,66 @@
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .range_index import index_pricing_details
+
+PRICING_DETAILS_CACHE_SIZE = int(
+    os.getenv("PRICING_DETAILS_CACHE_SIZE", default=1024)
+)
+
+
+class PricingDetailsCache:
+    """
+    Per-process cache of parsed and range indexed PricingModelDetails.details.
+
+    Entries are scoped by tenant and keyed by the detail id and its updated_on,
+    so a row saved by another process is re-parsed on its next read. The
+    returned details are shared between requests and must not be modified,
+    callers which need to change them use get_copy.
+    """
+
+    def __init__(self, max_size=PRICING_DETAILS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(pricing_model_detail):
+        return (
+            pricing_model_detail.tenant_id_id,
+            pricing_model_detail.id,
+            pricing_model_detail.updated_on,
+        )
+
+    def get(self, pricing_model_detail):
+        key = self._get_key(pricing_model_detail)
+        with self._lock:
+            details = self._entries.get(key)
+            if details is not None:
+                self._entries.move_to_end(key)
+                return details
+
+        details = index_pricing_details(json.loads(pricing_model_detail.details))
+        with self._lock:
+            self._entries[key] = details
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return details
+
+    def get_copy(self, pricing_model_detail):
+        return copy.deepcopy(self.get(pricing_model_detail))
+
+    def invalidate(self, pricing_model_detail_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == pricing_model_detail_id]:
+                del self._entries[key]
+
+    def invalidate_tenant(self, tenant_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == tenant_id]:
+                del self._entries[key]
+
+
+pricing_details_cache = PricingDetailsCache()
@@ -1,16 +1,60 @@
 import copy
-import io
+import os
 import re
-import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
 
 import cexprtk
+import numpy as np
 
 from api.utils.logger import logger
-from .builtin_func import builtin_types_and_functions
+from .code_editor import code_editor_engine, code_editor_pool
+from .range_index import get_range_index
 from api.utils.custom_exception_handler import MetricLimitException
 
+FORMULA_CACHE_SIZE = int(os.getenv("FORMULA_CACHE_SIZE", default=512))
+
+
+class CompiledExpressionCache:
+    """
+    Per-process LRU cache of parsed cexprtk expressions.
+
+    Entries are keyed by the formula text and the names of the variables bound
+    to its symbol table, the values are rebound on every evaluation. Each entry
+    carries its own lock because the symbol table is shared by every caller.
+    """
+
+    def __init__(self, max_size=FORMULA_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, formula, variable_names):
+        key = (formula, variable_names)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry
+
+        symbol_table = cexprtk.Symbol_Table({name: 0 for name in variable_names})
+        entry = (cexprtk.Expression(formula, symbol_table), threading.Lock())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class FormulaCalculator:
+    expression_cache = CompiledExpressionCache()
+
     @staticmethod
     def get_lookup(formula):
         formula = formula.replace("$", "")
@@ -30,16 +74,14 @@ class FormulaCalculator:
 
     @staticmethod
     def get_row_from_range(data, quantity, metric_key, is_curve=False):
-        # Reference - https://stackoverflow.com/questions/2465921/how-to-copy-a-dictionary-and-only-edit-the-copy
-        if data and isinstance(data[0].get(metric_key), dict):
-            for item in data:
-                if item[metric_key]["low"] <= quantity <= item[metric_key]["high"]:
-                    return copy.deepcopy(item)
-        else:
-            for item in data:
-                if item.get(metric_key) and quantity > int(item.get(metric_key)):
-                    continue
-                return copy.deepcopy(item)
+        """
+        Returns a read-only view of the row matching the quantity, callers which
+        need to modify the row must copy it first.
+        """
+        if data:
+            row_index = get_range_index(data, metric_key).lookup(quantity)
+            if row_index is not None:
+                return MappingProxyType(data[row_index])
         if not is_curve:
             if data and isinstance(data[0].get(metric_key), dict):
                 low_value = data[0][metric_key]["low"]
@@ -52,6 +94,23 @@ class FormulaCalculator:
                 f"Metric Range Exceeded. Please enter quantity upto {high_value}"
             )
 
+    @staticmethod
+    def get_row_indexes_from_range(data, quantities, metric_key):
+        """
+        Vectorized counterpart of get_row_from_range, resolves the row index
+        for every quantity at once and returns -1 where no row matches.
+        """
+        return get_range_index(data, metric_key).lookup_many(quantities)
+
+    @staticmethod
+    def get_editor_rows(data):
+        """
+        Rows handed to code editor formulas. The rows may be cached details
+        shared between requests and formulas can change what they are given,
+        so every calculation gets a copy.
+        """
+        return copy.deepcopy(list(data))
+
     @staticmethod
     def get_filtered_item(item):
         return {
@@ -67,12 +126,17 @@ class FormulaCalculator:
     @staticmethod
     def evaluate_formula(formula, item):
         try:
-            symbol_table = cexprtk.Symbol_Table(item)
-            result = cexprtk.Expression(formula, symbol_table)
-            if FormulaCalculator.check_for_if_else(formula):
-                result()
-                return result.results()[0]
-            return result()
+            expression, lock = FormulaCalculator.expression_cache.get(
+                formula, tuple(sorted(item))
+            )
+            with lock:
+                variables = expression.symbol_table.variables
+                for key, value in item.items():
+                    variables[key] = value
+                if FormulaCalculator.check_for_if_else(formula):
+                    expression()
+                    return expression.results()[0]
+                return expression()
         except cexprtk._exceptions.ParseException as err:
             raise err
 
@@ -115,23 +179,31 @@ class FormulaCalculator:
                         is_curve=is_curve,
                     )
                 intermediate_variables = {}
-                if discounted_units:
-                    for data_row in data:
-                        if lookup_row and lookup_row == data_row:
-                            data_row.update(discounted_units)
+                if discounted_units and lookup_row:
+                    # Discount a copy of the row, the rows may be shared cached details
+                    for index, data_row in enumerate(data):
+                        if lookup_row == data_row:
+                            data = list(data)
+                            data[index] = {**data_row, **discounted_units}
                             break
-                for i_item in intermediate_columns:
-                    intermediate_op_resp = FormulaCalculator.execute_code_string(
-                        formula=i_item["advance_formula"],
-                        variables={
-                            "rows": data,
-                            "units": quantity_dict,
-                            "is_curve": is_curve,
-                        },
-                    )
-                    intermediate_variables[i_item["key"]] = intermediate_op_resp
+                editor_rows = FormulaCalculator.get_editor_rows(data)
+                intermediate_op_resp = FormulaCalculator.execute_code_strings(
+                    [
+                        (
+                            i_item["advance_formula"],
+                            {
+                                "rows": editor_rows,
+                                "units": quantity_dict,
+                                "is_curve": is_curve,
+                            },
+                        )
+                        for i_item in intermediate_columns
+                    ]
+                )
+                for i_item, i_value in zip(intermediate_columns, intermediate_op_resp):
+                    intermediate_variables[i_item["key"]] = i_value
                 editor_variables = {
-                    "rows": data,
+                    "rows": editor_rows,
                     "units": quantity_dict,
                     "is_curve": is_curve,
                 }
@@ -155,6 +227,7 @@ class FormulaCalculator:
                                 is_curve=is_curve,
                             )
                             if lookup_row:
+                                lookup_row = dict(lookup_row)
                                 if discounted_units:
                                     lookup_row.update(discounted_units)
                                 lookup_row.update({quantity: quantity_dict[quantity]})
@@ -181,27 +254,180 @@ class FormulaCalculator:
             output_dict["final_output"] += value
         return output_dict
 
+    @staticmethod
+    def calculate_many(
+        columns, data, metric_key, quantities, is_curve=False, discounted_units=None
+    ):
+        """
+        Batch variant of calculate for a single metric evaluated at many
+        quantities. Returns one output dict per quantity, in the given order.
+        """
+        quantities = [quantity if quantity else 0 for quantity in quantities]
+        output_columns = [item for item in columns if item.get("is_output_column")]
+        code_editor_columns = [
+            item for item in output_columns if item.get("is_code_editor")
+        ]
+        intermediate_columns = [
+            item for item in columns if item.get("is_intermediate_column")
+        ]
+        if (code_editor_columns and discounted_units) or (
+            intermediate_columns and len(code_editor_columns) < len(output_columns)
+        ):
+            return [
+                FormulaCalculator.calculate(
+                    columns,
+                    data,
+                    {metric_key: quantity},
+                    is_curve=is_curve,
+                    discounted_units=discounted_units,
+                )
+                for quantity in quantities
+            ]
+
+        output_list = [{"final_output": 0} for _ in quantities]
+        if code_editor_columns:
+            FormulaCalculator.calculate_code_editor_many(
+                code_editor_columns,
+                intermediate_columns,
+                data,
+                metric_key,
+                quantities,
+                output_list,
+                is_curve=is_curve,
+            )
+        for item in output_columns:
+            if item.get("is_code_editor"):
+                continue
+            lookup_key = FormulaCalculator.get_lookup(item.get("formula", ""))
+            if not lookup_key:
+                continue
+            if metric_key not in lookup_key:
+                for output_dict in output_list:
+                    output_dict[item["key"]] = 0
+                continue
+            output_formula = FormulaCalculator.get_formula(item["formula"])
+            row_indexes = FormulaCalculator.get_row_indexes_from_range(
+                data=data, quantities=quantities, metric_key=lookup_key
+            )
+            if not is_curve and (row_indexes < 0).any():
+                # Raise the same range error as the single quantity lookup
+                FormulaCalculator.get_row_from_range(
+                    data=data,
+                    quantity=quantities[int(np.argmin(row_indexes))],
+                    metric_key=lookup_key,
+                )
+            filtered_rows = {}
+            for output_dict, quantity, index in zip(
+                output_list, quantities, row_indexes
+            ):
+                if index < 0:
+                    output_dict[item["key"]] = 0
+                    continue
+                if index not in filtered_rows:
+                    lookup_row = dict(data[index])
+                    if discounted_units:
+                        lookup_row.update(discounted_units)
+                    filtered_rows[index] = FormulaCalculator.get_filtered_item(
+                        lookup_row
+                    )
+                filtered_item = FormulaCalculator.get_filtered_item(
+                    {**filtered_rows[index], metric_key: quantity}
+                )
+                output_dict[item["key"]] = FormulaCalculator.evaluate_formula(
+                    formula=output_formula, item=filtered_item
+                )
+        for output_dict in output_list:
+            output_dict["final_output"] = sum(
+                value for key, value in output_dict.items() if key != "final_output"
+            )
+        return output_list
+
+    @staticmethod
+    def calculate_code_editor_many(
+        code_editor_columns,
+        intermediate_columns,
+        data,
+        metric_key,
+        quantities,
+        output_list,
+        is_curve=False,
+    ):
+        """
+        Runs the code editor output columns for every quantity as two batches,
+        the intermediate columns first and then the output columns. The
+        quantities share a single copy of the rows, the worker pool hands
+        every job a copy of its own anyway.
+        """
+        for item in code_editor_columns:
+            editor_metric_key = FormulaCalculator.get_metric_key(
+                item["advance_formula"]
+            )
+            if not is_curve and editor_metric_key == metric_key:
+                row_indexes = FormulaCalculator.get_row_indexes_from_range(
+                    data=data, quantities=quantities, metric_key=metric_key
+                )
+                if (row_indexes < 0).any():
+                    FormulaCalculator.get_row_from_range(
+                        data=data,
+                        quantity=quantities[int(np.argmin(row_indexes))],
+                        metric_key=metric_key,
+                    )
+
+        units_list = [{metric_key: quantity} for quantity in quantities]
+        editor_rows = FormulaCalculator.get_editor_rows(data)
+        intermediate_results = FormulaCalculator.execute_code_strings(
+            [
+                (
+                    i_item["advance_formula"],
+                    {"rows": editor_rows, "units": units, "is_curve": is_curve},
+                )
+                for units in units_list
+                for i_item in intermediate_columns
+            ]
+        )
+        editor_jobs = []
+        for position, units in enumerate(units_list):
+            editor_variables = {
+                "rows": editor_rows,
+                "units": units,
+                "is_curve": is_curve,
+            }
+            offset = position * len(intermediate_columns)
+            for i_item, i_value in zip(
+                intermediate_columns, intermediate_results[offset:]
+            ):
+                editor_variables[i_item["key"]] = i_value
+            for item in code_editor_columns:
+                editor_jobs.append((item["advance_formula"], editor_variables))
+
+        editor_results = iter(FormulaCalculator.execute_code_strings(editor_jobs))
+        for output_dict in output_list:
+            for item in code_editor_columns:
+                output_dict[item["key"]] = next(editor_results)
+
     @staticmethod
     def execute_code_string(formula, variables):
+        if code_editor_pool:
+            return code_editor_pool.execute_many([(formula, variables)])[0]
         try:
             logger.info("Code Execution via Editor for formula %s", formula)
-            # Create a StringIO object to capture the output
-            captured_output = io.StringIO()
-            sys.stdout = captured_output  # Redirect stdout
-
-            compiled_code = compile(formula, "<string>", "exec")
-            variables.update({"__builtins__": builtin_types_and_functions})
-            exec(compiled_code, variables)
-
-            # Get the captured output
-            print(variables["result"])
-            output = captured_output.getvalue()
-            return eval(output)
+            return code_editor_engine.execute(formula, variables)
         except Exception as e:
             logger.info("An error occurred: %s", e)
             return 0
-        finally:
-            sys.stdout = sys.__stdout__
+
+    @staticmethod
+    def execute_code_strings(jobs):
+        """
+        Executes a batch of (formula, variables) jobs, fanned out to the code
+        editor worker pool when it is enabled.
+        """
+        if code_editor_pool:
+            return code_editor_pool.execute_many(jobs)
+        return [
+            FormulaCalculator.execute_code_string(formula, variables)
+            for formula, variables in jobs
+        ]
 
     @staticmethod
     def get_metric_key(formula):
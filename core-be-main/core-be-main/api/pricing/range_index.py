@@ -0,0 +1,147 @@
+import heapq
+from bisect import bisect_left
+from itertools import accumulate
+
+import numpy as np
+
+from api.utils.logger import logger
+
+
+class RangeIndex:
+    """
+    Sorted bounds of one metric column of a tier table.
+
+    Range columns ({"low", "high"}) are indexed by the sorted distinct bounds
+    of their rows, with the first matching row in table order of every bound
+    and of every gap between two bounds. "upto" columns are indexed by the
+    running maximum of their thresholds. Both return the first matching row
+    in table order, as a linear scan of the rows does.
+    """
+
+    def __init__(self, rows, metric_key):
+        self.size = len(rows)
+        self.is_range = bool(rows) and isinstance(rows[0].get(metric_key), dict)
+        if self.is_range:
+            self._index_ranges(
+                [row[metric_key]["low"] for row in rows],
+                [row[metric_key]["high"] for row in rows],
+            )
+        else:
+            # Rows without a threshold match every quantity
+            thresholds = [
+                int(row.get(metric_key)) if row.get(metric_key) else float("inf")
+                for row in rows
+            ]
+            self.thresholds = list(accumulate(thresholds, max))
+
+    def _index_ranges(self, lows, highs):
+        """
+        Sweeps the bounds in order, keeping the rows which contain the current
+        bound or gap in a heap by their index, so its top is the first match.
+        """
+        self.bounds = sorted(set(lows) | set(highs))
+        starts = sorted(range(self.size), key=lambda index: lows[index])
+        active = []
+        next_start = 0
+        self.bound_rows = []
+        self.gap_rows = []
+        for bound in self.bounds:
+            while next_start < self.size and lows[starts[next_start]] <= bound:
+                heapq.heappush(active, starts[next_start])
+                next_start += 1
+            # Rows ending before the bound never match again
+            while active and highs[active[0]] < bound:
+                heapq.heappop(active)
+            self.bound_rows.append(active[0] if active else -1)
+            # The gap after the bound only holds rows ending after it
+            while active and highs[active[0]] <= bound:
+                heapq.heappop(active)
+            self.gap_rows.append(active[0] if active else -1)
+
+    def lookup(self, quantity):
+        """Returns the index of the row matching the quantity, or None"""
+        if self.is_range:
+            position = bisect_left(self.bounds, quantity)
+            if position < len(self.bounds) and self.bounds[position] == quantity:
+                index = self.bound_rows[position]
+            elif 0 < position < len(self.bounds):
+                index = self.gap_rows[position - 1]
+            else:
+                index = -1
+            return index if index >= 0 else None
+        position = bisect_left(self.thresholds, quantity)
+        return position if position < self.size else None
+
+    def lookup_many(self, quantities):
+        """Vectorized lookup, returns an array of row indexes with -1 for no match"""
+        quantities = np.asarray(quantities, dtype=float)
+        if not self.size:
+            return np.full(len(quantities), -1)
+        if self.is_range:
+            bounds = np.asarray(self.bounds, dtype=float)
+            positions = np.searchsorted(bounds, quantities, side="left")
+            clipped = positions.clip(max=len(bounds) - 1)
+            on_bound = (positions < len(bounds)) & (bounds[clipped] == quantities)
+            in_gap = (positions > 0) & (positions < len(bounds))
+            return np.where(
+                on_bound,
+                np.asarray(self.bound_rows)[clipped],
+                np.where(
+                    in_gap,
+                    np.asarray(self.gap_rows)[(positions - 1).clip(min=0)],
+                    -1,
+                ),
+            )
+        positions = np.searchsorted(self.thresholds, quantities, side="left")
+        return np.where(positions < self.size, positions, -1)
+
+
+class IndexedRows(list):
+    """Tier table rows which keep a RangeIndex per metric column"""
+
+    def __init__(self, rows=(), metric_keys=()):
+        super().__init__(rows)
+        self.range_indexes = {}
+        for metric_key in metric_keys:
+            try:
+                self.range_index(metric_key)
+            except (KeyError, TypeError, ValueError) as e:
+                # Left to the lookup to fail, as it did before indexing
+                logger.info("Skipping range index for %s: %s", metric_key, e)
+
+    def range_index(self, metric_key):
+        if metric_key not in self.range_indexes:
+            self.range_indexes[metric_key] = RangeIndex(self, metric_key)
+        return self.range_indexes[metric_key]
+
+
+def get_range_index(rows, metric_key):
+    if isinstance(rows, IndexedRows):
+        return rows.range_index(metric_key)
+    return RangeIndex(rows, metric_key)
+
+
+def index_table(table):
+    if not table or not table.get("values"):
+        return
+    metric_keys = [
+        column["key"]
+        for column in table.get("columns", [])
+        if column.get("is_metric_column") or column.get("is_upto_column")
+    ]
+    table["values"] = IndexedRows(
+        table["values"],
+        metric_keys=[key for key in metric_keys if key in table["values"][0]],
+    )
+
+
+def index_pricing_details(details):
+    """
+    Wraps the core and custom addon tier tables of the parsed pricing model
+    details with range indexes. Returns the same details dict.
+    """
+    index_table(details.get("core"))
+    for addon in details.get("addons", []):
+        if addon.get("is_custom_metric"):
+            index_table(addon)
+    return details
@@ -0,0 +1 @@
+from .addon_signals import *
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from api.package.models import PackageDetail
+from api.pricing.addon_reconciliation import schedule_addon_reconciliation
+
+
+@receiver(post_save, sender=PackageDetail)
+def reconcile_package_addons(sender, instance, **kwargs):
+    schedule_addon_reconciliation(
+        instance.tenant_id_id, package_ids=[instance.package_id_id]
+    )
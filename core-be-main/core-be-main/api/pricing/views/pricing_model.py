@@ -1,6 +1,7 @@
 import json
 import uuid
 
+from django.db.models import Prefetch
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -9,7 +10,12 @@ from rest_framework.views import APIView
 from api.auth.authentication import CognitoAuthentication
 from api.feature_repository.models import Feature
 from api.package.models import Package, PackageDetail
-from api.plan.models import Tier
+from api.pricing.addon_reconciliation import (
+    filter_addons,
+    get_addon_features,
+    get_package_addon_ids,
+)
+from api.pricing.details_cache import pricing_details_cache
 from api.pricing.formula_calculator import FormulaCalculator
 from api.pricing.models import (
     PricingMetric,
@@ -31,11 +37,11 @@ from api.pricing.serializers.pricing_model_details import (
     PricingModelUpdateSerializer,
     QuoteQuantitySerializer,
 )
-from api.tenant.models import Tenant
 from api.user.utils import (
     get_tenant_id_from_email,
     get_user_obj_from_email,
     generate_unique_common_difference_numbers,
+    get_tenant_obj_from_id,
 )
 from api.utils.custom_exception_handler import (
     PackageDoesNotExistsException,
@@ -69,54 +75,73 @@ class PricingModelView(APIView):
         package_id = request.query_params.get("package_id")
         pricing_models = PricingModel.objects.filter(
             is_deleted=False, package_id=package_id, tenant_id=tenant_id
+        ).prefetch_related(
+            Prefetch(
+                "pricing_model_id_details",
+                queryset=PricingModelDetails.objects.filter(
+                    tenant_id=tenant_id,
+                    is_deleted=False,
+                    tier_id__tenant_id=tenant_id,
+                    tier_id__is_deleted=False,
+                )
+                .select_related("tier_id")
+                .order_by("tier_id__created_on"),
+                to_attr="tier_details",
+            )
         )
 
+        model_details = [
+            (
+                model,
+                [
+                    (item, pricing_details_cache.get(item))
+                    for item in model.tier_details
+                ],
+            )
+            for model in pricing_models
+        ]
+        addon_ids = set(
+            addon["id"]
+            for _, tier_details in model_details
+            for _, details in tier_details
+            for addon in details.get("addons", [])
+        )
+        non_deleted_addon_ids = set()
+        if addon_ids:
+            non_deleted_addon_ids = set(
+                Feature.objects.filter(id__in=addon_ids, is_deleted=False).values_list(
+                    "id", flat=True
+                )
+            )
+
         response = []
-        for model in pricing_models:
+        for model, tier_details in model_details:
             details = {}
             details.update({"id": model.id, "name": model.name})
-            pricing_model_details = PricingModelDetails.objects.filter(
-                pricing_model_id=model.id, tenant_id=tenant_id, is_deleted=False
-            ).order_by("tier_id__created_on")
             tier_wise_details = []
-            for item in pricing_model_details:
-                tier_info = Tier.objects.filter(
-                    id=item.tier_id.id, tenant_id=tenant_id, is_deleted=False
-                ).first()
-                if tier_info:
-                    tier_wise_details.append(
-                        {
-                            "tier_id": tier_info.id,
-                            "tier_name": tier_info.name,
-                            "pricing_model_detail_id": item.id,
-                            "details": PricingModelView.filter_deleted_features(
-                                json.loads(item.details)
-                            ),
-                        }
-                    )
+            for item, pricing_details in tier_details:
+                tier_wise_details.append(
+                    {
+                        "tier_id": item.tier_id.id,
+                        "tier_name": item.tier_id.name,
+                        "pricing_model_detail_id": item.id,
+                        "details": PricingModelView.filter_deleted_features(
+                            dict(pricing_details), non_deleted_addon_ids
+                        ),
+                    }
+                )
             details.update({"details": tier_wise_details})
             response.append(details)
 
         return ResponseBuilder.success(data=response, status_code=status.HTTP_200_OK)
 
-    def filter_deleted_features(data):
+    def filter_deleted_features(data, non_deleted_addon_ids):
         if "addons" in data:
-            addons = data["addons"]
-            addon_ids = set(addon["id"] for addon in addons)
-
-            non_deleted_addon_ids = Feature.objects.filter(
-                id__in=addon_ids, is_deleted=False
-            ).values_list("id", flat=True)
-            non_deleted_addon_uuids = [
-                uuid.UUID(str(id)) for id in non_deleted_addon_ids
-            ]
-
-            filtered_addons = [
+            data["addons"] = [
                 addon
-                for addon in addons
-                if uuid.UUID(str(addon["id"])) in non_deleted_addon_uuids
+                for addon in data["addons"]
+                if uuid.UUID(str(addon["id"])) in non_deleted_addon_ids
             ]
-            data["addons"] = filtered_addons
 
         return data
 
@@ -135,7 +160,7 @@ class PricingModelView(APIView):
     )
     def post(self, request):
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant_obj = get_tenant_obj_from_id(tenant_id)
         existing_pricing_model_id = request.query_params.get("source")
         if existing_pricing_model_id:
             existing_pricing_model = PricingModel.objects.filter(
@@ -192,7 +217,7 @@ class PricingModelView(APIView):
                 )
             # check for user impersonation
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 PricingModelHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -247,7 +272,7 @@ class PricingModelView(APIView):
                 )
             # check for user impersonation
             if request.auth and request.auth[0]:
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 PricingModelHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -270,130 +295,133 @@ class PricingModelDetailView(APIView):
         tenant_id = get_tenant_id_from_email(request.user[0])
         pricing_model = PricingModel.objects.filter(
             id=id, tenant_id=tenant_id, is_deleted=False
-        )
+        ).first()
         if not pricing_model:
             raise PricingModelDoesNotExistsException("Pricing Model Does Not Exist")
 
-        response = {}
-        if pricing_model:
-            response.update(
-                {
-                    "id": pricing_model[0].id,
-                    "name": pricing_model[0].name,
-                    "package_id": pricing_model[0].package_id.id,
-                }
-            )
-            metric_details = PricingMetricMapping.objects.filter(
-                pricing_model_id=pricing_model[0].id, is_deleted=False
+        response = {
+            "id": pricing_model.id,
+            "name": pricing_model.name,
+            "package_id": pricing_model.package_id_id,
+        }
+        metric_details = PricingMetricMapping.objects.filter(
+            pricing_model_id=pricing_model.id, is_deleted=False
+        ).select_related("pricing_metrics_id")
+        response.update(
+            {
+                "metric_details": [
+                    {
+                        "id": metric.pricing_metrics_id.id,
+                        "name": metric.pricing_metrics_id.name,
+                    }
+                    for metric in metric_details
+                ]
+            }
+        )
+
+        pricing_model_details = [
+            (item, pricing_details_cache.get(item))
+            for item in PricingModelDetails.objects.filter(
+                pricing_model_id=pricing_model,
+                tenant_id=tenant_id,
+                tier_id__tenant_id=tenant_id,
+                tier_id__is_deleted=False,
             )
+            .select_related("tier_id")
+            .order_by("tier_id__created_on")
+        ]
+        addons = [
+            addon
+            for _, details in pricing_model_details
+            for addon in details.get("addons", [])
+        ]
+
+        # Addons of deleted or ungrouped features are only left out of the
+        # response. The reconciliation job removes those which the package
+        # detail no longer marks as addons, until it has run they are left out
+        addon_features = get_addon_features(
+            tenant_id, [addon.get("id") for addon in addons]
+        )
+        package_addon_ids = get_package_addon_ids(
+            tenant_id,
+            [
+                (pricing_model.package_id_id, item.tier_id_id)
+                for item, _ in pricing_model_details
+            ],
+        )
+        pricing_metrics = {}
+        metric_ids = set(
+            metric for addon in addons for metric in addon.get("metric_details", [])
+        )
+        if metric_ids:
+            pricing_metrics = {
+                str(metric.id): metric
+                for metric in PricingMetric.objects.filter(
+                    id__in=metric_ids, is_deleted=False
+                )
+            }
+        pricing_structures = {}
+        pricing_structure_ids = set(
+            addon.get("pricing_structure_id")
+            for addon in addons
+            if addon.get("pricing_structure_id")
+        )
+        if pricing_model.pricing_structure_id:
+            pricing_structure_ids.add(pricing_model.pricing_structure_id)
+        if pricing_structure_ids:
+            pricing_structures = {
+                str(pricing_structure.id): pricing_structure
+                for pricing_structure in PricingStructure.objects.filter(
+                    id__in=pricing_structure_ids, is_deleted=False
+                )
+            }
+
+        pricing_structure = pricing_structures.get(
+            str(pricing_model.pricing_structure_id)
+        )
+        if pricing_structure:
             response.update(
                 {
-                    "metric_details": [
-                        {
-                            "id": metric.pricing_metrics_id.id,
-                            "name": metric.pricing_metrics_id.name,
-                        }
-                        for metric in metric_details
-                    ]
+                    "pricing_structure_id": pricing_structure.id,
+                    "pricing_structure_name": pricing_structure.name,
                 }
             )
-            pricing_structure = PricingStructure.objects.filter(
-                id=pricing_model[0].pricing_structure_id, is_deleted=False
-            )
-            if pricing_structure:
-                response.update(
-                    {
-                        "pricing_structure_id": pricing_structure[0].id,
-                        "pricing_structure_name": pricing_structure[0].name,
-                    }
-                )
-            pricing_model_details = PricingModelDetails.objects.filter(
-                pricing_model_id=pricing_model[0], tenant_id=tenant_id
-            ).order_by("tier_id__created_on")
 
-            tier_wise_details = []
-            for item in pricing_model_details:
-                tier_info = Tier.objects.filter(
-                    id=item.tier_id.id, tenant_id=tenant_id, is_deleted=False
-                ).first()
-                if tier_info:
-                    details = json.loads(item.details)
-                    addons = details.get("addons", [])
-                    for addon in addons:
-                        feature_obj = Feature.objects.filter(
-                            id=addon.get("id"), tenant_id=tenant_id, is_deleted=False
-                        ).first()
-                        if not feature_obj:
-                            _ = addons.pop(addons.index(addon))
-                            continue
-                        elif not feature_obj.feature_group_id:
-                            _ = addons.pop(addons.index(addon))
-                            continue
-
-                        tier_id, package_id = (
-                            item.tier_id.id,
-                            pricing_model[0].package_id.id,
-                        )
-                        package_detail_obj = PackageDetail.objects.filter(
-                            package_id=package_id,
-                            tier_id=tier_id,
-                            is_deleted=False,
-                            tenant_id=tenant_id,
-                        ).first()
-                        if package_detail_obj:
-                            feature_groups = json.loads(package_detail_obj.details).get(
-                                "feature_groups", []
-                            )
-                            found = False
-                            for feature_group in feature_groups:
-                                for feature in feature_group.get("features", []):
-                                    if feature.get("feature_id") == addon.get(
-                                            "id"
-                                    ) and addon.get("is_custom_metric"):
-                                        if not feature.get("is_addon"):
-                                            _ = addons.pop(addons.index(addon))
-                                            item.details = json.dumps(details)
-                                            item.save()
-                                        found = True
-                                    elif feature.get("feature_id") == addon.get("id"):
-                                        if not feature.get("is_addon"):
-                                            found = False
-                                        else:
-                                            found = True
-                            if not found:
-                                _ = addons.pop(addons.index(addon))
-                                item.details = json.dumps(details)
-                                item.save()
-
-                        pricing_metric_details = []
-                        for metric in addon.get("metric_details", []):
-                            pricing_metric = PricingMetric.objects.get(
-                                id=metric, is_deleted=False
-                            )
-                            pricing_metric_details.append(
-                                {"id": pricing_metric.id, "name": pricing_metric.name}
-                            )
-
-                        addon["metric_details"] = pricing_metric_details
-                        if addon.get("pricing_structure_id"):
-                            pricing_structure = PricingStructure.objects.filter(
-                                id=addon.get("pricing_structure_id"), is_deleted=False
-                            )
-                            if pricing_structure:
-                                addon["pricing_structure_id"] = pricing_structure[0].id
-                                addon["pricing_structure_name"] = pricing_structure[
-                                    0
-                                ].name
-
-                    tier_wise_details.append(
-                        {
-                            "pricing_model_detail_id": item.id,
-                            "tier_id": tier_info.id,
-                            "tier_name": tier_info.name,
-                            "details": details,
-                        }
+        tier_wise_details = []
+        for item, cached_details in pricing_model_details:
+            details = dict(cached_details)
+            details["addons"] = []
+            for addon in filter_addons(
+                cached_details.get("addons", []),
+                addon_features,
+                package_addon_ids.get((pricing_model.package_id_id, item.tier_id_id)),
+            ):
+                addon = dict(addon)
+                addon["metric_details"] = [
+                    {"id": pricing_metric.id, "name": pricing_metric.name}
+                    for pricing_metric in (
+                        pricing_metrics.get(str(metric))
+                        for metric in addon.get("metric_details", [])
                     )
-            response.update({"details": tier_wise_details})
+                    if pricing_metric
+                ]
+                pricing_structure = pricing_structures.get(
+                    str(addon.get("pricing_structure_id"))
+                )
+                if pricing_structure:
+                    addon["pricing_structure_id"] = pricing_structure.id
+                    addon["pricing_structure_name"] = pricing_structure.name
+                details["addons"].append(addon)
+
+            tier_wise_details.append(
+                {
+                    "pricing_model_detail_id": item.id,
+                    "tier_id": item.tier_id.id,
+                    "tier_name": item.tier_id.name,
+                    "details": details,
+                }
+            )
+        response.update({"details": tier_wise_details})
         return ResponseBuilder.success(data=response, status_code=status.HTTP_200_OK)
 
     @swagger_auto_schema(request_body=PricingModelUpdateSerializer)
@@ -453,12 +481,13 @@ class PricingModelDetailView(APIView):
 
             pricing_model_detail.details = json.dumps(detail)
             pricing_model_detail.save()
+            pricing_details_cache.invalidate(pricing_model_detail.id)
             pricing_model.pricing_structure_id = pricing_structure_id
             pricing_model.save()
 
         # check for user impersonation
         if request.auth and request.auth[0]:
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             PricingModelHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
@@ -489,7 +518,7 @@ class AddonMetricView(APIView):
                 "Pricing Model Detail Not Found"
             )
 
-        details = json.loads(pricing_models_detail[0].details)
+        details = pricing_details_cache.get_copy(pricing_models_detail[0])
         data = {
             "id": payload.get("addon_id"),
             "metric_name": payload.get("name"),
@@ -503,6 +532,7 @@ class AddonMetricView(APIView):
             details["addons"] = [data]
         pricing_models_detail[0].details = json.dumps(details)
         pricing_models_detail[0].save()
+        pricing_details_cache.invalidate(pricing_models_detail[0].id)
 
         return ResponseBuilder.success(
             data="Addon metric added successfully", status_code=status.HTTP_200_OK
@@ -566,7 +596,7 @@ class PricingCalculator(APIView):
                 "core_output": 0,
                 "addon_output": [],
             }
-            pricing_data = json.loads(pricing_model_details.details)
+            pricing_data = pricing_details_cache.get(pricing_model_details)
             core_details = pricing_data["core"]
             if core_details:
                 core_output = FormulaCalculator.calculate(
@@ -676,7 +706,7 @@ class PricingCurveConfig(APIView):
         curve_config = []
         for pricing_model in pricing_model_details:
             tier_id = pricing_model.tier_id.id
-            pricing_details = json.loads(pricing_model.details)
+            pricing_details = pricing_details_cache.get(pricing_model)
             core_columns = pricing_details.get("core", {}).get("columns", {})
             addons = pricing_details.get("addons", {})
             metric_columns = {
@@ -771,7 +801,7 @@ class PricingCurve(APIView):
         tier_wise_range = {}
         for item in pricing_model_details:
             min_no, max_no = -1, -1
-            details = json.loads(item.details)
+            details = pricing_details_cache.get(item)
             core_model = details.get("core", [])
             if core_model:
                 core_model_columns = core_model.get("columns", [])
@@ -827,7 +857,7 @@ class PricingCurve(APIView):
         response = []
 
         for item in pricing_model_details:
-            details = json.loads(item.details)
+            details = pricing_details_cache.get(item)
             core_sample_output = {}
             core_output = {}
             tier_range = tier_wise_range.get(item.tier_id.id, [])
@@ -843,20 +873,22 @@ class PricingCurve(APIView):
 
                 if core_model_values and not core_model_values == [{}]:
                     for sample, sample_value in random_nos.items():
-                        sample_output = {}
-                        for no in sample_value:
-                            if not tier_range[0] <= no <= tier_range[-1]:
-                                continue
-                            quantity_dict = {sample: no}
-                            amount = FormulaCalculator.calculate(
-                                core_model_columns,
-                                core_model_values,
-                                quantity_dict,
-                                is_curve=True,
-                            )
-                            sample_output.update(
-                                {no: amount.get("final_output") if amount else 0}
-                            )
+                        tier_samples = [
+                            no
+                            for no in sample_value
+                            if tier_range[0] <= no <= tier_range[-1]
+                        ]
+                        amounts = FormulaCalculator.calculate_many(
+                            core_model_columns,
+                            core_model_values,
+                            sample,
+                            tier_samples,
+                            is_curve=True,
+                        )
+                        sample_output = {
+                            no: amount.get("final_output") if amount else 0
+                            for no, amount in zip(tier_samples, amounts)
+                        }
 
                         for addon in addon_core_model_detail:
                             if not consider_addon_calc.get(str(item.tier_id.id), ""):
@@ -959,15 +991,9 @@ class DrivingFieldsDetailsView(APIView):
                 "Pricing Model Detail Not Found"
             )
 
-        pricing_model_details_data = PricingModelDetailsSerilaizer(
-            pricing_model_details[0]
-        ).data
-        core_columns = (
-            pricing_model_details_data.get("details", {})
-            .get("core", {})
-            .get("columns", {})
-        )
-        addons = pricing_model_details_data.get("details", {}).get("addons", {})
+        pricing_model_details_data = pricing_details_cache.get(pricing_model_details[0])
+        core_columns = pricing_model_details_data.get("core", {}).get("columns", {})
+        addons = pricing_model_details_data.get("addons", {})
         metric_columns = {
             item["key"]: item["name"]
             for item in core_columns
@@ -1072,9 +1098,9 @@ class DrivingFieldsDetailsView(APIView):
                 raise PricingModelDetailsDoesNotExistsException(
                     "Pricing Model Detail Not Found"
                 )
-            pricing_model_details = PricingModelDetailsSerilaizer(
-                pricing_model_details
-            ).data
+            pricing_model_details = {
+                "details": pricing_details_cache.get(pricing_model_details)
+            }
             core_details = pricing_model_details["details"]["core"]
             response = {"core_total_output": 0, "addon_output": []}
             output_columns = {
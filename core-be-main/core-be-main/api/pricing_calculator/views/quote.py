@@ -22,9 +22,12 @@ from api.pricing_calculator.serializers.quote import (
     CreateQuoteCommentSerializer,
 )
 from api.product.models import Product
-from api.tenant.models import Tenant
 from api.user.models import User
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.custom_exception_handler import QuoteDoesNotExistsException, \
     OpportunityDoesNotExistsException, AccountDoesNotExistsException, \
     PriceBookDoesNotExistsException, InvalidQuoteStatusException, ProductDoesNotExistsException, \
@@ -143,7 +146,7 @@ class PricingCalculatorView(APIView):
                 raise QuoteDoesNotExistsException("Quote Does Not Exist")
             quote_obj = quote_obj[0]
 
-        tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant_obj = get_tenant_obj_from_id(tenant_id)
         columns = data.get("columns")
 
         if quote_obj:
@@ -204,7 +207,7 @@ class PricingCalculatorView(APIView):
             # check for user impersonation
             if request.auth and request.auth[0]:
                 logger.info('quote updated - this request is for user impersonation')
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
                 QuoteHistory.objects.create(
                     admin_user_id=request.auth[1],
                     user_id=get_user_obj_from_email(request.user[0]),
@@ -291,7 +294,7 @@ class PricingCalculatorView(APIView):
                 )
         # check for user impersonation
         if request.auth and request.auth[0]:
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             QuoteHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
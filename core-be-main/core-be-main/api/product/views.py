@@ -12,8 +12,11 @@ from ..auth.authentication import CognitoAuthentication
 from ..feature_repository.models import FeatureRepository
 from ..pricebook.models import PriceBookEntry
 from ..pricing_calculator.models import QuoteDetails
-from ..tenant.models import Tenant
-from ..user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from ..user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from ..utils.custom_exception_handler import (
     ProductAlreadyExistsException,
     ProductDoesNotExistsException,
@@ -79,7 +82,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         # check for user impersonation
         if request.auth and request.auth[0]:
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             product_obj = Product.objects.get(
                 id=product_data.get("id"), is_deleted=False
             )
@@ -134,7 +137,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if request.auth and request.auth[0]:
             logger.info("this request is for user impersonation")
             tenant_id = get_tenant_id_from_email(request.user[0])
-            tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant_obj = get_tenant_obj_from_id(tenant_id)
             ProductAuditHistory.objects.create(
                 admin_user_id=request.auth[1],
                 user_id=get_user_obj_from_email(request.user[0]),
@@ -0,0 +1,130 @@
+from datetime import datetime
+
+from django.utils.timezone import make_aware
+
+SALESFORCE_DATE_FORMAT = "%Y-%m-%d"
+SALESFORCE_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def to_bool(value):
+    return value == "Yes"
+
+
+def to_int(value):
+    # Salesforce exports large numbers in scientific notation
+    if "E" in value:
+        return int(float(value))
+    return int(round(float(value)))
+
+
+def to_date(value):
+    return make_aware(datetime.strptime(value, SALESFORCE_DATE_FORMAT))
+
+
+def to_datetime(value):
+    return datetime.strptime(value, SALESFORCE_DATETIME_FORMAT)
+
+
+def to_salesforce_date(value):
+    if not value:
+        return value
+    return datetime.strptime(value[0:10], SALESFORCE_DATE_FORMAT).strftime(
+        SALESFORCE_DATE_FORMAT
+    )
+
+
+class Column:
+    """Copies a source field of a record to a destination field"""
+
+    __slots__ = ("source", "destination", "convert", "empty", "skip_empty")
+
+    def __init__(
+        self, source, destination, convert=None, empty=None, skip_empty=False
+    ):
+        self.source = source
+        self.destination = destination
+        self.convert = convert
+        self.empty = empty
+        self.skip_empty = skip_empty
+
+
+class FieldMapping:
+    """
+    Field mapping of a Salesforce object compiled to column converters.
+
+    The converters of the columns are resolved once, transforming a record
+    only runs them. Serves both directions: Salesforce records have their
+    empty cells mapped to the empty value of the column without converting
+    them, Monetizely records pass every value to the converter.
+    """
+
+    def __init__(self, columns, convert_empty=False):
+        self.columns = tuple(columns)
+        self.convert_empty = convert_empty
+
+    @classmethod
+    def compile(
+        cls,
+        field_mapping,
+        converters=None,
+        empty_values=None,
+        extra_columns=None,
+        convert_empty=False,
+    ):
+        """
+        Compiles a source to destination field mapping. extra_columns maps a
+        source field to additional (destination, converter) pairs which are
+        left out when the field is empty.
+        """
+        converters = converters or {}
+        empty_values = empty_values or {}
+        extra_columns = extra_columns or {}
+        columns = []
+        for source, destination in field_mapping.items():
+            for extra_destination, convert in extra_columns.get(source, ()):
+                columns.append(
+                    Column(source, extra_destination, convert, skip_empty=True)
+                )
+            columns.append(
+                Column(
+                    source,
+                    destination,
+                    converters.get(source),
+                    empty=empty_values.get(source),
+                )
+            )
+        return cls(columns, convert_empty=convert_empty)
+
+    @classmethod
+    def from_salesforce(cls, mapping, **kwargs):
+        """Salesforce to Monetizely mapping of a get_salesforce_mapping result"""
+        return cls.compile(mapping["salesforce_field_mapping"], **kwargs)
+
+    @classmethod
+    def to_salesforce(cls, mapping, **kwargs):
+        """Monetizely to Salesforce mapping of a get_salesforce_mapping result"""
+        return cls.compile(
+            mapping["monetizely_field_mapping"], convert_empty=True, **kwargs
+        )
+
+    @property
+    def destinations(self):
+        return [
+            column.destination for column in self.columns if not column.skip_empty
+        ]
+
+    def transform(self, record):
+        data = {}
+        for column in self.columns:
+            value = record.get(column.source)
+            if not self.convert_empty and (value == "" or value is None):
+                if not column.skip_empty:
+                    data[column.destination] = column.empty
+            elif column.convert:
+                data[column.destination] = column.convert(value)
+            else:
+                data[column.destination] = value
+        return data
+
+    def transform_batch(self, records):
+        return [self.transform(record) for record in records]
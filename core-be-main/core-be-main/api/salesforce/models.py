@@ -14,6 +14,10 @@ class SalesforceMappingModel(AbstractModel):
     tenant_id = models.ForeignKey(
         "Tenant", on_delete=models.SET_NULL, db_column="tenant_id", null=True
     )
+    # Start of the last successful sync of the object, the next sync only
+    # queries the records whose SystemModstamp is after it. Null means the
+    # next sync is a full resync.
+    sync_watermark = models.DateTimeField(null=True)
 
     class Meta:
         db_table = "salesforce_mapping"
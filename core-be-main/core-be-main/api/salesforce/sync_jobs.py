@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+
+from botocore.exceptions import ClientError
+
+from api.utils.aws_utils.dynamo_db import AwsDynamodb
+from api.utils.logger import logger
+
+# Syncs which may run at the same time for one tenant
+SALESFORCE_TENANT_CONCURRENCY = int(
+    os.getenv("SALESFORCE_TENANT_CONCURRENCY", default=1)
+)
+# A running sync holds its slot at most this long, e.g. when its Lambda died
+SALESFORCE_SYNC_LEASE = int(os.getenv("SALESFORCE_SYNC_LEASE", default=900))
+
+
+class SyncStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class SalesforceSyncJobs:
+    """
+    Per-tenant progress of Salesforce syncs in the DynamoDB jobs table.
+
+    The item of a tenant holds the status of its last sync, the number of
+    syncs running for it and the ids of their leases. A sync only starts while
+    fewer than SALESFORCE_TENANT_CONCURRENCY are running, the slots of syncs
+    which never finished are taken over once their lease expired. A sync whose
+    lease was taken over no longer frees a slot nor records its status.
+    """
+
+    table_name = "jobs"
+
+    def __init__(
+        self, concurrency=SALESFORCE_TENANT_CONCURRENCY, lease=SALESFORCE_SYNC_LEASE
+    ):
+        self.concurrency = concurrency
+        self.lease = lease
+
+    def _update(self, tenant_id, update_expression, values, condition=None):
+        """Returns False when the condition does not hold"""
+        form_data = {
+            "Key": {"tenant_id": str(tenant_id)},
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeValues": values,
+        }
+        if condition:
+            form_data["ConditionExpression"] = condition
+        try:
+            AwsDynamodb.update_item(form_data=form_data, table_name=self.table_name)
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
+
+    def get(self, tenant_id):
+        return AwsDynamodb.get_item(
+            key={"tenant_id": str(tenant_id)}, table_name=self.table_name
+        )
+
+    def get_status(self, tenant_id):
+        job_details = self.get(tenant_id)
+        return job_details.get("sync_status") if job_details else None
+
+    def set_status(self, tenant_id, status, run_id=None, error=None):
+        values = {":status": status, ":now": int(time.time())}
+        update_expression = "SET sync_status = :status, updated_at = :now"
+        if run_id:
+            values[":run_id"] = run_id
+            update_expression += ", run_id = :run_id"
+        if error:
+            values[":error"] = error
+            update_expression += ", sync_error = :error"
+        self._update(tenant_id, update_expression, values)
+
+    def acquire(self, tenant_id, run_id=None):
+        """
+        Takes a sync slot of the tenant, returns the id of its lease or None
+        when no slot is free
+        """
+        lease_id = str(uuid.uuid4())
+        now = int(time.time())
+        values = {
+            ":one": 1,
+            ":running": SyncStatus.RUNNING,
+            ":now": now,
+            ":lease": now + self.lease,
+            ":run_id": run_id or "",
+            ":lease_ids": {lease_id},
+        }
+        update_expression = (
+            "SET sync_status = :running, run_id = :run_id, started_at = :now, "
+            "updated_at = :now, lease_expires_at = :lease"
+        )
+        acquired = self._update(
+            tenant_id,
+            update_expression + ", running = if_not_exists(running, :zero) + :one "
+            "REMOVE sync_error ADD lease_ids :lease_ids",
+            {**values, ":zero": 0, ":limit": self.concurrency},
+            condition="attribute_not_exists(running) OR running < :limit",
+        )
+        if not acquired:
+            # The leases of the syncs which are taken over are dropped
+            acquired = self._update(
+                tenant_id,
+                update_expression + ", running = :one, lease_ids = :lease_ids "
+                "REMOVE sync_error",
+                values,
+                condition="lease_expires_at < :now",
+            )
+            if acquired:
+                logger.info("Took over expired sync of tenant_id %s", str(tenant_id))
+        return lease_id if acquired else None
+
+    def release(self, tenant_id, lease_id, status, error=None):
+        """
+        Frees the sync slot of the lease and records the sync status, unless
+        the lease was taken over
+        """
+        values = {
+            ":status": status,
+            ":now": int(time.time()),
+            ":one": 1,
+            ":lease_id": lease_id,
+            ":lease_ids": {lease_id},
+        }
+        update_expression = (
+            "SET sync_status = :status, finished_at = :now, updated_at = :now, "
+            "running = running - :one"
+        )
+        if error:
+            values[":error"] = error
+            update_expression += ", sync_error = :error"
+        if not self._update(
+            tenant_id,
+            update_expression + " DELETE lease_ids :lease_ids",
+            values,
+            condition="contains(lease_ids, :lease_id)",
+        ):
+            logger.warning(
+                "Sync of tenant_id %s finished %s after its lease was taken over",
+                str(tenant_id),
+                status,
+            )
+
+
+salesforce_sync_jobs = SalesforceSyncJobs()
@@ -0,0 +1,121 @@
+from api.account.models import (
+    Account,
+    Contract,
+    IndustryType,
+    OpportunityStage,
+    OpportunityType,
+)
+from api.user.models import User
+
+
+class SalesforceSyncLookups:
+    """
+    Per-sync cache of the rows Salesforce records are mapped to.
+
+    A batch preloads its users, accounts and contracts by Salesforce id and
+    its industries, stages and types by name in bulk, missing name lookups are
+    bulk created. Mapping the records of the batch then reads from the cache
+    only. Accounts and contracts which are not found are looked up again by
+    later batches, as the sync may create them in between.
+    """
+
+    def __init__(self, tenant, logged_in_user=None):
+        self.tenant = tenant
+        self.logged_in_user = logged_in_user
+        self._users = {}
+        self._accounts = {}
+        self._contracts = {}
+        self._names = {}
+
+    @staticmethod
+    def _missing(cache, keys):
+        return set(key for key in keys if key) - cache.keys()
+
+    def preload_users(self, salesforce_ids):
+        missing = self._missing(self._users, salesforce_ids)
+        if not missing:
+            return
+        for user in User.objects.filter(id_ext_key__in=missing):
+            self._users.setdefault(user.id_ext_key, user)
+        # Users are not created while records are synced
+        for salesforce_id in missing:
+            self._users.setdefault(salesforce_id, None)
+
+    def preload_accounts(self, salesforce_ids):
+        missing = self._missing(self._accounts, salesforce_ids)
+        if missing:
+            self.add_accounts(
+                Account.objects.filter(
+                    tenant_id=self.tenant.id, account_ext_id__in=missing
+                ).order_by("created_on")
+            )
+
+    def preload_contracts(self, salesforce_ids):
+        missing = self._missing(self._contracts, salesforce_ids)
+        if missing:
+            self.add_contracts(
+                Contract.objects.filter(
+                    tenant_id=self.tenant.id, contract_external_id__in=missing
+                ).order_by("created_on")
+            )
+
+    def preload_names(self, model, names):
+        """Loads the lookup rows of the model and creates the missing ones"""
+        if model not in self._names:
+            rows = {}
+            for row in model.objects.filter(
+                tenant_id=self.tenant.id, is_deleted=False
+            ).order_by("created_on"):
+                rows.setdefault(row.name, row)
+            self._names[model] = rows
+
+        rows = self._names[model]
+        missing = self._missing(rows, names)
+        if missing:
+            created = model.objects.bulk_create(
+                [
+                    model(
+                        name=name,
+                        tenant_id=self.tenant,
+                        created_by=self.logged_in_user,
+                        updated_by=self.logged_in_user,
+                    )
+                    for name in sorted(missing)
+                ]
+            )
+            rows.update((row.name, row) for row in created)
+
+    def preload_industries(self, names):
+        self.preload_names(IndustryType, names)
+
+    def preload_opportunity_stages(self, names):
+        self.preload_names(OpportunityStage, names)
+
+    def preload_opportunity_types(self, names):
+        self.preload_names(OpportunityType, names)
+
+    def add_accounts(self, accounts):
+        for account in accounts:
+            self._accounts.setdefault(account.account_ext_id, account)
+
+    def add_contracts(self, contracts):
+        for contract in contracts:
+            self._contracts.setdefault(contract.contract_external_id, contract)
+
+    def get_user(self, salesforce_id, default=None):
+        return self._users.get(salesforce_id) or default
+
+    def get_account(self, salesforce_id):
+        return self._accounts.get(salesforce_id)
+
+    def get_contract(self, salesforce_id):
+        return self._contracts.get(salesforce_id)
+
+    def get_industry(self, name):
+        return self._names[IndustryType].get(name)
+
+    def get_opportunity_stage(self, name):
+        return self._names[OpportunityStage].get(name)
+
+    def get_opportunity_type(self, name):
+        return self._names[OpportunityType].get(name)
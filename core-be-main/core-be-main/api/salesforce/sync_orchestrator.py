@@ -0,0 +1,159 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import connections
+
+from api.salesforce.sync_jobs import SyncStatus, salesforce_sync_jobs
+from api.tenant.models import Tenant
+from api.utils.aws_utils.secrets import AwsSecret
+from api.utils.logger import logger
+
+SALESFORCE_SYNC_WORKERS = int(os.getenv("SALESFORCE_SYNC_WORKERS", default=4))
+# "thread" syncs the tenants in this process, "invoke" sends every tenant to
+# its own asynchronous invocation of the sync API
+SALESFORCE_SYNC_DISPATCH = os.getenv("SALESFORCE_SYNC_DISPATCH", default="thread")
+
+
+class SalesforceSyncOrchestrator:
+    """
+    Syncs every tenant which has a Salesforce config.
+
+    Tenants are fanned out to a bounded thread pool, or dispatched to separate
+    invocations, and their progress is recorded in the DynamoDB jobs table. A
+    run can be limited to the tenants whose last sync failed.
+    """
+
+    def __init__(
+        self,
+        secret_id,
+        max_workers=SALESFORCE_SYNC_WORKERS,
+        dispatch=SALESFORCE_SYNC_DISPATCH,
+    ):
+        self.secret_id = secret_id
+        self.max_workers = max_workers
+        self.dispatch = dispatch
+
+    def get_tenant_configs(self, resume_failed=False):
+        """Salesforce config by tenant id of the tenants to sync"""
+        configs = AwsSecret.get(secret_id=self.secret_id)
+        tenant_configs = {}
+        for tenant in Tenant.objects.all():
+            config = configs.get(str(tenant.id), "")
+            if not config:
+                continue
+            if (
+                resume_failed
+                and salesforce_sync_jobs.get_status(tenant.id) != SyncStatus.FAILED
+            ):
+                continue
+            tenant_configs[str(tenant.id)] = config
+        return tenant_configs
+
+    @staticmethod
+    def sync_tenant(
+        tenant_id, config, logged_in_user, run_id=None, full_resync=False
+    ):
+        """Sync one tenant and return the status of its sync"""
+        from api.salesforce.views.salesforce_sync import Salesforce
+
+        logger.info("Job started for tenant id %s", str(tenant_id))
+        try:
+            return Salesforce(config).start_sync(
+                tenant_id=tenant_id,
+                logged_in_user=logged_in_user,
+                run_id=run_id,
+                full_resync=full_resync,
+            )
+        except Exception as err:
+            logger.exception("Sync failed for tenant id %s %s", str(tenant_id), err)
+            salesforce_sync_jobs.set_status(
+                tenant_id, SyncStatus.FAILED, run_id=run_id, error=str(err)
+            )
+            return SyncStatus.FAILED
+
+    def _sync_tenant_in_thread(
+        self, tenant_id, config, logged_in_user, run_id, full_resync
+    ):
+        try:
+            return self.sync_tenant(
+                tenant_id,
+                config,
+                logged_in_user,
+                run_id=run_id,
+                full_resync=full_resync,
+            )
+        finally:
+            # Database connections are per thread and not reused by the pool
+            connections.close_all()
+
+    def _invoke_tenant_sync(self, tenant_id, authorization, run_id, full_resync):
+        salesforce_sync_url = os.getenv("SALESFORCE_SYNC_URL")
+        headers = {"Invocation-Type": "Event", "Authorization": authorization}
+        params = {"job_type": "tenant", "tenant_id": tenant_id, "run_id": run_id}
+        if full_resync:
+            params["full_resync"] = "true"
+        try:
+            response = requests.post(
+                salesforce_sync_url,
+                headers=headers,
+                params=params,
+                data={},
+                timeout=30,
+            )
+            response.raise_for_status()
+        except Exception as err:
+            logger.exception("Could not start sync of tenant id %s %s", tenant_id, err)
+            salesforce_sync_jobs.set_status(
+                tenant_id, SyncStatus.FAILED, run_id=run_id, error=str(err)
+            )
+            return SyncStatus.FAILED
+        return SyncStatus.PENDING
+
+    def run(
+        self,
+        logged_in_user,
+        resume_failed=False,
+        full_resync=False,
+        authorization=None,
+    ):
+        """Sync the tenants, returns the run id and the status by tenant id"""
+        run_id = str(uuid.uuid4())
+        tenant_configs = self.get_tenant_configs(resume_failed=resume_failed)
+        logger.info(
+            "Salesforce sync run %s started for %s tenants", run_id, len(tenant_configs)
+        )
+        # The status of a tenant only changes once its sync acquired a slot, a
+        # skipped tenant keeps the status of the sync which holds the slot
+
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            if self.dispatch == "invoke":
+                futures = {
+                    tenant_id: executor.submit(
+                        self._invoke_tenant_sync,
+                        tenant_id,
+                        authorization,
+                        run_id,
+                        full_resync,
+                    )
+                    for tenant_id in tenant_configs
+                }
+            else:
+                futures = {
+                    tenant_id: executor.submit(
+                        self._sync_tenant_in_thread,
+                        tenant_id,
+                        config,
+                        logged_in_user,
+                        run_id,
+                        full_resync,
+                    )
+                    for tenant_id, config in tenant_configs.items()
+                }
+            statuses = {
+                tenant_id: future.result() for tenant_id, future in futures.items()
+            }
+
+        logger.info("Salesforce sync run %s finished %s", run_id, statuses)
+        return run_id, statuses
@@ -2,193 +2,324 @@ import csv
 import io
 import json
 import os
-import time
-from datetime import datetime
-from io import StringIO
+from datetime import datetime, timedelta
+from functools import partial
 
 import requests
 from django.db import transaction
-from django.utils.timezone import make_aware, now
+from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 
-from api.account.models import (
-    Account,
-    Contract,
-    IndustryType,
-    Opportunity,
-    OpportunityStage,
-    OpportunityType,
-)
+from api.account.models import Account, Contract, Opportunity
 from api.auth.authentication import CognitoAuthentication
 from api.pricing_calculator.models import Quote
 from api.pricing_calculator.serializers.quote import QuoteSerializer
 from api.contract.serializers.contract import ContractSerializer
+from api.salesforce.field_mapping import (
+    FieldMapping,
+    to_bool,
+    to_date,
+    to_datetime,
+    to_int,
+    to_salesforce_date,
+)
 from api.salesforce.models import SalesforceMappingModel
-from api.tenant.models import Tenant
+from api.salesforce.sync_jobs import SyncStatus, salesforce_sync_jobs
+from api.salesforce.sync_lookups import SalesforceSyncLookups
+from api.salesforce.sync_orchestrator import SalesforceSyncOrchestrator
 from api.user.models import OrgHierarchy, User, UserRole, UserRoleMapping
-from api.user.utils import get_tenant_id_from_email
-from api.utils.aws_utils.dynamo_db import AwsDynamodb
+from api.user.utils import get_tenant_id_from_email, get_tenant_obj_from_id
 from api.utils.aws_utils.secrets import AwsSecret
 from api.utils.responses import ResponseBuilder
 from api.utils.logger import logger
+from api.utils.salesforce.csv_chunks import iter_csv_chunks
+from api.utils.salesforce.job_poller import SalesforceJobError, bulk_job_poller
+from api.utils.salesforce.session import salesforce_request, salesforce_token_cache
 from api.contract.views.contract import ContractViewSet
 
+# Records per page of bulk query results, a page is parsed and handed to the
+# sync logic before the next one is downloaded
+SALESFORCE_RESULTS_MAX_RECORDS = int(
+    os.getenv("SALESFORCE_RESULTS_MAX_RECORDS", default=10000)
+)
+SALESFORCE_RESULTS_TIMEOUT = int(os.getenv("SALESFORCE_RESULTS_TIMEOUT", default=60))
+# Delta syncs also query the records modified this long before the watermark,
+# covering the clock skew to Salesforce and records committed late
+SALESFORCE_SYNC_WATERMARK_OVERLAP = int(
+    os.getenv("SALESFORCE_SYNC_WATERMARK_OVERLAP", default=300)
+)
+
 
 class Salesforce:
     """Class Salesforce"""
 
+    # Objects synced from Salesforce by delta when they have a watermark
+    DELTA_SYNC_OBJECTS = ("Account", "Contract", "Opportunity")
+    USER_FIELDS = ("OwnerId", "CreatedById", "ModifiedById")
+
     def __init__(self, config):
+        self.config = config
         self.base_url = config.get("url")
-        self.client_id = config.get("client_id")
-        self.client_secret = config.get("client_secret")
-        self.username = config.get("username")
-        self.password = config.get("password")
-        self.access_token = self._get_salesforce_login()
+        # Errors of the object syncs, a sync with errors is recorded as failed
+        self.errors = []
+        self.lookups = None
+        self.field_mappings = {}
+        self.synced_contract_ids = set()
+        # Log in up front so wrong credentials fail before the sync starts
+        self._get_salesforce_login()
 
     def _get_salesforce_login(self):
-        """Get salesforce access token"""
-        logger.info("Generating Access token for accessing salesforce API")
-        url = (
-            f"https://login.salesforce.com/services/oauth2/token?"
-            f"grant_type=password&client_id={self.client_id}"
-            f"&client_secret={self.client_secret}&username={self.username}&password={self.password}"
-        )
-        headers = {
-            "Cookie": "BrowserId=AgAOoPO9Ee2mTXUMp9i4QQ; CookieConsentPolicy=0:0; "
-            "LSKey-c$CookieConsentPolicy=0:0"
-        }
-        response = requests.request(
-            "POST", url, headers=headers, data={}, files={}, timeout=10
-        )
-        if response.status_code:
-            logger.info("!!! Access token generated successfully !!!")
-            return response.json()["access_token"]
-        raise Exception("Error while getting tokens")
+        """Get salesforce access token, cached per tenant config"""
+        return salesforce_token_cache.get_token(self.config)
 
-    def _get_headers(self):
-        """Get Headers"""
-        return {
-            "Authorization": "Bearer " + self.access_token,
-            "Content-Type": "application/json",
-        }
+    def _request(self, method, url, **kwargs):
+        """Send a request over the pooled session with the cached access token"""
+        return salesforce_request(self.config, method, url, **kwargs)
 
     def create_job(self, operation, payload):
         """Create job for bulk API"""
         url = f"{self.base_url}/jobs/{operation}/"
         logger.info("Creating a job for bulk API %s", url)
-        response = requests.post(
-            url, headers=self._get_headers(), json=payload, timeout=10
-        )
+        response = self._request("POST", url, json=payload)
         return response.json()
 
     def update_results(self, job_id, payload):
-        """Update values in Salesforce"""
+        """
+        Update values in Salesforce. The payload may be a CsvChunk, which is
+        streamed and replayed when the request is retried.
+        """
         url = f"{self.base_url}/jobs/ingest/{job_id}/batches/"
         logger.info("Insert/Update data back to salesforce for %s", url)
-        headers = {
-            "Authorization": "Bearer " + self.access_token,
-            "Content-Type": "text/csv",
-        }
-        response = requests.put(url, headers=headers, data=payload, timeout=10)
+        headers = {"Content-Type": "text/csv"}
+        response = self._request(
+            "PUT",
+            url,
+            headers=headers,
+            data=payload,
+            timeout=(10, SALESFORCE_RESULTS_TIMEOUT),
+        )
+        if not response.ok:
+            raise Exception(f"Error while uploading job data: {response.text}")
         return response.text
 
     def get_job_status(self, job_id):
         """Get job status"""
         url = f"{self.base_url}/jobs/query/{job_id}"
         logger.info("Get the job status %s", url)
-        response = requests.get(url, headers=self._get_headers(), timeout=10)
+        response = self._request("GET", url)
         return response.json()
 
     def get_ingest_job_status(self, job_id):
         """Get job status"""
         url = f"{self.base_url}/jobs/ingest/{job_id}"
-        response = requests.get(url, headers=self._get_headers(), timeout=10)
+        response = self._request("GET", url)
         return response.json()
 
-    def get_results(self, job_id):
-        """Get salesforce query Results"""
+    def iter_results(self, job_id, max_records=SALESFORCE_RESULTS_MAX_RECORDS):
+        """
+        Yield salesforce query results as batches of records.
+
+        Results are requested a page of max_records at a time following the
+        Sforce-Locator header, and every page is parsed from the response
+        stream, so only one page is held in memory.
+        """
         url = f"{self.base_url}/jobs/query/{job_id}/results"
-        response = requests.get(url, headers=self._get_headers(), timeout=10)
-        return response.text
+        locator = None
+        while True:
+            params = {"maxRecords": max_records}
+            if locator:
+                params["locator"] = locator
+            with self._request(
+                "GET",
+                url,
+                params=params,
+                stream=True,
+                timeout=(10, SALESFORCE_RESULTS_TIMEOUT),
+            ) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                # The text wrapper reads until EOF, which must not close the stream
+                response.raw.auto_close = False
+                reader = csv.reader(
+                    io.TextIOWrapper(response.raw, encoding="utf-8", newline="")
+                )
+                header = next(reader, None)
+                records = [dict(zip(header, row)) for row in reader] if header else []
+                locator = response.headers.get("Sforce-Locator")
+
+            if records:
+                yield records
+            if not locator or locator == "null":
+                break
+
+    def submit_query(self, query):
+        """Create a bulk query job and return its id"""
+        payload = {"operation": "query", "query": query}
+        response = self.create_job(operation="query", payload=payload)
+        return response["id"]
+
+    def query_batches(self, query=None, job_id=None):
+        """
+        Yield the results of a bulk query job in batches of records. A job is
+        created for the query unless the id of a submitted job is given.
+        """
+        job_id = job_id or self.submit_query(query)
+        try:
+            self.wait_for_jobs([job_id])
+            yield from self.iter_results(job_id)
+        finally:
+            self.delete_job(job_id=job_id, operation="query")
+
+    @staticmethod
+    def _soql_in(values):
+        """Format values as the list of a SOQL IN clause"""
+        return "(" + ", ".join(f"'{value}'" for value in values) + ")"
 
     def delete_job(self, job_id, operation):
         """Delete job"""
         url = f"{self.base_url}/jobs/{operation}/{job_id}"
         logger.info("Deleting the job %s", url)
-        response = requests.delete(url, headers=self._get_headers(), timeout=10)
+        response = self._request("DELETE", url)
         return response.text
 
-    def close_job(self, job_id, operation):
+    def close_job(self, job_id, operation, state="UploadComplete"):
         """Close a job"""
         url = f"{self.base_url}/jobs/{operation}/{job_id}"
         logger.info("Closing the Job %s", url)
-        payload = json.dumps({"state": "UploadComplete"})
-        response = requests.patch(
-            url, headers=self._get_headers(), data=payload, timeout=10
-        )
+        payload = json.dumps({"state": state})
+        response = self._request("PATCH", url, data=payload)
         return response.text
 
-    def bulk_job_results(self, job_id):
-        url = f"{self.base_url}/jobs/ingest/{job_id}/successfulResults/"
-        response = requests.get(url, headers=self._get_headers(), timeout=10)
+    def bulk_job_results(self, job_id, result_type="successfulResults"):
+        url = f"{self.base_url}/jobs/ingest/{job_id}/{result_type}/"
+        response = self._request("GET", url, timeout=(10, SALESFORCE_RESULTS_TIMEOUT))
         return response.text
 
-    def wait_for_batch(self, job_id, job_type=None):
-        """Wait for batch for status JobComplete"""
-        job_status = ""
-        counter = 1
-        while job_status != "JobComplete":
-            if job_type == "ingest":
-                job_status = self.get_ingest_job_status(job_id=job_id)["state"]
-            else:
-                job_status = self.get_job_status(job_id=job_id)["state"]
-            if counter <= 10:
-                logger.info("!!! Waiting for job to be completed %s!!!", job_id)
-                time.sleep(counter)
-                counter += 1
-            else:
-                logger.error("Job Incomplete after long time wait")
-                break
+    def wait_for_jobs(self, job_ids, job_type=None):
+        """Wait until all the jobs are complete, raises SalesforceJobError otherwise"""
+        if job_type == "ingest":
+            get_job_status = self.get_ingest_job_status
+        else:
+            get_job_status = self.get_job_status
+        return bulk_job_poller.wait_many(job_ids, get_job_status)
 
-    def bulk_upsert_data(self, s_object, external_id_field_name, csv_data):
-        """Bulk upsert values in salesforce"""
-        logger.info("Bulk update data for %s", s_object)
-        job_payload = {
-            "object": f"{s_object}",
-            "externalIdFieldName": f"{external_id_field_name}",
-            "contentType": "CSV",
-            "operation": "upsert",
-            "lineEnding": "CRLF",
+    def _ingest_chunk(self, job_payload, chunk):
+        """Upload a chunk with a job of its own, returns the job id"""
+        job_id = None
+        try:
+            job_id = self.create_job(operation="ingest", payload=job_payload)["id"]
+            self.update_results(job_id=job_id, payload=chunk)
+            self.close_job(job_id=job_id, operation="ingest")
+        except Exception:
+            if job_id:
+                self.close_job(job_id=job_id, operation="ingest", state="Aborted")
+            raise
+        return job_id
+
+    def _get_chunk_result(self, job_id, successful_results=False):
+        """Wait for the job of a chunk and collect its results"""
+        status = bulk_job_poller.wait(job_id, self.get_ingest_job_status)
+        result = {
+            "processed": int(status.get("numberRecordsProcessed") or 0),
+            "failed": int(status.get("numberRecordsFailed") or 0),
         }
-        response = self.create_job(operation="ingest", payload=job_payload)
-        self.update_results(job_id=response["id"], payload=csv_data)
-        self.close_job(job_id=response["id"], operation="ingest")
-
-    def bulk_insert(self, s_object, csv_data):
-        """Bulk insert values in salesforce"""
-        logger.info("Bulk insert data for %s", s_object)
+        if result["failed"]:
+            result["failed_results"] = self.bulk_job_results(
+                job_id, result_type="failedResults"
+            )
+        if successful_results:
+            result["successful_results"] = self.bulk_job_results(job_id)
+        return result
+
+    def bulk_ingest(
+        self,
+        s_object,
+        operation,
+        fieldnames,
+        data,
+        external_id_field_name=None,
+        successful_results=False,
+    ):
+        """
+        Ingest the rows in size bounded CSV chunks, every chunk is streamed to
+        a job of its own. Waits for the jobs and returns the result of every
+        chunk, chunks which could not be ingested have an error.
+        """
         job_payload = {
-            "object": f"{s_object}",
+            "object": s_object,
             "contentType": "CSV",
-            "operation": "insert",
+            "operation": operation,
             "lineEnding": "CRLF",
         }
-        response = self.create_job(operation="ingest", payload=job_payload)
-        self.update_results(job_id=response["id"], payload=csv_data)
-        self.close_job(job_id=response["id"], operation="ingest")
-        self.wait_for_batch(job_id=response["id"], job_type="ingest")
-        response = self.bulk_job_results(job_id=response["id"])
-        return response
+        if external_id_field_name:
+            job_payload["externalIdFieldName"] = external_id_field_name
+
+        chunks = []
+        for chunk in iter_csv_chunks(fieldnames, data):
+            result = {"job_id": None, "error": None}
+            try:
+                result["job_id"] = self._ingest_chunk(job_payload, chunk)
+            except Exception as err:
+                logger.exception("Error while uploading %s chunk %s", s_object, err)
+                result["error"] = str(err)
+            chunks.append((chunk, result))
+
+        results = []
+        for index, (chunk, result) in enumerate(chunks):
+            result["rows"] = chunk.row_count
+            if result["job_id"]:
+                try:
+                    result.update(
+                        self._get_chunk_result(result["job_id"], successful_results)
+                    )
+                except Exception as err:
+                    logger.exception("Error in %s job %s", s_object, err)
+                    result["error"] = str(err)
+            if result["error"]:
+                self.errors.append(f"{s_object} {operation}: {result['error']}")
+            elif result["failed"]:
+                logger.warning(
+                    "%s of %s %s records failed in job %s:\n%s",
+                    result["failed"],
+                    result["rows"],
+                    s_object,
+                    result["job_id"],
+                    result["failed_results"][:2000],
+                )
+            logger.info(
+                "Bulk %s chunk %s of %s: job %s, %s rows, %s failed",
+                operation,
+                index,
+                s_object,
+                result["job_id"],
+                result["rows"],
+                result.get("failed"),
+            )
+            results.append(result)
+        return results
 
-    @staticmethod
-    def convert_json_to_csv(fieldnames, data):
-        """json to csv"""
-        csv_file = StringIO()
-        csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        csv_writer.writeheader()
-        csv_writer.writerows(data)
-        return csv_file.getvalue()
+    def bulk_upsert_data(self, s_object, external_id_field_name, fieldnames, data):
+        """Bulk upsert values in salesforce"""
+        logger.info("Bulk update data for %s", s_object)
+        return self.bulk_ingest(
+            s_object=s_object,
+            operation="upsert",
+            fieldnames=fieldnames,
+            data=data,
+            external_id_field_name=external_id_field_name,
+        )
+
+    def bulk_insert(self, s_object, fieldnames, data):
+        """Bulk insert values in salesforce, the results have the inserted ids"""
+        logger.info("Bulk insert data for %s", s_object)
+        return self.bulk_ingest(
+            s_object=s_object,
+            operation="insert",
+            fieldnames=fieldnames,
+            data=data,
+            successful_results=True,
+        )
 
     @staticmethod
     def get_salesforce_mapping(tenant_id, s_object):
@@ -227,199 +358,293 @@ class Salesforce:
             "config": config,
         }
 
-    @staticmethod
-    def convert_value(value, conversion_type):
-        """Convert values from Salesforce"""
+    def _get_lookups(self, tenant, logged_in_user):
+        """Lookup cache of the running sync"""
+        if self.lookups is None or self.lookups.tenant.id != tenant.id:
+            self.lookups = SalesforceSyncLookups(tenant, logged_in_user)
+            self.field_mappings = {}
+        return self.lookups
 
-        if conversion_type == bool:
-            return value == "Yes"
+    def _get_user_ids(self, records):
+        return set(
+            record.get(sf_field) for record in records for sf_field in self.USER_FIELDS
+        )
 
-        if conversion_type == "None" or value == "":
-            return None
+    def _get_field_mapping(self, tenant, logged_in_user, mapping, s_object):
+        """
+        Salesforce to Monetizely field mapping of an object, compiled once per
+        sync. The lookup columns read from the lookup cache of the sync, so
+        the batches preload them before they are transformed.
+        """
+        lookups = self._get_lookups(tenant, logged_in_user)
+        if s_object in self.field_mappings:
+            return self.field_mappings[s_object]
+
+        def get_user(salesforce_id):
+            return lookups.get_user(salesforce_id, logged_in_user)
+
+        converters = {sf_field: get_user for sf_field in self.USER_FIELDS}
+        converters["LastModifiedDate"] = to_datetime
+        extra_columns = None
+        empty_values = None
+        if s_object == "Account":
+            converters.update(
+                {
+                    "Active__c": to_bool,
+                    "AnnualRevenue": to_int,
+                    "NumberOfEmployees": to_int,
+                    "Industry": lookups.get_industry,
+                }
+            )
+            empty_values = {"Active__c": False}
+        elif s_object == "Contract":
+            converters.update(
+                {
+                    "CompanySignedDate": to_date,
+                    "CustomerSignedDate": to_date,
+                    "EndDate": to_date,
+                    "StartDate": to_date,
+                    "ActivatedDate": to_datetime,
+                    "AccountId": lookups.get_account,
+                }
+            )
+        elif s_object == "Opportunity":
+            converters.update(
+                {
+                    "CloseDate": to_date,
+                    "Amount": float,
+                    "StageName": lookups.get_opportunity_stage,
+                    "AccountId": lookups.get_account,
+                    "Type": lookups.get_opportunity_type,
+                }
+            )
+            extra_columns = {"ContractId": [("contract_id", lookups.get_contract)]}
 
-        if conversion_type == int:
-            # Check if the value is in scientific notation format
-            if "E" in value:
-                return int(float(value))
-            else:
-                try:
-                    # Attempt to convert to int directly
-                    return int(round(float(value)))
-                except ValueError:
-                    # If the value is a float represented as a string, round it up
-                    return int(round(float(value)))
+        field_mapping = FieldMapping.from_salesforce(
+            mapping,
+            converters=converters,
+            empty_values=empty_values,
+            extra_columns=extra_columns,
+        )
+        self.field_mappings[s_object] = field_mapping
+        return field_mapping
 
-        if conversion_type == float:
-            return float(value)
+    def get_sync_watermarks(self, tenant_id):
+        """
+        Watermarks of the delta synced objects of a tenant by object. Accounts
+        and contracts are only backfilled through the opportunities, so none
+        is returned once any of the objects has no watermark and the sync
+        queries all the opportunities again.
+        """
+        watermarks = dict(
+            SalesforceMappingModel.objects.filter(
+                name__in=self.DELTA_SYNC_OBJECTS,
+                sync_watermark__isnull=False,
+                is_deleted=False,
+                tenant_id=tenant_id,
+            ).values_list("name", "sync_watermark")
+        )
+        if set(watermarks) != set(self.DELTA_SYNC_OBJECTS):
+            return {}
+        return watermarks
 
-        return conversion_type(value)
+    def set_sync_watermarks(self, tenant_id, watermark):
+        SalesforceMappingModel.objects.filter(
+            name__in=self.DELTA_SYNC_OBJECTS, is_deleted=False, tenant_id=tenant_id
+        ).update(sync_watermark=watermark)
 
     @staticmethod
-    def _get_account(salesforce_id):
-        """Get Account data"""
-        account = Account.objects.filter(account_ext_id=salesforce_id).first()
-        return account if account else None
+    def _get_modified_condition(modified_since):
+        since = modified_since - timedelta(seconds=SALESFORCE_SYNC_WATERMARK_OVERLAP)
+        return f"SystemModstamp > {since.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+
+    def _get_query(self, tenant_id, s_object, condition=""):
+        """Query of the mapped salesforce fields of an object"""
+        mapping = self.get_salesforce_mapping(tenant_id=tenant_id, s_object=s_object)
+        sf_source_fields = mapping["salesforce_field_mapping"].keys()
+        return f"SELECT {', '.join(sf_source_fields)} FROM {s_object} {condition}"
+
+    def _get_modified_ids_query(self, s_object, modified_since):
+        return (
+            f"SELECT Id FROM {s_object} "
+            f"WHERE {self._get_modified_condition(modified_since)}"
+        )
 
-    @staticmethod
-    def _get_contract(salesforce_id):
-        """Get Contract data"""
-        contract = Contract.objects.filter(contract_external_id=salesforce_id).first()
-        return contract if contract else None
+    def _get_account_query(self, tenant_id, account_ids):
+        return self._get_query(
+            tenant_id, "Account", f"WHERE Account.Id IN {self._soql_in(account_ids)}"
+        )
 
-    @staticmethod
-    def _get_industry(name, tenant):
-        """Get Account Industry"""
-        industry, _ = IndustryType.objects.get_or_create(
-            name=name,
-            is_deleted=False,
-            tenant_id=tenant.id,
-            defaults={"name": name, "tenant_id": tenant},
+    def _get_contract_query(self, tenant_id, contract_ids):
+        return self._get_query(
+            tenant_id,
+            "Contract",
+            f"WHERE Contract.Id IN {self._soql_in(contract_ids)}",
         )
-        return industry
 
-    @staticmethod
-    def _get_opportunity_stage(name, tenant):
-        """Get opportunity stage"""
-        stage, _ = OpportunityStage.objects.get_or_create(
-            name=name,
-            is_deleted=False,
-            tenant_id=tenant.id,
-            defaults={"name": name, "tenant_id": tenant},
+    def _get_opportunity_query(self, tenant_id, modified_since=None):
+        mapping = self.get_salesforce_mapping(
+            tenant_id=tenant_id, s_object="Opportunity"
         )
+        cut_off_date = mapping["config"][0]["CreatedDate"]
+        cut_off_date_formatted = datetime.strptime(
+            cut_off_date, "%Y-%m-%d"
+        ).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        condition = f"WHERE Opportunity.CreatedDate >= {cut_off_date_formatted}"
+        if modified_since:
+            condition += f" AND {self._get_modified_condition(modified_since)}"
+        return self._get_query(tenant_id, "Opportunity", condition)
+
+    def _get_quote_query(self, tenant_id):
+        mapping = self.get_salesforce_mapping(tenant_id=tenant_id, s_object="Quote")
+        sf_source_fields = mapping["salesforce_field_mapping"].keys()
+        return f"SELECT {', '.join(sf_source_fields)} FROM Quote__c"
+
+    def _get_user_hierarchy_query(self, tenant_id):
+        mapping = self.get_salesforce_mapping(
+            tenant_id=tenant_id, s_object="OrgHierarchy"
+        )
+        sf_source_fields = mapping["salesforce_field_mapping"].keys()
+        return f"SELECT {', '.join(sf_source_fields)} FROM userrole"
 
-        return stage
+    def _get_user_query(self, tenant_id):
+        mapping = self.get_salesforce_mapping(tenant_id=tenant_id, s_object="User")
+        return self._get_query(
+            tenant_id, "User", f"WHERE ProfileID IN {self._soql_in(mapping['config'])}"
+        )
 
-    @staticmethod
-    def _get_opportunity_type(name, tenant):
-        """Get opportunity type"""
-        op_type, _ = OpportunityType.objects.get_or_create(
-            name=name,
-            is_deleted=False,
-            tenant_id=tenant.id,
-            defaults={"name": name, "tenant_id": tenant},
+    def submit_sync_queries(self, tenant_id, watermarks=None):
+        """
+        Submit the query jobs of a tenant sync up front, so Salesforce runs
+        them concurrently, and wait for them. Objects with a watermark only
+        query the records modified since. Returns the job ids by object.
+        """
+        watermarks = watermarks or {}
+        query_builders = {
+            "OrgHierarchy": partial(self._get_user_hierarchy_query, tenant_id),
+            "User": partial(self._get_user_query, tenant_id),
+            "Opportunity": partial(
+                self._get_opportunity_query,
+                tenant_id,
+                modified_since=watermarks.get("Opportunity"),
+            ),
+            "Quote": partial(self._get_quote_query, tenant_id),
+        }
+        for s_object in ("Account", "Contract"):
+            if watermarks.get(s_object):
+                query_builders[f"Modified{s_object}"] = partial(
+                    self._get_modified_ids_query, s_object, watermarks[s_object]
+                )
+        job_ids = {}
+        for s_object, get_query in query_builders.items():
+            try:
+                job_ids[s_object] = self.submit_query(get_query())
+            except Exception as err:
+                logger.exception("Error while submitting %s query %s", s_object, err)
+                if s_object.startswith("Modified"):
+                    # Nothing queries the modified records later on
+                    self.errors.append(f"{s_object}: {err}")
+        try:
+            self.wait_for_jobs(list(job_ids.values()))
+        except SalesforceJobError as err:
+            # The sync reading the job logs the failure
+            logger.error("Salesforce query job %s failed: %s", err.job_id, err)
+        return job_ids
+
+    def _upsert_accounts(self, tenant, logged_in_user, mapping, account_list):
+        """Upsert a batch of salesforce accounts"""
+        sf_field_mapping = mapping["salesforce_field_mapping"]
+        lookups = self._get_lookups(tenant, logged_in_user)
+        field_mapping = self._get_field_mapping(
+            tenant, logged_in_user, mapping, "Account"
         )
-        return op_type
+        lookups.preload_users(self._get_user_ids(account_list))
+        lookups.preload_accounts(record["Id"] for record in account_list)
+        if "Industry" in sf_field_mapping:
+            lookups.preload_industries(
+                record.get("Industry") for record in account_list
+            )
+        bulk_create_accounts = []
+        bulk_update_accounts = []
+        for record, account_data in zip(
+            account_list, field_mapping.transform_batch(account_list)
+        ):
+            external_id = record["Id"]
+            account_data["tenant_id"] = tenant
+
+            if lookups.get_account(external_id):
+                bulk_update_accounts.append(account_data)
+            else:
+                bulk_create_accounts.append(Account(**account_data))
+
+        if bulk_create_accounts:
+            inserted_accounts = Account.objects.bulk_create(bulk_create_accounts)
+            lookups.add_accounts(inserted_accounts)
+            data = [
+                {"Id": item.account_ext_id, "Account_ext_key__c": str(item.id)}
+                for item in inserted_accounts
+            ]
+            fieldnames = list(mapping["monetizely_field_mapping"].values())
+
+            # Check if 'Id' is already in fieldnames list
+            if "Id" not in fieldnames:
+                fieldnames.append("Id")
+            self.bulk_upsert_data(
+                s_object="Account",
+                external_id_field_name="Id",
+                fieldnames=fieldnames,
+                data=data,
+            )
 
-    def sync_account(self, tenant_id, logged_in_user, account_ids):
+        if bulk_update_accounts:
+            accounts_to_update = []
+            for data in bulk_update_accounts:
+                existing_account = lookups.get_account(data["account_ext_id"])
+                is_modified = False
+                if existing_account.updated_on < data["updated_on"]:
+                    for field, value in data.items():
+                        setattr(existing_account, field, value)
+                        is_modified = True
+
+                if is_modified:
+                    accounts_to_update.append(existing_account)
+
+            Account.objects.bulk_update(
+                accounts_to_update,
+                [
+                    field
+                    for field in sf_field_mapping.values()
+                    if field != "account_ext_id"
+                ],
+            )
+
+    def sync_account(self, tenant_id, logged_in_user, account_ids, job_id=None):
         """Sync Account"""
         try:
             logger.info("Accounts sync started.")
             mapping = self.get_salesforce_mapping(
                 tenant_id=tenant_id, s_object="Account"
             )
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
-            sf_field_mapping = mapping["salesforce_field_mapping"]
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
-            account_ids = tuple(account_ids)
-            query = f"SELECT {', '.join(sf_source_fields)} FROM Account WHERE Account.Id IN {account_ids}"
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(job_id=response["id"])
-            accounts = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(accounts))
-            account_list = json.loads(json.dumps(list(reader)))
-            account_existing_ids = Account.objects.filter(
-                tenant_id=tenant_id
-            ).values_list("account_ext_id", flat=True)
-            salesforce_user_ids = set()
-            for record in account_list:
-                record["Active__c"] = self.convert_value(record["Active__c"], bool)
-                record["AnnualRevenue"] = self.convert_value(
-                    record["AnnualRevenue"], int
-                )
-                record["NumberOfEmployees"] = self.convert_value(
-                    record["NumberOfEmployees"], int
-                )
-                record["LastModifiedDate"] = datetime.strptime(
-                    record.get("LastModifiedDate", ""), "%Y-%m-%dT%H:%M:%S.%f%z"
-                )
-                salesforce_user_ids.update([record["OwnerId"], record["CreatedById"]])
-
-            users = User.objects.filter(id_ext_key__in=list(salesforce_user_ids))
-            salesforce_monetizely_user_mapping = {
-                user.id_ext_key: User.objects.get(id=user.id) for user in users
-            }
-            bulk_create_accounts = []
-            bulk_update_accounts = []
-            for record in account_list:
-                external_id = record["Id"]
-                account_data = {}
-                for sf_field, destination_field in sf_field_mapping.items():
-                    field_value = record.get(sf_field)
-                    if field_value == "":
-                        account_data[destination_field] = None
-                    elif sf_field == "Industry":
-                        account_data[destination_field] = self._get_industry(
-                            name=field_value, tenant=tenant
-                        )
-                    elif sf_field in ["OwnerId", "CreatedById", "ModifiedById"]:
-                        account_data[destination_field] = record.get(
-                            salesforce_monetizely_user_mapping.get(
-                                sf_field, logged_in_user
-                            )
-                        )
-                    else:
-                        account_data[destination_field] = field_value
-
-                account_data["tenant_id"] = tenant
-
-                if external_id in account_existing_ids:
-                    bulk_update_accounts.append(account_data)
-                else:
-                    bulk_create_accounts.append(Account(**account_data))
-
-            if bulk_create_accounts:
-                inserted_accounts = Account.objects.bulk_create(bulk_create_accounts)
-                data = [
-                    {"Id": item.account_ext_id, "Account_ext_key__c": str(item.id)}
-                    for item in inserted_accounts
-                ]
-                fieldnames = list(mapping["monetizely_field_mapping"].values())
-
-                # Check if 'Id' is already in fieldnames list
-                if "Id" not in fieldnames:
-                    fieldnames.append("Id")
-                csv_data = self.convert_json_to_csv(fieldnames=fieldnames, data=data)
-                self.bulk_upsert_data(
-                    s_object="Account", external_id_field_name="Id", csv_data=csv_data
-                )
-
-            if bulk_update_accounts:
-                accounts_to_update = []
-                existing_accounts = Account.objects.filter(
-                    tenant_id=tenant_id,
-                    account_ext_id__in=[
-                        data["account_ext_id"] for data in bulk_update_accounts
-                    ],
-                )
-
-                for data in bulk_update_accounts:
-                    external_id = data["account_ext_id"]
-                    existing_account = existing_accounts.get(account_ext_id=external_id)
-                    is_modified = False
-                    if existing_account.updated_on < data["updated_on"]:
-                        for field, value in data.items():
-                            setattr(existing_account, field, value)
-                            is_modified = True
-
-                    if is_modified:
-                        accounts_to_update.append(existing_account)
-
-                Account.objects.bulk_update(
-                    accounts_to_update,
-                    [
-                        field
-                        for field in sf_field_mapping.values()
-                        if field != "account_ext_id"
-                    ],
+            tenant = get_tenant_obj_from_id(tenant_id)
+            if not account_ids and not job_id:
+                logger.info("No accounts to sync.")
+                return
+            query = None if job_id else self._get_account_query(tenant_id, account_ids)
+            for account_list in self.query_batches(query=query, job_id=job_id):
+                self._upsert_accounts(
+                    tenant=tenant,
+                    logged_in_user=logged_in_user,
+                    mapping=mapping,
+                    account_list=account_list,
                 )
             logger.info("Accounts synced successfully!")
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing Accounts %s", err)
+            self.errors.append(f"Accounts: {err}")
             logger.info("**************ERROR*************************\n")
 
-    def sync_quote(self, tenant_id, logged_in_user):
+    def sync_quote(self, tenant_id, logged_in_user, job_id=None):
         """Syncs quotes from the local database to Salesforce.
 
         Args:
@@ -436,23 +661,18 @@ class Salesforce:
             mapping = self.get_salesforce_mapping(tenant_id=tenant_id, s_object="Quote")
             m_field_mapping = mapping["monetizely_field_mapping"]
 
-            # Get Monetizely mapping for quotes
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
-            sf_field_mapping = mapping["salesforce_field_mapping"]
-
             # Retrieve tenant information
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+            tenant = get_tenant_obj_from_id(tenant_id)
 
             # Get Quotes data from Salesforce
-            query = f"SELECT {', '.join(sf_source_fields)} FROM Quote__c"
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(job_id=response["id"])
-            quotes = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(quotes))
-            sf_quotes_list = json.loads(json.dumps(list(reader)))
+            query = None if job_id else self._get_quote_query(tenant_id)
+            # Only the modified date of the salesforce quotes is compared
             sf_quote_dict = {
-                sf_quote.get("Id"): sf_quote for sf_quote in sf_quotes_list
+                sf_quote.get("Id"): {
+                    "LastModifiedDate": sf_quote.get("LastModifiedDate")
+                }
+                for sf_quotes in self.query_batches(query=query, job_id=job_id)
+                for sf_quote in sf_quotes
             }
 
             # Retrieve quotes from the local database
@@ -495,33 +715,20 @@ class Salesforce:
             required_fields = list(m_field_mapping.values())
             required_fields.remove("Discount__c")
 
-            # Set a field which will be unique and make mappings around that
+            # Map the fields from the local quotes to Salesforce fields
+            quote_mapping = FieldMapping.to_salesforce(
+                mapping,
+                converters={
+                    "opportunity_id": lambda value: opportunity_dict.get(str(value)),
+                    "account_id": lambda value: account_dict.get(str(value)),
+                    "id": str,
+                },
+            )
 
             # Process each quote
             for quote in quotes_list:
-                data = {}
                 quote_temp = QuoteSerializer(quote).data
-
-                # Map the fields from the local quote to Salesforce fields
-                for m_field, destination_field in m_field_mapping.items():
-                    if m_field == "opportunity_id":
-                        opportunity_id = str(quote_temp.get(m_field))
-                        if opportunity_id:
-                            data[destination_field] = opportunity_dict.get(
-                                opportunity_id
-                            )
-                        else:
-                            data[destination_field] = None
-                    elif m_field == "account_id":
-                        account_id = str(quote_temp.get(m_field))
-                        if account_id:
-                            data[destination_field] = account_dict.get(account_id)
-                        else:
-                            data[destination_field] = None
-                    elif m_field == "id":
-                        data[destination_field] = str(quote_temp.get(m_field))
-                    else:
-                        data[destination_field] = quote_temp.get(m_field)
+                data = quote_mapping.transform(quote_temp)
                 account_data = {
                     "Contact_Name__c": quote.account_id.contact_name
                     if quote.account_id.contact_name
@@ -562,45 +769,124 @@ class Salesforce:
             if bulk_insert_quotes:
                 # Bulk insert new quotes into Salesforce
                 fieldnames = list(bulk_insert_quotes[0].keys())
-                csv_data = self.convert_json_to_csv(
-                    fieldnames=fieldnames, data=bulk_insert_quotes
-                )
-                quote_response = self.bulk_insert(
-                    s_object="Quote__c", csv_data=csv_data
+                chunk_results = self.bulk_insert(
+                    s_object="Quote__c", fieldnames=fieldnames, data=bulk_insert_quotes
                 )
 
                 # Process the response and update the local quotes with Salesforce IDs
-                reader = csv.reader(quote_response.splitlines())
-                header = next(reader, None)
-                sf_id_index = header.index("sf__Id")
-                quote_number_index = header.index("Quote_Number__c")
                 bulk_update_list = []
-
-                for row in reader:
-                    quote_instance = quotes_dict.get(row[quote_number_index])
-                    quote_instance.quote_external_id = row[sf_id_index]
-                    quote_instance.id = quotes_id_number_dict[row[quote_number_index]]
-                    bulk_update_list.append(quote_instance)
+                for chunk_result in chunk_results:
+                    reader = csv.reader(
+                        chunk_result.get("successful_results", "").splitlines()
+                    )
+                    header = next(reader, None)
+                    if not header:
+                        continue
+                    sf_id_index = header.index("sf__Id")
+                    quote_number_index = header.index("Quote_Number__c")
+
+                    for row in reader:
+                        quote_number = row[quote_number_index]
+                        quote_instance = quotes_dict.get(quote_number)
+                        quote_instance.quote_external_id = row[sf_id_index]
+                        quote_instance.id = quotes_id_number_dict[quote_number]
+                        bulk_update_list.append(quote_instance)
                 Quote.objects.bulk_update(bulk_update_list, ["quote_external_id"])
 
             if bulk_update_quotes:
                 # Bulk upsert existing quotes in Salesforce
                 fieldnames = list(bulk_update_quotes[0].keys())
-                update_csv_data = self.convert_json_to_csv(
-                    fieldnames=fieldnames, data=bulk_update_quotes
-                )
                 self.bulk_upsert_data(
                     s_object="Quote__c",
                     external_id_field_name="Id",
-                    csv_data=update_csv_data,
+                    fieldnames=fieldnames,
+                    data=bulk_update_quotes,
                 )
 
             logger.info("Quote synced successfully!")
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing Quotes %s", err)
+            self.errors.append(f"Quotes: {err}")
             logger.info("**************ERROR*************************\n")
 
+    def _upsert_contracts(self, tenant, logged_in_user, mapping, contract_list):
+        """Upsert a batch of salesforce contracts"""
+        sf_field_mapping = mapping["salesforce_field_mapping"]
+        lookups = self._get_lookups(tenant, logged_in_user)
+        field_mapping = self._get_field_mapping(
+            tenant, logged_in_user, mapping, "Contract"
+        )
+        lookups.preload_users(self._get_user_ids(contract_list))
+        lookups.preload_accounts(record.get("AccountId") for record in contract_list)
+        lookups.preload_contracts(record["Id"] for record in contract_list)
+        bulk_contract_create_data = []
+        bulk_contract_update_data = []
+
+        for record, contract_data in zip(
+            contract_list, field_mapping.transform_batch(contract_list)
+        ):
+            external_id = record["Id"]
+            contract_data["tenant_id"] = tenant
+            if lookups.get_contract(external_id):
+                bulk_contract_update_data.append(contract_data)
+            else:
+                if not bulk_contract_create_data:
+                    latest_contract = ContractViewSet.generate_contract_number(
+                        tenant.id
+                    )
+                    contract_data["contract_number"] = latest_contract
+                else:
+                    number_part = int(latest_contract[2:])
+                    next_number_part = number_part + 1
+                    latest_contract = f"C_{str(next_number_part).zfill(6)}"
+                    contract_data["contract_number"] = latest_contract
+                bulk_contract_create_data.append(Contract(**contract_data))
+        if bulk_contract_create_data:
+            inserted_contracts = Contract.objects.bulk_create(
+                bulk_contract_create_data
+            )
+            lookups.add_contracts(inserted_contracts)
+            data = [
+                {
+                    "Id": item.contract_external_id,
+                    "Contract_ExternalKey__C": str(item.contract_number),
+                }
+                for item in inserted_contracts
+            ]
+            fieldnames = ["Id", "Contract_ExternalKey__C"]
+
+            # Check if 'Id' is already in fieldnames list
+            if "Id" not in fieldnames:
+                fieldnames.append("Id")
+
+            self.bulk_upsert_data(
+                s_object="Contract",
+                external_id_field_name="Id",
+                fieldnames=fieldnames,
+                data=data,
+            )
+        if bulk_contract_update_data:
+            contract_to_update = []
+            for data in bulk_contract_update_data:
+                existing_contract = lookups.get_contract(data["contract_external_id"])
+                is_modified = False
+                if existing_contract.updated_on < data["updated_on"]:
+                    for field, value in data.items():
+                        setattr(existing_contract, field, value)
+                        is_modified = True
+
+                if is_modified:
+                    contract_to_update.append(existing_contract)
+            Contract.objects.bulk_update(
+                contract_to_update,
+                [
+                    field
+                    for field in sf_field_mapping.values()
+                    if field != "contract_external_id"
+                ],
+            )
+
     def sync_contract(self, tenant_id, logged_in_user, contract_ids, account_ids):
         """Sync Contracts"""
         try:
@@ -608,365 +894,239 @@ class Salesforce:
             mapping = self.get_salesforce_mapping(
                 tenant_id=tenant_id, s_object="Contract"
             )
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
-            sf_field_mapping = mapping["salesforce_field_mapping"]
-            m_field_mapping = mapping["monetizely_field_mapping"]
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
-            contract_ids = (
-                tuple(contract_ids)
-                if len(contract_ids) > 1
-                else f"('{contract_ids[0]}')"
-            )
-            query = f"SELECT {', '.join(sf_source_fields)} FROM Contract WHERE Contract.Id IN {contract_ids}"
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(job_id=response["id"])
-            contracts = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(contracts))
-            contract_list = json.loads(json.dumps(list(reader)))
-            self.delete_job(job_id=response["id"], operation="query")
-            existing_external_ids = Contract.objects.filter(
-                tenant_id=tenant_id
-            ).values_list("contract_external_id", flat=True)
+            tenant = get_tenant_obj_from_id(tenant_id)
 
-            account_list = [
-                account["AccountId"]
-                for account in contract_list
-                if account["AccountId"]
-            ]
-
-            if account_list:
-                account_ids.update(account_list)
-
-            self.sync_account(
-                tenant_id=tenant_id,
-                logged_in_user=logged_in_user,
-                account_ids=account_ids,
+            # The contracts and the already known accounts are queried together
+            account_ids = set(account_ids)
+            contract_job_id = self.submit_query(
+                self._get_contract_query(tenant_id, contract_ids)
             )
-
-            contract_date_attr = [
-                "CompanySignedDate",
-                "CustomerSignedDate",
-                "EndDate",
-                "StartDate",
-            ]
-
-            salesforce_user_ids = set()
-            for record in contract_list:
-                record.update(
-                    {
-                        key: make_aware(datetime.strptime(record[key], "%Y-%m-%d"))
-                        if record.get(key)
-                        else None
-                        for key in contract_date_attr
-                    }
+            account_job_id = None
+            if account_ids:
+                account_job_id = self.submit_query(
+                    self._get_account_query(tenant_id, account_ids)
                 )
-                record["ActivatedDate"] = (
-                    datetime.strptime(
-                        record.get("ActivatedDate", ""), "%Y-%m-%dT%H:%M:%S.%f%z"
+            self.wait_for_jobs(
+                [job_id for job_id in (contract_job_id, account_job_id) if job_id]
+            )
+
+            for contract_list in self.query_batches(job_id=contract_job_id):
+                if account_job_id:
+                    self.sync_account(
+                        tenant_id=tenant_id,
+                        logged_in_user=logged_in_user,
+                        account_ids=account_ids,
+                        job_id=account_job_id,
+                    )
+                    account_job_id = None
+                contract_account_ids = (
+                    set(
+                        account["AccountId"]
+                        for account in contract_list
+                        if account["AccountId"]
                     )
-                    if record["ActivatedDate"]
-                    else None
+                    - account_ids
                 )
-                record["LastModifiedDate"] = datetime.strptime(
-                    record.get("LastModifiedDate", ""), "%Y-%m-%dT%H:%M:%S.%f%z"
+                if contract_account_ids:
+                    self.sync_account(
+                        tenant_id=tenant_id,
+                        logged_in_user=logged_in_user,
+                        account_ids=contract_account_ids,
+                    )
+                    account_ids.update(contract_account_ids)
+                self._upsert_contracts(
+                    tenant=tenant,
+                    logged_in_user=logged_in_user,
+                    mapping=mapping,
+                    contract_list=contract_list,
                 )
-
-            users = User.objects.filter(id_ext_key__in=list(salesforce_user_ids))
-            salesforce_monetizely_user_dict = {
-                user.id_ext_key: User.objects.get(id=user.id) for user in users
-            }
-            bulk_contract_create_data = []
-            bulk_contract_update_data = []
-
-            for record in contract_list:
-                external_id = record["Id"]
-                contract_data = {}
-                for sf_field, destination_field in sf_field_mapping.items():
-                    field_value = record.get(sf_field)
-                    if field_value == "":
-                        contract_data[destination_field] = None
-                    elif sf_field == "AccountId":
-                        contract_data[destination_field] = self._get_account(
-                            salesforce_id=field_value
-                        )
-                    elif sf_field in [
-                        "OwnerId",
-                        "CreatedById",
-                        "ModifiedById",
-                    ]:
-                        contract_data[destination_field] = record.get(
-                            salesforce_monetizely_user_dict.get(
-                                sf_field, logged_in_user
-                            )
-                        )
-                    else:
-                        contract_data[destination_field] = field_value
-
-                contract_data["tenant_id"] = tenant
-                if external_id in existing_external_ids:
-                    bulk_contract_update_data.append(contract_data)
-                else:
-                    if not bulk_contract_create_data:
-                        latest_contract = ContractViewSet.generate_contract_number(
-                            tenant.id
-                        )
-                        contract_data["contract_number"] = latest_contract
-                    else:
-                        number_part = int(latest_contract[2:])
-                        next_number_part = number_part + 1
-                        latest_contract = f"C_{str(next_number_part).zfill(6)}"
-                        contract_data["contract_number"] = latest_contract
-                    bulk_contract_create_data.append(Contract(**contract_data))
-            if bulk_contract_create_data:
-                inserted_contracts = Contract.objects.bulk_create(
-                    bulk_contract_create_data
+                self.synced_contract_ids.update(
+                    record["Id"] for record in contract_list
                 )
-                data = [
-                    {
-                        "Id": item.contract_external_id,
-                        "Contract_ExternalKey__C": str(item.contract_number),
-                    }
-                    for item in inserted_contracts
-                ]
-                fieldnames = ["Id", "Contract_ExternalKey__C"]
-
-                # Check if 'Id' is already in fieldnames list
-                if "Id" not in fieldnames:
-                    fieldnames.append("Id")
 
-                csv_data = self.convert_json_to_csv(fieldnames=fieldnames, data=data)
-                self.bulk_upsert_data(
-                    s_object="Contract", external_id_field_name="Id", csv_data=csv_data
-                )
-            if bulk_contract_update_data:
-                contract_to_update = []
-                existing_contracts = Contract.objects.filter(
+            if account_job_id:
+                self.sync_account(
                     tenant_id=tenant_id,
-                    contract_external_id__in=[
-                        data["contract_external_id"]
-                        for data in bulk_contract_update_data
-                    ],
-                )
-
-                for data in bulk_contract_update_data:
-                    external_id = data["contract_external_id"]
-                    existing_contract = existing_contracts.get(
-                        contract_external_id=external_id
-                    )
-                    is_modified = False
-                    if existing_contract.updated_on < data["updated_on"]:
-                        for field, value in data.items():
-                            setattr(existing_contract, field, value)
-                            is_modified = True
-
-                    if is_modified:
-                        contract_to_update.append(existing_contract)
-                Contract.objects.bulk_update(
-                    contract_to_update,
-                    [
-                        field
-                        for field in sf_field_mapping.values()
-                        if field != "contract_external_id"
-                    ],
-                )
-            existing_contracts = Contract.objects.filter(
-                contract_external_id__isnull=False
-            )
-            if contracts:
-                data = []
-                for item in existing_contracts:
-                    record_ = {}
-                    contract = ContractSerializer(item).data
-                    for m_field, destination_field in m_field_mapping.items():
-                        if m_field in [
-                            "start_date",
-                            "end_date",
-                            "customer_signed_date",
-                            "company_signed_date",
-                        ] and contract.get(m_field):
-                            record_[destination_field] = datetime.strptime(
-                                contract.get(m_field)[0:10], "%Y-%m-%d"
-                            ).strftime("%Y-%m-%d")
-                        else:
-                            record_[destination_field] = contract.get(m_field)
-                    data.append(record_)
-                fieldnames = list(mapping["monetizely_field_mapping"].values())
-                csv_data = self.convert_json_to_csv(fieldnames=fieldnames, data=data)
-                self.bulk_upsert_data(
-                    s_object="Contract", external_id_field_name="Id", csv_data=csv_data
+                    logged_in_user=logged_in_user,
+                    account_ids=account_ids,
+                    job_id=account_job_id,
                 )
             logger.info("Contracts synced successfully!")
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing Contract %s", err)
+            self.errors.append(f"Contract: {err}")
             logger.info("**************ERROR*************************\n")
 
-    def sync_opportunity(self, tenant_id, logged_in_user):
-        """Sync opportunities"""
+    def push_contracts(self, tenant_id):
+        """
+        Push the mapped fields of the contracts synced by this run back to
+        Salesforce, once after all the batches.
+        """
+        if not self.synced_contract_ids:
+            return
         try:
-            logger.info("Opportunity sync started.")
             mapping = self.get_salesforce_mapping(
-                tenant_id=tenant_id, s_object="Opportunity"
+                tenant_id=tenant_id, s_object="Contract"
             )
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
-            sf_field_mapping = mapping["salesforce_field_mapping"]
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
-            cut_off_date = mapping["config"][0]["CreatedDate"]
-            cut_off_date_formatted = datetime.strptime(
-                cut_off_date, "%Y-%m-%d"
-            ).strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            query = f"SELECT {', '.join(sf_source_fields)} FROM Opportunity WHERE Opportunity.CreatedDate >= {cut_off_date_formatted} "
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(response["id"])
-
-            opportunities = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(opportunities))
-            opportunities_list = json.loads(json.dumps(list(reader)))
-            self.delete_job(job_id=response["id"], operation="query")
-
-            account_list = [
-                account["AccountId"]
-                for account in opportunities_list
-                if account["AccountId"]
-            ]
-            required_accounts = set()
-            if account_list:
-                required_accounts.update(account_list)
-
-            contract_list = [
-                contract["ContractId"]
-                for contract in opportunities_list
-                if contract["ContractId"]
-            ]
-            if contract_list:
-                self.sync_contract(
-                    tenant_id=tenant_id,
-                    logged_in_user=logged_in_user,
-                    contract_ids=contract_list,
-                    account_ids=required_accounts,
-                )
+            contracts = Contract.objects.filter(
+                tenant_id=tenant_id,
+                contract_external_id__in=self.synced_contract_ids,
+            )
+            contract_mapping = FieldMapping.to_salesforce(
+                mapping,
+                converters={
+                    m_field: to_salesforce_date
+                    for m_field in [
+                        "start_date",
+                        "end_date",
+                        "customer_signed_date",
+                        "company_signed_date",
+                    ]
+                },
+            )
+            data = contract_mapping.transform_batch(
+                ContractSerializer(item).data for item in contracts
+            )
+            self.bulk_upsert_data(
+                s_object="Contract",
+                external_id_field_name="Id",
+                fieldnames=contract_mapping.destinations,
+                data=data,
+            )
+            logger.info("%s contracts pushed to Salesforce.", len(data))
+        except Exception as err:
+            logger.info("************ERROR**************************")
+            logger.exception("Error while pushing Contracts %s", err)
+            self.errors.append(f"Contract: {err}")
+            logger.info("**************ERROR*************************\n")
+
+    def _upsert_opportunities(
+        self, tenant, logged_in_user, mapping, opportunities_list
+    ):
+        """Upsert a batch of salesforce opportunities"""
+        tenant_id = tenant.id
+        sf_field_mapping = mapping["salesforce_field_mapping"]
+        existing_opportunities = {
+            opportunity.op_external_id: opportunity
+            for opportunity in Opportunity.objects.filter(
+                tenant_id=tenant_id,
+                op_external_id__in=[record["Id"] for record in opportunities_list],
+            )
+        }
+        lookups = self._get_lookups(tenant, logged_in_user)
+        field_mapping = self._get_field_mapping(
+            tenant, logged_in_user, mapping, "Opportunity"
+        )
+        lookups.preload_users(self._get_user_ids(opportunities_list))
+        lookups.preload_accounts(
+            record.get("AccountId") for record in opportunities_list
+        )
+        lookups.preload_contracts(
+            record.get("ContractId") for record in opportunities_list
+        )
+        if "StageName" in sf_field_mapping:
+            lookups.preload_opportunity_stages(
+                record.get("StageName") for record in opportunities_list
+            )
+        if "Type" in sf_field_mapping:
+            lookups.preload_opportunity_types(
+                record.get("Type") for record in opportunities_list
+            )
+        bulk_opportunity_create_data = []
+        bulk_opportunity_update_data = []
+        for record, opportunity_data in zip(
+            opportunities_list, field_mapping.transform_batch(opportunities_list)
+        ):
+            external_id = record["Id"]
+            opportunity_data["tenant_id"] = tenant
+            if external_id in existing_opportunities:
+                bulk_opportunity_update_data.append(opportunity_data)
             else:
-                self.sync_account(
-                    tenant_id=tenant_id,
-                    logged_in_user=logged_in_user,
-                    account_ids=required_accounts,
-                )
-            existing_external_ids = Opportunity.objects.filter(
-                tenant_id=tenant_id
-            ).values_list("op_external_id", flat=True)
-            salesforce_user_ids = set()
+                bulk_opportunity_create_data.append(Opportunity(**opportunity_data))
 
-            for record in opportunities_list:
-                record["CloseDate"] = make_aware(
-                    datetime.strptime(record["CloseDate"], "%Y-%m-%d")
-                )
-                record["LastModifiedDate"] = datetime.strptime(
-                    record.get("LastModifiedDate", ""), "%Y-%m-%dT%H:%M:%S.%f%z"
-                )
-                record["Amount"] = self.convert_value(record["Amount"], float)
-                salesforce_user_ids.update([record["OwnerId"], record["CreatedById"]])
+        if bulk_opportunity_create_data:
+            inserted_opportunities = Opportunity.objects.bulk_create(
+                bulk_opportunity_create_data
+            )
+            data = [
+                {"Id": item.op_external_id, "OP_ExternalKey__c": str(item.id)}
+                for item in inserted_opportunities
+            ]
+            fieldnames = list(mapping["monetizely_field_mapping"].values())
 
-            users = User.objects.filter(id_ext_key__in=list(salesforce_user_ids))
-            salesforce_monetizely_user_dict = {
-                user.id_ext_key: User.objects.get(id=user.id) for user in users
-            }
-            bulk_opportunity_create_data = []
-            bulk_opportunity_update_data = []
-            for record in opportunities_list:
-                external_id = record["Id"]
-                opportunity_data = {}
-                for sf_field, destination_field in sf_field_mapping.items():
-                    field_value = record.get(sf_field)
-                    if field_value == "":
-                        opportunity_data[destination_field] = None
-                    elif sf_field == "StageName":
-                        opportunity_data[
-                            destination_field
-                        ] = self._get_opportunity_stage(name=field_value, tenant=tenant)
-                    elif sf_field == "AccountId":
-                        opportunity_data[destination_field] = self._get_account(
-                            salesforce_id=field_value
-                        )
-                    elif sf_field == "ContractId":
-                        contract_id = field_value
-                        opportunity_data["contract_id"] = self._get_contract(
-                            salesforce_id=contract_id
-                        )
-                        opportunity_data[destination_field] = record.get(sf_field)
-                    elif sf_field == "Type":
-                        type_name = field_value
-                        opportunity_data[
-                            destination_field
-                        ] = self._get_opportunity_type(name=type_name, tenant=tenant)
-                    elif sf_field in ["OwnerId", "CreatedById", "ModifiedById"]:
-                        user_id_value = field_value
-                        # Check for empty string and map to None
-                        opportunity_data[destination_field] = record.get(
-                            salesforce_monetizely_user_dict.get(
-                                sf_field, logged_in_user
-                            )
-                        )
-                    else:
-                        opportunity_data[destination_field] = field_value
+            # Check if 'Id' is already in fieldnames list
+            if "Id" not in fieldnames:
+                fieldnames.append("Id")
 
-                opportunity_data["tenant_id"] = tenant
-                if external_id in existing_external_ids:
-                    bulk_opportunity_update_data.append(opportunity_data)
-                else:
-                    bulk_opportunity_create_data.append(Opportunity(**opportunity_data))
+            self.bulk_upsert_data(
+                s_object="Opportunity",
+                external_id_field_name="Id",
+                fieldnames=fieldnames,
+                data=data,
+            )
+        if bulk_opportunity_update_data:
+            opportunities_to_update = []
+            for data in bulk_opportunity_update_data:
+                existing_opportunity = existing_opportunities[data["op_external_id"]]
+                is_modified = False
+                if existing_opportunity.updated_on < data["updated_on"]:
+                    for field, value in data.items():
+                        setattr(existing_opportunity, field, value)
+                        is_modified = True
+
+                if is_modified:
+                    opportunities_to_update.append(existing_opportunity)
+            Opportunity.objects.bulk_update(
+                opportunities_to_update,
+                [
+                    field
+                    for field in sf_field_mapping.values()
+                    if field != "op_external_id"
+                ],
+            )
 
-            if bulk_opportunity_create_data:
-                inserted_opportunities = Opportunity.objects.bulk_create(
-                    bulk_opportunity_create_data
+    def sync_opportunity(self, tenant_id, logged_in_user, job_id=None):
+        """Sync opportunities"""
+        try:
+            logger.info("Opportunity sync started.")
+            mapping = self.get_salesforce_mapping(
+                tenant_id=tenant_id, s_object="Opportunity"
+            )
+            tenant = get_tenant_obj_from_id(tenant_id)
+            query = None if job_id else self._get_opportunity_query(tenant_id)
+            for opportunities_list in self.query_batches(query=query, job_id=job_id):
+                # Accounts and contracts of the batch are synced before it
+                required_accounts = set(
+                    account["AccountId"]
+                    for account in opportunities_list
+                    if account["AccountId"]
                 )
-                data = [
-                    {"Id": item.op_external_id, "OP_ExternalKey__c": str(item.id)}
-                    for item in inserted_opportunities
+                contract_list = [
+                    contract["ContractId"]
+                    for contract in opportunities_list
+                    if contract["ContractId"]
                 ]
-                fieldnames = list(mapping["monetizely_field_mapping"].values())
-
-                # Check if 'Id' is already in fieldnames list
-                if "Id" not in fieldnames:
-                    fieldnames.append("Id")
-
-                csv_data = self.convert_json_to_csv(fieldnames=fieldnames, data=data)
-                self.bulk_upsert_data(
-                    s_object="Opportunity",
-                    external_id_field_name="Id",
-                    csv_data=csv_data,
-                )
-            if bulk_opportunity_update_data:
-                opportunities_to_update = []
-                existing_opportunities = Opportunity.objects.filter(
-                    tenant_id=tenant_id,
-                    op_external_id__in=[
-                        data["op_external_id"] for data in bulk_opportunity_update_data
-                    ],
-                )
-
-                for data in bulk_opportunity_update_data:
-                    external_id = data["op_external_id"]
-                    existing_opportunity = existing_opportunities.get(
-                        op_external_id=external_id
+                if contract_list:
+                    self.sync_contract(
+                        tenant_id=tenant_id,
+                        logged_in_user=logged_in_user,
+                        contract_ids=contract_list,
+                        account_ids=required_accounts,
                     )
-                    is_modified = False
-                    if existing_opportunity.updated_on < data["updated_on"]:
-                        for field, value in data.items():
-                            setattr(existing_opportunity, field, value)
-                            is_modified = True
-
-                    if is_modified:
-                        opportunities_to_update.append(existing_opportunity)
-                Opportunity.objects.bulk_update(
-                    opportunities_to_update,
-                    [
-                        field
-                        for field in sf_field_mapping.values()
-                        if field != "op_external_id"
-                    ],
+                else:
+                    self.sync_account(
+                        tenant_id=tenant_id,
+                        logged_in_user=logged_in_user,
+                        account_ids=required_accounts,
+                    )
+                self._upsert_opportunities(
+                    tenant=tenant,
+                    logged_in_user=logged_in_user,
+                    mapping=mapping,
+                    opportunities_list=opportunities_list,
                 )
+
             # Get all the opportunities for which contract ID is null
             existing_opportunities = Opportunity.objects.filter(
                 contract_id__isnull=True, op_external_id__isnull=False
@@ -996,21 +1156,20 @@ class Salesforce:
                         data.append(record_)
                 fieldnames = ["Id", "Contract_ExternalKey__c", "ContractLink__c"]
                 if data:
-                    csv_data = self.convert_json_to_csv(
-                        fieldnames=fieldnames, data=data
-                    )
                     self.bulk_upsert_data(
                         s_object="Opportunity",
                         external_id_field_name="Id",
-                        csv_data=csv_data,
+                        fieldnames=fieldnames,
+                        data=data,
                     )
             logger.info("Opportunities synced successfully!")
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing Opportunity %s", err)
+            self.errors.append(f"Opportunity: {err}")
             logger.info("**************ERROR*************************\n")
 
-    def sync_user_hierarchy(self, tenant_id):
+    def sync_user_hierarchy(self, tenant_id, job_id=None):
         """
         Synchronize user hierarchy for a specific tenant.
 
@@ -1027,16 +1186,14 @@ class Salesforce:
             mapping = self.get_salesforce_mapping(
                 tenant_id=tenant_id, s_object="OrgHierarchy"
             )
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
             sf_field_mapping = mapping["salesforce_field_mapping"]
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
-            query = f"SELECT {', '.join(sf_source_fields)} FROM userrole"
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(job_id=response["id"])
-            hierarchy = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(hierarchy))
-            hierarchy_list = list(reader)
+            tenant = get_tenant_obj_from_id(tenant_id)
+            query = None if job_id else self._get_user_hierarchy_query(tenant_id)
+            hierarchy_list = [
+                record
+                for records in self.query_batches(query=query, job_id=job_id)
+                for record in records
+            ]
 
             org_hierarchy_dict = {}
             org_hierarchy_ids = set()  # These will be used to delete the records
@@ -1154,9 +1311,10 @@ class Salesforce:
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing Org Hierarchy %s", err)
+            self.errors.append(f"Org Hierarchy: {err}")
             logger.info("**************ERROR*************************\n")
 
-    def sync_user_data(self, tenant_id):
+    def sync_user_data(self, tenant_id, job_id=None):
         """
         Synchronize user data for a specific tenant.
 
@@ -1172,17 +1330,14 @@ class Salesforce:
             # Step 1: Fetch user data from Salesforce
             logger.info("User data sync started.")
             mapping = self.get_salesforce_mapping(tenant_id=tenant_id, s_object="User")
-            sf_source_fields = mapping["salesforce_field_mapping"].keys()
             sf_field_mapping = mapping["salesforce_field_mapping"]
-            tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
-            user_role = tuple(mapping["config"])
-            query = f"SELECT {', '.join(sf_source_fields)} FROM User WHERE ProfileID IN {user_role}"
-            payload = {"operation": "query", "query": query}
-            response = self.create_job(operation="query", payload=payload)
-            self.wait_for_batch(job_id=response["id"])
-            user = self.get_results(response["id"])
-            reader = csv.DictReader(io.StringIO(user))
-            user_data_list = list(reader)
+            tenant = get_tenant_obj_from_id(tenant_id)
+            query = None if job_id else self._get_user_query(tenant_id)
+            user_data_list = [
+                record
+                for records in self.query_batches(query=query, job_id=job_id)
+                for record in records
+            ]
 
             # Step 2: Process and update/create User Data objects
             user_dict = {}
@@ -1366,38 +1521,116 @@ class Salesforce:
         except Exception as err:
             logger.info("************ERROR**************************")
             logger.exception("Error while syncing User %s", err)
+            self.errors.append(f"User: {err}")
             logger.info("**************ERROR*************************")
 
-    def start_sync(self, tenant_id, logged_in_user):
-        """Start salesforce sync"""
+    def _get_modified_ids(self, job_id, known_ids):
+        """Ids of the modified records queried by the job which are known"""
+        modified_ids = set()
+        for records in self.query_batches(job_id=job_id):
+            modified_ids.update(
+                record["Id"] for record in records if record["Id"] in known_ids
+            )
+        return modified_ids
+
+    def sync_modified_records(
+        self, tenant_id, logged_in_user, account_job_id=None, contract_job_id=None
+    ):
+        """
+        Sync the already synced accounts and contracts modified since the last
+        sync. Delta syncs of opportunities only reach the accounts and
+        contracts of the modified opportunities.
+        """
+        try:
+            if account_job_id:
+                known_ids = set(
+                    Account.objects.filter(
+                        tenant_id=tenant_id, account_ext_id__isnull=False
+                    ).values_list("account_ext_id", flat=True)
+                )
+                account_ids = self._get_modified_ids(account_job_id, known_ids)
+                logger.info("%s modified accounts to sync.", len(account_ids))
+                self.sync_account(
+                    tenant_id=tenant_id,
+                    logged_in_user=logged_in_user,
+                    account_ids=account_ids,
+                )
+            if contract_job_id:
+                known_ids = set(
+                    Contract.objects.filter(
+                        tenant_id=tenant_id, contract_external_id__isnull=False
+                    ).values_list("contract_external_id", flat=True)
+                )
+                contract_ids = self._get_modified_ids(contract_job_id, known_ids)
+                logger.info("%s modified contracts to sync.", len(contract_ids))
+                if contract_ids:
+                    self.sync_contract(
+                        tenant_id=tenant_id,
+                        logged_in_user=logged_in_user,
+                        contract_ids=contract_ids,
+                        account_ids=set(),
+                    )
+        except Exception as err:
+            logger.info("************ERROR**************************")
+            logger.exception("Error while syncing modified records %s", err)
+            self.errors.append(f"Modified records: {err}")
+            logger.info("**************ERROR*************************\n")
+
+    def start_sync(self, tenant_id, logged_in_user, run_id=None, full_resync=False):
+        """
+        Start salesforce sync, returns the status of the sync. Objects with a
+        watermark are synced by delta unless full_resync is set, the
+        watermarks move to the start of the sync once it had no errors.
+        """
         logger.info("Calling start sync method")
-        job_details = AwsDynamodb.get_item(
-            key={"tenant_id": str(tenant_id)}, table_name="jobs"
-        )
-        logger.info(job_details)
-        if not job_details:
-            logger.info("Creating a job in dynamo db for tenant_id %s", str(tenant_id))
-            AwsDynamodb.add_item(
-                form_data={"tenant_id": str(tenant_id), "completed": False},
-                table_name="jobs",
+        lease_id = salesforce_sync_jobs.acquire(tenant_id, run_id=run_id)
+        if not lease_id:
+            logger.info("Sync is already running for tenant_id %s", str(tenant_id))
+            return SyncStatus.SKIPPED
+
+        self.errors = []
+        self.lookups = None
+        self.field_mappings = {}
+        self.synced_contract_ids = set()
+        try:
+            started_at = now()
+            watermarks = {} if full_resync else self.get_sync_watermarks(tenant_id)
+            logger.info("Sync watermarks of tenant_id %s %s", tenant_id, watermarks)
+            job_ids = self.submit_sync_queries(
+                tenant_id=tenant_id, watermarks=watermarks
             )
-            job_details = AwsDynamodb.get_item(
-                key={"tenant_id": str(tenant_id)}, table_name="jobs"
+            self.sync_user_hierarchy(
+                tenant_id=tenant_id, job_id=job_ids.get("OrgHierarchy")
             )
-        job_status = job_details["completed"]
-        if not job_status:
-            AwsDynamodb.add_item(
-                form_data={"tenant_id": str(tenant_id), "completed": True},
-                table_name="jobs",
+            self.sync_user_data(tenant_id=tenant_id, job_id=job_ids.get("User"))
+            self.sync_opportunity(
+                tenant_id=tenant_id,
+                logged_in_user=logged_in_user,
+                job_id=job_ids.get("Opportunity"),
             )
-            self.sync_user_hierarchy(tenant_id=tenant_id)
-            self.sync_user_data(tenant_id=tenant_id)
-            self.sync_opportunity(tenant_id=tenant_id, logged_in_user=logged_in_user)
-            self.sync_quote(tenant_id=tenant_id, logged_in_user=logged_in_user)
-            AwsDynamodb.add_item(
-                form_data={"tenant_id": str(tenant_id), "completed": False},
-                table_name="jobs",
+            self.sync_modified_records(
+                tenant_id=tenant_id,
+                logged_in_user=logged_in_user,
+                account_job_id=job_ids.get("ModifiedAccount"),
+                contract_job_id=job_ids.get("ModifiedContract"),
             )
+            self.push_contracts(tenant_id=tenant_id)
+            self.sync_quote(
+                tenant_id=tenant_id,
+                logged_in_user=logged_in_user,
+                job_id=job_ids.get("Quote"),
+            )
+            if not self.errors:
+                self.set_sync_watermarks(tenant_id, started_at)
+        except Exception as err:
+            logger.exception("Error while syncing tenant_id %s %s", str(tenant_id), err)
+            self.errors.append(str(err))
+        finally:
+            sync_status = SyncStatus.FAILED if self.errors else SyncStatus.COMPLETED
+            salesforce_sync_jobs.release(
+                tenant_id, lease_id, sync_status, error="; ".join(self.errors)
+            )
+        return sync_status
 
 
 class SalesforceSync(GenericAPIView):
@@ -1412,34 +1645,52 @@ class SalesforceSync(GenericAPIView):
         logger.info("Salesforce sync triggered %s", request.data)
         cron_job = request.query_params.get("job_type")
         logger.info("Cron job param %s", cron_job)
+        # Ignores the sync watermarks and syncs all the records again
+        full_resync = request.query_params.get("full_resync") == "true"
         if not cron_job:
             logger.info("Manual Sync started!")
             tenant_id = get_tenant_id_from_email(request.user[0])
             logged_in_user = User.objects.filter(email=request.user[0]).first()
             config = AwsSecret.get(secret_id=SalesforceSync.secret_id)[str(tenant_id)]
             salesforce = Salesforce(config)
-            salesforce.start_sync(tenant_id=tenant_id, logged_in_user=logged_in_user)
+            salesforce.start_sync(
+                tenant_id=tenant_id,
+                logged_in_user=logged_in_user,
+                full_resync=full_resync,
+            )
             logger.info("Manual Sync was done successfully.")
             return ResponseBuilder.success(
                 data="Job Executed",
                 status_code=status.HTTP_200_OK,
             )
+        elif cron_job == "tenant":
+            tenant_id = request.query_params.get("tenant_id")
+            logged_in_user = User.objects.filter(email=request.user[0]).first()
+            config = AwsSecret.get(secret_id=SalesforceSync.secret_id)[str(tenant_id)]
+            sync_status = SalesforceSyncOrchestrator.sync_tenant(
+                tenant_id,
+                config,
+                logged_in_user,
+                run_id=request.query_params.get("run_id"),
+                full_resync=full_resync,
+            )
+            return ResponseBuilder.success(
+                data={str(tenant_id): sync_status},
+                status_code=status.HTTP_200_OK,
+            )
         else:
             logger.info("Cron job started!")
-            tenants = Tenant.objects.all()
-            for tenant in tenants:
-                logged_in_user = User.objects.filter(email=request.user[0]).first()
-                config = AwsSecret.get(secret_id=SalesforceSync.secret_id).get(
-                    str(tenant.id), ""
-                )
-                if config:
-                    logger.info("Job started for tenant id %s", str(tenant.id))
-                    salesforce = Salesforce(config)
-                    salesforce.start_sync(
-                        tenant_id=tenant.id, logged_in_user=logged_in_user
-                    )
+            logged_in_user = User.objects.filter(email=request.user[0]).first()
+            run_id, statuses = SalesforceSyncOrchestrator(
+                secret_id=SalesforceSync.secret_id
+            ).run(
+                logged_in_user=logged_in_user,
+                resume_failed=request.query_params.get("resume") == "failed",
+                full_resync=full_resync,
+                authorization=request.META.get("HTTP_AUTHORIZATION"),
+            )
             return ResponseBuilder.success(
-                data="Job Executed",
+                data={"run_id": run_id, "tenants": statuses},
                 status_code=status.HTTP_200_OK,
             )
 
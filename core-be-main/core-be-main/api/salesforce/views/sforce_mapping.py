@@ -23,7 +23,11 @@ from api.salesforce.serializers.salesforce_mapping import (
     SalesforceMappingSerializer,
 )
 from api.tenant.models import Tenant
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import SalesforceConfigError
 from api.utils.responses import ResponseBuilder
@@ -150,7 +154,7 @@ class SFMapping(GenericAPIView):
             # Create audit history entry
             try:
                 if request.auth and request.auth[0]:
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
                     new_data = CommonUtils.convert_uuids_to_strings(serializer.data)
 
                     mapping_history_data = {
@@ -218,6 +222,9 @@ class SFMappingDetail(GenericAPIView):
                     new_data_dict[field] = payload[field]
                     previous_data_dict[field] = json.loads(previous_data) if previous_data else None
 
+            if "sf_column_mapping" in payload or "config" in payload:
+                # New columns or filters are backfilled by a full resync
+                sf_mapping.sync_watermark = None
             sf_mapping.save()
 
             serializer = SalesforceMappingSerializer(sf_mapping)
@@ -226,7 +233,7 @@ class SFMappingDetail(GenericAPIView):
             try:
                 if request.auth and request.auth[0]:
                     tenant_id = get_tenant_id_from_email(request.user[0])
-                    tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                    tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                     mapping_history_data = {
                         "admin_user_id": request.auth[1],
@@ -3,7 +3,7 @@ from rest_framework.test import APIClient, APITestCase
 
 from api.product.models import Product
 
-from .constants import PRODUCT_POST_URL, PRODUCT_PUT_URL
+from .constants import PRICING_MODEL_URL, PRODUCT_POST_URL, PRODUCT_PUT_URL
 
 
 class BaseTest(APITestCase):
@@ -21,3 +21,15 @@ class MonetizelyProductAPIClient(BaseTest):
         url = reverse(PRODUCT_PUT_URL, args=[id])
         response = self.client.put(url, payload)
         return response
+
+
+class MonetizelyPricingModelAPIClient(BaseTest):
+    def get_pricing_models(self, package_id):
+        url = reverse(PRICING_MODEL_URL)
+        response = self.client.get(url, {"package_id": package_id})
+        return response
+
+    def get_pricing_model(self, id):
+        url = reverse(PRICING_MODEL_URL, args=[id])
+        response = self.client.get(url)
+        return response
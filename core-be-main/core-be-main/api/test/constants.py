@@ -3,3 +3,4 @@ PRODUCT = {"name": "Dummy Product", "description": "This is a dummy product"}
 # urls
 PRODUCT_POST_URL = "product-crud-list"
 PRODUCT_PUT_URL = "product-crud-detail"
+PRICING_MODEL_URL = "pricing-model"
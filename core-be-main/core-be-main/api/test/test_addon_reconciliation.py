@@ -0,0 +1,190 @@
+import json
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase
+
+from api.package.models import PackageDetail
+from api.pricing import addon_reconciliation
+from api.pricing.addon_reconciliation import (
+    filter_addons,
+    reconcile_pricing_model_details,
+    schedule_addon_reconciliation,
+)
+
+
+class FakeTransaction:
+    """Keeps the on_commit callbacks of an open transaction like a connection"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def on_commit(self, func):
+        self.callbacks.append(func)
+
+    def savepoint(self):
+        return len(self.callbacks)
+
+    def savepoint_rollback(self, sid):
+        del self.callbacks[sid:]
+
+    def commit(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for func in callbacks:
+            func()
+
+    def rollback(self):
+        self.callbacks = []
+
+
+class TestScheduleAddonReconciliation(SimpleTestCase):
+    def setUp(self) -> None:
+        self.transaction = FakeTransaction()
+        patcher = mock.patch.object(
+            addon_reconciliation, "transaction", self.transaction
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(addon_reconciliation, "reconcile_addons")
+        self.reconcile_addons = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(
+            setattr, addon_reconciliation._scheduled, "reconciliation", None
+        )
+
+    def reconciled(self):
+        return {
+            call.args[0]: set(call.kwargs["package_ids"])
+            for call in self.reconcile_addons.call_args_list
+        }
+
+    def test_one_reconciliation_per_transaction(self):
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        schedule_addon_reconciliation("tenant", package_ids=["package-2"])
+        schedule_addon_reconciliation("other", package_ids=["package-3"])
+        self.reconcile_addons.assert_not_called()
+
+        self.transaction.commit()
+        self.assertEqual(self.reconcile_addons.call_count, 2)
+        self.assertEqual(
+            self.reconciled(),
+            {"tenant": {"package-1", "package-2"}, "other": {"package-3"}},
+        )
+
+    def test_next_transaction_is_reconciled_again(self):
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        self.transaction.commit()
+        schedule_addon_reconciliation("tenant", package_ids=["package-2"])
+        self.transaction.commit()
+        calls = self.reconcile_addons.call_args_list
+        self.assertEqual(
+            [call.kwargs["package_ids"] for call in calls],
+            [["package-1"], ["package-2"]],
+        )
+
+    def test_rolled_back_transaction_is_merged_into_the_next(self):
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        self.transaction.rollback()
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        self.transaction.commit()
+        self.assertEqual(self.reconciled(), {"tenant": {"package-1"}})
+
+    def test_rolled_back_savepoint_keeps_the_reconciliation(self):
+        sid = self.transaction.savepoint()
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        self.transaction.savepoint_rollback(sid)
+        schedule_addon_reconciliation("tenant", package_ids=["package-2"])
+        self.transaction.commit()
+        self.reconcile_addons.assert_called_once()
+        self.assertEqual(self.reconciled(), {"tenant": {"package-1", "package-2"}})
+
+    def test_whole_tenant_reconciliation_is_kept(self):
+        schedule_addon_reconciliation("tenant", package_ids=["package-1"])
+        schedule_addon_reconciliation("tenant")
+        schedule_addon_reconciliation("tenant", package_ids=["package-2"])
+        self.transaction.commit()
+        self.reconcile_addons.assert_called_once_with("tenant")
+
+    def test_without_tenant_nothing_is_scheduled(self):
+        schedule_addon_reconciliation(None, package_ids=["package-1"])
+        self.assertEqual(self.transaction.callbacks, [])
+
+    def test_saves_of_a_transaction_are_merged(self):
+        for package in ("package-1", "package-2", "package-1"):
+            post_save.send(
+                sender=PackageDetail,
+                instance=SimpleNamespace(tenant_id_id="tenant", package_id_id=package),
+                created=False,
+            )
+        self.transaction.commit()
+        self.assertEqual(self.reconciled(), {"tenant": {"package-1", "package-2"}})
+
+
+class TestReconcilePricingModelDetails(SimpleTestCase):
+    def setUp(self) -> None:
+        self.feature_ids = [str(uuid.uuid4()) for _ in range(3)]
+        patcher = mock.patch.object(
+            addon_reconciliation,
+            "get_package_addon_ids",
+            return_value={
+                ("package", "tier"): {uuid.UUID(self.feature_ids[0])},
+                ("package", "other-tier"): {
+                    uuid.UUID(feature_id) for feature_id in self.feature_ids
+                },
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pricing_model_detail(self, tier_id):
+        return SimpleNamespace(
+            id=uuid.uuid4(),
+            tenant_id_id="tenant",
+            tier_id_id=tier_id,
+            updated_on="2024-01-01",
+            pricing_model_id=SimpleNamespace(package_id_id="package"),
+            details=json.dumps(
+                {
+                    "core": {},
+                    "addons": [{"id": feature_id} for feature_id in self.feature_ids],
+                }
+            ),
+            save=mock.Mock(),
+        )
+
+    def test_addons_no_longer_in_the_package_detail_are_removed(self):
+        tier_detail = self.pricing_model_detail("tier")
+        other_tier_detail = self.pricing_model_detail("other-tier")
+        no_package_detail = self.pricing_model_detail("new-tier")
+        updated = reconcile_pricing_model_details(
+            "tenant", [tier_detail, other_tier_detail, no_package_detail]
+        )
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            json.loads(tier_detail.details)["addons"], [{"id": self.feature_ids[0]}]
+        )
+        other_tier_detail.save.assert_not_called()
+        no_package_detail.save.assert_not_called()
+
+    def test_addons_of_deleted_features_are_only_filtered(self):
+        addons = [{"id": feature_id} for feature_id in self.feature_ids]
+        addon_features = {
+            uuid.UUID(self.feature_ids[0]): "group",
+            uuid.UUID(self.feature_ids[1]): None,
+        }
+        self.assertEqual(filter_addons(addons, addon_features), addons[:1])
+        self.assertEqual(
+            filter_addons(addons, addon_features, package_addon_ids=set()), []
+        )
+
+    def test_reconciling_again_is_a_no_op(self):
+        pricing_model_detail = self.pricing_model_detail("tier")
+        reconcile_pricing_model_details("tenant", [pricing_model_detail])
+        pricing_model_detail.updated_on = "2024-01-02"
+        pricing_model_detail.save.reset_mock()
+        self.assertEqual(
+            reconcile_pricing_model_details("tenant", [pricing_model_detail]), 0
+        )
+        pricing_model_detail.save.assert_not_called()
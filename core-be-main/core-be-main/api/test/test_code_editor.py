@@ -0,0 +1,94 @@
+import multiprocessing
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.pricing.code_editor import (
+    CodeEditorBudgetExceeded,
+    CodeEditorEngine,
+    CodeEditorPool,
+)
+
+
+class TestCodeEditorEngine(SimpleTestCase):
+    def setUp(self) -> None:
+        self.engine = CodeEditorEngine(max_steps=100000, timeout=1)
+
+    def test_result_is_read_from_the_namespace(self):
+        result = self.engine.execute(
+            "result = sum(row['price'] for row in rows)",
+            {"rows": [{"price": 2}, {"price": 3}]},
+        )
+        self.assertEqual(result, 5)
+
+    def test_string_results_are_parsed_as_literals(self):
+        self.assertEqual(self.engine.execute("result = '5'", {}), 5)
+        self.assertEqual(self.engine.execute("result = '[1, 2.5]'", {}), [1, 2.5])
+        with self.assertRaises(ValueError):
+            self.engine.execute("result = 'abc'", {})
+
+    def test_runaway_formulas_are_interrupted(self):
+        formulas = [
+            "while True: pass",
+            "result = [x for x in range(10 ** 12)]",
+            "def f(n):\n    return f(n + 1) + f(n + 1) if n < 60 else 0\nresult = f(0)",
+            "f = lambda n: f(n + 1) + f(n + 1) if n < 60 else 0\nresult = f(0)",
+        ]
+        for formula in formulas:
+            with self.subTest(formula=formula):
+                with self.assertRaises(CodeEditorBudgetExceeded):
+                    self.engine.execute(formula, {})
+
+    def test_budget_checks_can_not_be_replaced(self):
+        formulas = [
+            "__code_editor_step__ = None\nwhile True: pass",
+            "def f(__code_editor_step__):\n    while True: pass\nf(None)",
+        ]
+        for formula in formulas:
+            with self.subTest(formula=formula):
+                with self.assertRaises(SyntaxError):
+                    self.engine.execute(formula, {})
+
+
+class TestCodeEditorPool(SimpleTestCase):
+    def test_formulas_run_in_thread_when_the_pool_can_not_start(self):
+        pool = CodeEditorPool(size=2)
+        with mock.patch(
+            "api.pricing.code_editor.multiprocessing.get_context",
+            side_effect=OSError(38, "Function not implemented"),
+        ) as get_context:
+            results = pool.execute_many(
+                [("result = x * 2", {"x": 2}), ("result = y", {})]
+            )
+            pool.execute_many([("result = 1", {})])
+
+        self.assertEqual(results, [4, 0])
+        self.assertEqual(get_context.call_count, 1)
+
+    def workers(self, pool, job_id=0, started=0):
+        slots = multiprocessing.Array("d", [1, job_id, started, 0, 0, 0])
+        pool._workers = (mock.Mock(), slots)
+        return pool._workers
+
+    def test_time_waiting_in_the_queue_does_not_count(self):
+        pool = CodeEditorPool(size=1, timeout=0.01, grace=0)
+        workers = self.workers(pool)
+        async_result = mock.Mock()
+        async_result.ready.return_value = False
+        async_result.get.side_effect = [multiprocessing.TimeoutError] * 3 + [5]
+
+        self.assertEqual(pool._wait(workers, 1, async_result), 5)
+        workers[0].terminate.assert_not_called()
+        self.assertIs(pool._workers, workers)
+
+    def test_job_running_past_its_deadline_restarts_the_pool(self):
+        pool = CodeEditorPool(size=1, timeout=0.01, grace=0)
+        workers = self.workers(pool, job_id=1, started=time.monotonic() - 1)
+        async_result = mock.Mock()
+        async_result.ready.return_value = False
+        async_result.get.side_effect = multiprocessing.TimeoutError
+
+        self.assertEqual(pool._wait(workers, 1, async_result), 0)
+        workers[0].terminate.assert_called_once_with()
+        self.assertIsNone(pool._workers)
@@ -0,0 +1,209 @@
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.contract.views import contract as contract_views
+from api.contract.views.contract import ContractViewSet
+from api.utils.template import contract_batch
+from api.utils.template.contract_batch import ContractBatchItem, ContractBatchPipeline
+
+MISSING_TEMPLATE_URL = "s3://bucket/missing.docx"
+
+
+def download_file(url, path):
+    if url == MISSING_TEMPLATE_URL:
+        raise FileNotFoundError(f"{url} does not exist")
+    with open(path, "wb") as file:
+        file.write(b"template")
+
+
+def place_data_in_docx(template_path, docx_path, data_dict, placeholders=None):
+    if data_dict.get("fail"):
+        raise ValueError("Rendering failed")
+    with open(docx_path, "wb") as file:
+        file.write(b"contract")
+    return {"signer": 1}
+
+
+def convert_docx_to_local_pdf(docx_path, timeout=None):
+    return True, "Conversion successful", docx_path.replace(".docx", ".pdf")
+
+
+class ContractBatchTestMixin:
+    def setUp(self) -> None:
+        converter = mock.Mock()
+        converter.return_value.convert_docx_to_local_pdf.side_effect = (
+            convert_docx_to_local_pdf
+        )
+        converter.upload_pdf.side_effect = (
+            lambda pdf_file_path, docx_path, output_s3_path: (
+                f"{output_s3_path}/{os.path.basename(pdf_file_path)}"
+            )
+        )
+        for target, attribute, new in [
+            (contract_batch.S3Service, "download_file_obj_from_s3", download_file),
+            (
+                contract_batch.DocumentProcessor,
+                "place_data_in_docx",
+                place_data_in_docx,
+            ),
+            (contract_batch, "DocxToPdfConverter", converter),
+        ]:
+            patcher = mock.patch.object(target, attribute, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(contract_batch, "ProcessPoolExecutor")
+        self.process_pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestContractBatchPipeline(ContractBatchTestMixin, SimpleTestCase):
+    @staticmethod
+    def item(name, template_s3_url="s3://bucket/template.docx", **data_dict):
+        return ContractBatchItem(
+            template_s3_url, f"contracts/{name}", data_dict, f"contract-{name}"
+        )
+
+    def test_contracts_are_rendered_in_threads_by_default(self):
+        items = ContractBatchPipeline().run(
+            [
+                self.item("1"),
+                self.item("2"),
+                self.item("3", MISSING_TEMPLATE_URL),
+                self.item("4", fail=True),
+            ]
+        )
+        self.process_pool.assert_not_called()
+        self.assertEqual([item.success for item in items], [True, True, False, False])
+        self.assertEqual(items[0].output_path, "contracts/1/contract-1.pdf")
+        self.assertEqual(items[0].signature_count, {"signer": 1})
+        self.assertIn("does not exist", items[2].message)
+        self.assertEqual(items[3].message, "Rendering failed")
+
+    def test_unavailable_process_pool_falls_back_to_threads(self):
+        # AWS Lambda has no /dev/shm for the semaphores of the pool
+        self.process_pool.side_effect = OSError(38, "Function not implemented")
+        items = ContractBatchPipeline(render_pool="process").run(
+            [self.item("1"), self.item("2")]
+        )
+        self.process_pool.assert_called_once()
+        self.assertEqual([item.success for item in items], [True, True])
+
+    def test_broken_process_pool_fails_the_items(self):
+        self.process_pool.return_value.submit.side_effect = BrokenProcessPool(
+            "A child process terminated abruptly"
+        )
+        items = ContractBatchPipeline(render_pool="process").run(
+            [self.item("1"), self.item("2", MISSING_TEMPLATE_URL)]
+        )
+        self.assertEqual([item.success for item in items], [False, False])
+        self.assertEqual(items[0].message, "A child process terminated abruptly")
+        self.assertIn("does not exist", items[1].message)
+        self.process_pool.return_value.shutdown.assert_called_once_with(wait=True)
+
+    def test_items_not_converted_within_the_timeout_fail(self):
+        items = ContractBatchPipeline(timeout=0).run([self.item("1"), self.item("2")])
+        self.assertEqual([item.success for item in items], [False, False])
+        self.assertEqual(items[0].message, "Contract generation timed out")
+        contract_batch.DocxToPdfConverter.assert_not_called()
+
+
+class TestContractBatchCreate(ContractBatchTestMixin, SimpleTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.saved = []
+
+        def prepare_contract(
+            tenant_id, quote_id, contract_template_id, contract_number=None
+        ):
+            if quote_id == "unknown":
+                raise ValueError("Quote not found")
+            return {
+                "contract_number": contract_number,
+                "cached_contract": None,
+                "template_s3_url": f"s3://bucket/{contract_template_id}.docx",
+                "output_dir": f"contracts/{quote_id}",
+                "quote_data": {"fail": quote_id == "broken"},
+                "template_filename": f"contract-{quote_id}",
+            }
+
+        def save_contract(tenant_id, quote_id, job, output_path, signature_count):
+            self.saved.append((quote_id, job["contract_number"], output_path))
+            return SimpleNamespace(quote_id=quote_id, s3_file_path=output_path)
+
+        for attribute, new in [
+            ("prepare_contract", prepare_contract),
+            ("save_contract", save_contract),
+            ("generate_contract_number", lambda tenant_id: "C_000007"),
+            ("get_compiled_template", lambda job: None),
+            ("contract_response_data", lambda contract: vars(contract)),
+        ]:
+            patcher = mock.patch.object(ContractViewSet, attribute, staticmethod(new))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            contract_views, "get_tenant_id_from_email", return_value="tenant"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def batch_create(self, contracts):
+        request = APIRequestFactory().post(
+            "/contract/batch", {"contracts": contracts}, format="json"
+        )
+        force_authenticate(request, user=["dummy@example.com"])
+        return ContractViewSet.as_view({"post": "batch_create"})(request)
+
+    @mock.patch.object(contract_views, "CONTRACT_BATCH_MAX_ITEMS", 6)
+    def test_results_are_returned_per_contract(self):
+        response = self.batch_create(
+            [
+                {"quote_id": "q1", "contract_template_id": "t1"},
+                {"quote_id": "q2", "contract_template_id": "t1"},
+                {"quote_id": "q1", "contract_template_id": "t1"},
+                {"quote_id": "unknown", "contract_template_id": "t1"},
+                {"quote_id": "broken", "contract_template_id": "t1"},
+                {"quote_id": "q3", "contract_template_id": "missing"},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.process_pool.assert_not_called()
+        results = json.loads(response.content)["data"]
+        self.assertEqual(
+            [result["success"] for result in results],
+            [True, True, False, False, False, False],
+        )
+        self.assertEqual(
+            [result["message"] for result in results[2:5]],
+            ["Quote is repeated in the batch", "Quote not found", "Rendering failed"],
+        )
+        self.assertEqual(
+            results[0]["contract"],
+            {"quote_id": "q1", "s3_file_path": "contracts/q1/contract-q1.pdf"},
+        )
+        # New contracts of the batch get consecutive numbers
+        self.assertEqual(
+            [(quote_id, number) for quote_id, number, _ in self.saved],
+            [("q1", "C_000007"), ("q2", "C_000008")],
+        )
+
+    def test_empty_batch_is_rejected(self):
+        response = self.batch_create([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @mock.patch.object(contract_views, "CONTRACT_BATCH_MAX_ITEMS", 2)
+    def test_batch_above_the_limit_is_rejected(self):
+        response = self.batch_create(
+            [
+                {"quote_id": quote_id, "contract_template_id": "t1"}
+                for quote_id in ("q1", "q2", "q3")
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.saved, [])
@@ -0,0 +1,84 @@
+import csv
+import io
+
+from django.test import SimpleTestCase
+
+from api.utils.salesforce.csv_chunks import CsvChunk, iter_csv_chunks
+
+
+class TestCsvChunks(SimpleTestCase):
+    fieldnames = ["Id", "Name"]
+
+    def setUp(self) -> None:
+        self.rows = [{"Id": f"id-{i:03}", "Name": f"name {i:03}"} for i in range(50)]
+        self.header_size = len("Id,Name\r\n")
+        self.row_size = len("id-000,name 000\r\n")
+
+    @staticmethod
+    def read_content(content):
+        return list(csv.DictReader(io.StringIO(content.decode("utf-8"))))
+
+    def read(self, chunk):
+        return self.read_content(b"".join(chunk))
+
+    def test_chunk_holds_all_rows_below_max_size(self):
+        chunk = CsvChunk(self.fieldnames, self.rows, write_size=100)
+        self.assertIsNone(chunk.row_count)
+        self.assertEqual(self.read(chunk), self.rows)
+        self.assertEqual(chunk.row_count, len(self.rows))
+
+    def test_chunks_split_at_row_boundaries(self):
+        # Room for the header and three rows of the first ten
+        max_size = self.header_size + 3 * self.row_size
+        sent = []
+        for chunk in iter_csv_chunks(self.fieldnames, self.rows[:10], max_size):
+            content = b"".join(chunk)
+            self.assertLessEqual(len(content), max_size)
+            self.assertTrue(content.startswith(b"Id,Name\r\n"))
+            sent.append(self.read_content(content))
+        self.assertEqual([len(rows) for rows in sent], [3, 3, 3, 1])
+        self.assertEqual([row for rows in sent for row in rows], self.rows[:10])
+
+    def test_oversized_row_gets_a_chunk_of_its_own(self):
+        rows = [
+            {"Id": "id-1", "Name": "small"},
+            {"Id": "id-2", "Name": "x" * 500},
+            {"Id": "id-3", "Name": "small"},
+        ]
+        chunks = [
+            self.read(chunk)
+            for chunk in iter_csv_chunks(self.fieldnames, rows, max_size=100)
+        ]
+        self.assertEqual(chunks, [[row] for row in rows])
+
+    def test_chunk_is_replayed_on_retry(self):
+        max_size = self.header_size + 4 * self.row_size
+        chunks = iter_csv_chunks(self.fieldnames, self.rows, max_size)
+        chunk = next(chunks)
+        # A failed upload stops reading the body half way
+        chunk.write_size = 1
+        partial = iter(chunk)
+        next(partial)
+        partial.close()
+        self.assertIsNone(chunk.stop)
+
+        first_try = b"".join(chunk)
+        self.assertEqual(chunk.row_count, 4)
+        self.assertEqual(b"".join(chunk), first_try)
+        self.assertEqual(chunk.row_count, 4)
+        self.assertEqual(next(chunks).start, 4)
+
+    def test_chunk_which_was_not_sent_is_skipped(self):
+        max_size = self.header_size + 4 * self.row_size
+        chunks = iter_csv_chunks(self.fieldnames, self.rows, max_size)
+        skipped = next(chunks)
+        sent = next(chunks)
+        self.assertEqual(skipped.row_count, 4)
+        self.assertEqual(sent.start, 4)
+        self.assertEqual(self.read(sent), self.rows[4:8])
+        self.assertEqual(
+            [chunk.start for chunk in chunks], list(range(8, len(self.rows), 4))
+        )
+
+    def test_no_rows_no_chunks(self):
+        self.assertEqual(list(iter_csv_chunks(self.fieldnames, [])), [])
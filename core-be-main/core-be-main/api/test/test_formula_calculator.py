@@ -0,0 +1,184 @@
+import json
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from api.pricing.details_cache import PricingDetailsCache
+from api.pricing.formula_calculator import FormulaCalculator
+from api.pricing.range_index import IndexedRows
+from api.utils.custom_exception_handler import MetricLimitException
+
+CODE_EDITOR_FORMULA = """
+metric_key = 'units'
+result = 0
+for row in rows:
+    if row['units']['low'] <= units['units'] <= row['units']['high']:
+        result = row['price'] * units['units'] + base
+"""
+
+
+class TestCalculateMany(SimpleTestCase):
+    metric_key = "units"
+
+    def setUp(self) -> None:
+        self.rows = [
+            {"units": {"low": 1, "high": 10}, "price": 5, "fee": 2},
+            {"units": {"low": 10, "high": 100}, "price": 4, "fee": 1},
+            {"units": {"low": 101, "high": 1000}, "price": 3.5, "fee": 0},
+        ]
+        self.quantities = [1, 5, 10, 11, 100, 101, 999, 1000]
+
+    @staticmethod
+    def lookup_column(key, formula):
+        return {"key": key, "formula": formula, "is_output_column": True}
+
+    @staticmethod
+    def code_editor_column(key, formula, **kwargs):
+        return {
+            "key": key,
+            "advance_formula": formula,
+            "is_code_editor": True,
+            **kwargs,
+        }
+
+    def assert_same_as_calculate(self, columns, quantities=None, **kwargs):
+        quantities = self.quantities if quantities is None else quantities
+        expected = [
+            FormulaCalculator.calculate(
+                columns, self.rows, {self.metric_key: quantity}, **kwargs
+            )
+            for quantity in quantities
+        ]
+        for rows in (self.rows, IndexedRows(self.rows, [self.metric_key])):
+            self.assertEqual(
+                FormulaCalculator.calculate_many(
+                    columns, rows, self.metric_key, quantities, **kwargs
+                ),
+                expected,
+            )
+
+    def test_lookup_columns(self):
+        self.assert_same_as_calculate(
+            [
+                self.lookup_column("price", "lookup($units){$price * $units}"),
+                self.lookup_column("fee", "lookup($units){$fee + $units / 10}"),
+            ]
+        )
+
+    def test_lookup_columns_with_discounted_units(self):
+        self.assert_same_as_calculate(
+            [self.lookup_column("price", "lookup($units){$price * $units}")],
+            discounted_units={"price": 2},
+        )
+
+    def test_lookup_of_another_metric_is_zero(self):
+        self.assert_same_as_calculate(
+            [self.lookup_column("seats", "lookup($seats){$price * $seats}")]
+        )
+
+    def test_code_editor_columns_with_intermediate_columns(self):
+        self.assert_same_as_calculate(
+            [
+                self.code_editor_column(
+                    "base",
+                    "result = units['units'] * 2",
+                    is_intermediate_column=True,
+                ),
+                self.code_editor_column(
+                    "total", CODE_EDITOR_FORMULA, is_output_column=True
+                ),
+            ]
+        )
+
+    def test_code_editor_columns_with_discounted_units_fall_back(self):
+        self.assert_same_as_calculate(
+            [
+                self.code_editor_column(
+                    "total",
+                    CODE_EDITOR_FORMULA.replace(" + base", ""),
+                    is_output_column=True,
+                ),
+            ],
+            discounted_units={"price": 2},
+        )
+
+    def test_intermediate_and_lookup_columns_fall_back(self):
+        self.assert_same_as_calculate(
+            [
+                {
+                    "key": "unused",
+                    "formula": "lookup($units){$fee}",
+                    "is_intermediate_column": True,
+                },
+                self.lookup_column("price", "lookup($units){$price * $units}"),
+            ]
+        )
+
+    def test_curve_quantities_out_of_range_are_zero(self):
+        self.assert_same_as_calculate(
+            [self.lookup_column("price", "lookup($units){$price * $units}")],
+            quantities=[0, 5, 1001, 5000],
+            is_curve=True,
+        )
+
+    def test_quantities_out_of_range_raise(self):
+        columns = [self.lookup_column("price", "lookup($units){$price * $units}")]
+        with self.assertRaises(MetricLimitException):
+            FormulaCalculator.calculate(columns, self.rows, {self.metric_key: 5000})
+        with self.assertRaises(MetricLimitException):
+            FormulaCalculator.calculate_many(
+                columns, self.rows, self.metric_key, [5, 5000]
+            )
+
+
+class TestCodeEditorRowsAreNotShared(SimpleTestCase):
+    mutating_formula = """
+metric_key = 'units'
+rows[0]['price'] = 100
+rows.append({'price': 0})
+result = rows[0]['price'] * 5
+"""
+
+    def setUp(self) -> None:
+        self.details_cache = PricingDetailsCache()
+        self.pricing_model_detail = SimpleNamespace(
+            tenant_id_id="tenant",
+            id="detail",
+            updated_on="2024-01-01",
+            details=json.dumps(
+                {
+                    "core": {
+                        "columns": [
+                            {"key": "units", "is_metric_column": True},
+                            {
+                                "key": "total",
+                                "is_output_column": True,
+                                "is_code_editor": True,
+                                "advance_formula": self.mutating_formula,
+                            },
+                        ],
+                        "values": [
+                            {"units": {"low": 1, "high": 100}, "price": 5},
+                        ],
+                    },
+                    "addons": [],
+                }
+            ),
+        )
+
+    def get_core(self):
+        return self.details_cache.get(self.pricing_model_detail)["core"]
+
+    def test_mutating_formula_leaves_the_cache_unchanged(self):
+        cached_values = json.loads(json.dumps(self.get_core()["values"]))
+        for _ in range(2):
+            core = self.get_core()
+            output = FormulaCalculator.calculate(
+                core["columns"], core["values"], {"units": 10}
+            )
+            self.assertEqual(output["total"], 500)
+            outputs = FormulaCalculator.calculate_many(
+                core["columns"], core["values"], "units", [10, 20]
+            )
+            self.assertEqual([output["total"] for output in outputs], [500, 500])
+        self.assertEqual(self.get_core()["values"], cached_values)
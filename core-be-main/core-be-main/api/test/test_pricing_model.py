@@ -0,0 +1,121 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.feature_repository.models import Feature, FeatureRepository
+from api.package.models import Package
+from api.plan.models import Plan, Tier
+from api.pricing.models import PricingModel, PricingModelDetails
+from api.product.models import Product
+from api.tenant.models import Tenant
+from api.test.conftest import MonetizelyPricingModelAPIClient
+from api.user.models import User
+
+
+class TestPricingModelViews(MonetizelyPricingModelAPIClient):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tenant = Tenant.objects.create(name="Dummy Tenant")
+        self.user = User.objects.create(
+            name="Dummy User", email="dummy@example.com", tenant_id=self.tenant
+        )
+        self.client.force_authenticate(user=[self.user.email])
+
+        product = Product.objects.create(name="Dummy Product", tenant_id=self.tenant)
+        repository = FeatureRepository.objects.create(
+            name="Dummy Repository", product_id=product, tenant_id=self.tenant
+        )
+        self.feature = Feature.objects.create(
+            name="Dummy Addon", feature_repository_id=repository, tenant_id=self.tenant
+        )
+        self.deleted_feature = Feature.objects.create(
+            name="Deleted Addon",
+            feature_repository_id=repository,
+            tenant_id=self.tenant,
+            is_deleted=True,
+        )
+        plan = Plan.objects.create(
+            name="Dummy Plan", feature_repository_id=repository, tenant_id=self.tenant
+        )
+        self.tiers = [
+            Tier.objects.create(name=name, plan_id=plan, tenant_id=self.tenant)
+            for name in ["Basic", "Pro", "Enterprise"]
+        ]
+        self.package = Package.objects.create(
+            name="Dummy Package", plan_id=plan, tenant_id=self.tenant
+        )
+
+    def create_pricing_model(self, name):
+        pricing_model = PricingModel.objects.create(
+            name=name, package_id=self.package, tenant_id=self.tenant
+        )
+        for tier in self.tiers:
+            PricingModelDetails.objects.create(
+                pricing_model_id=pricing_model,
+                tier_id=tier,
+                details=json.dumps(
+                    {
+                        "core": {},
+                        "addons": [
+                            {"id": str(self.feature.id)},
+                            {"id": str(self.deleted_feature.id)},
+                        ],
+                    }
+                ),
+                tenant_id=self.tenant,
+            )
+        return pricing_model
+
+    def get_pricing_models_with_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_pricing_models(self.package.id)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"], len(queries)
+
+    def test_query_count_does_not_grow_with_pricing_models(self):
+        self.create_pricing_model("Pricing Model 1")
+        _, single_model_query_count = self.get_pricing_models_with_query_count()
+
+        for index in range(2, 6):
+            self.create_pricing_model(f"Pricing Model {index}")
+        data, query_count = self.get_pricing_models_with_query_count()
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(query_count, single_model_query_count)
+
+    def test_deleted_addons_are_filtered(self):
+        self.create_pricing_model("Pricing Model 1")
+        data, _ = self.get_pricing_models_with_query_count()
+
+        self.assertEqual(len(data[0]["details"]), len(self.tiers))
+        for tier_details in data[0]["details"]:
+            self.assertEqual(
+                tier_details["details"]["addons"], [{"id": str(self.feature.id)}]
+            )
+
+    def test_detail_get_does_not_write_pricing_model_details(self):
+        pricing_model = self.create_pricing_model("Pricing Model 1")
+        stored_details = dict(
+            PricingModelDetails.objects.filter(
+                pricing_model_id=pricing_model
+            ).values_list("id", "details")
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_pricing_model(pricing_model.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("UPDATE")]
+        )
+        self.assertEqual(
+            dict(
+                PricingModelDetails.objects.filter(
+                    pricing_model_id=pricing_model
+                ).values_list("id", "details")
+            ),
+            stored_details,
+        )
+        for tier_details in response.json()["data"]["details"]:
+            self.assertEqual(tier_details["details"]["addons"], [])
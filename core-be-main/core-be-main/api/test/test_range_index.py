@@ -0,0 +1,66 @@
+import random
+
+from django.test import SimpleTestCase
+
+from api.pricing.range_index import RangeIndex
+
+
+def linear_scan(rows, quantity, metric_key):
+    """Row lookup as done before indexing, the first matching row wins"""
+    if rows and isinstance(rows[0].get(metric_key), dict):
+        for index, row in enumerate(rows):
+            if row[metric_key]["low"] <= quantity <= row[metric_key]["high"]:
+                return index
+        return None
+    for index, row in enumerate(rows):
+        if row.get(metric_key) and quantity > int(row.get(metric_key)):
+            continue
+        return index
+    return None
+
+
+class TestRangeIndex(SimpleTestCase):
+    metric_key = "units"
+
+    def assert_matches_linear_scan(self, rows, quantities):
+        range_index = RangeIndex(rows, self.metric_key)
+        expected = [linear_scan(rows, q, self.metric_key) for q in quantities]
+        self.assertEqual([range_index.lookup(q) for q in quantities], expected)
+        self.assertEqual(
+            list(range_index.lookup_many(quantities)),
+            [-1 if index is None else index for index in expected],
+        )
+
+    def range_rows(self, bounds):
+        return [{self.metric_key: {"low": low, "high": high}} for low, high in bounds]
+
+    def test_touching_ranges_return_the_first_row(self):
+        rows = self.range_rows([(1, 10), (10, 20)])
+        self.assertEqual(RangeIndex(rows, self.metric_key).lookup(10), 0)
+        self.assert_matches_linear_scan(rows, [0, 1, 5, 10, 10.5, 20, 21])
+
+    def test_overlapping_and_unsorted_ranges(self):
+        rows = self.range_rows([(50, 100), (1, 60), (5, 10), (1, 1000)])
+        self.assert_matches_linear_scan(rows, [0, 1, 5, 7.5, 10, 55, 60, 61, 1000])
+
+    def test_random_ranges(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            bounds = []
+            for _ in range(rng.randint(1, 8)):
+                low = rng.randint(0, 30)
+                bounds.append((low, low + rng.randint(0, 15)))
+            quantities = [rng.randint(-2, 50) for _ in range(30)] + [
+                rng.uniform(-2, 50) for _ in range(10)
+            ]
+            self.assert_matches_linear_scan(self.range_rows(bounds), quantities)
+
+    def test_random_upto_thresholds(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            rows = [
+                {self.metric_key: str(rng.randint(1, 40)) if rng.random() > 0.1 else ""}
+                for _ in range(rng.randint(1, 8))
+            ]
+            quantities = [rng.randint(0, 50) for _ in range(30)]
+            self.assert_matches_linear_scan(rows, quantities)
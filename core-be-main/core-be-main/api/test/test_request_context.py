@@ -0,0 +1,84 @@
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import models
+from django.test import SimpleTestCase
+
+from api.tenant.models import Tenant
+from api.user.models import User
+from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.utils.request_context import RequestContext
+
+
+class TestRequestContext(SimpleTestCase):
+    cached_values = {
+        "email": "dummy@example.com",
+        "user_id": "user",
+        "tenant_id": "tenant",
+        "roles": ("Deal Desk",),
+    }
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(User, "objects")
+        self.objects = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queryset = self.objects.filter.return_value.select_related.return_value
+        self.queryset.first.side_effect = lambda: SimpleNamespace(
+            id="user",
+            tenant_id=SimpleNamespace(id="tenant", is_deleted=False),
+        )
+
+    def test_user_is_loaded_once_per_request(self):
+        first_request = RequestContext(**self.cached_values)
+        second_request = RequestContext(**self.cached_values)
+        self.objects.filter.assert_not_called()
+
+        self.assertIs(first_request.user, first_request.user)
+        self.assertIs(first_request.tenant, first_request.user.tenant_id)
+        self.assertEqual(self.queryset.first.call_count, 1)
+        self.assertIsNot(second_request.user, first_request.user)
+        self.assertEqual(self.queryset.first.call_count, 2)
+        self.objects.filter.assert_called_with(id="user", is_deleted=False)
+
+    def test_deleted_or_moved_tenant_is_not_returned(self):
+        for tenant in [
+            SimpleNamespace(id="tenant", is_deleted=True),
+            SimpleNamespace(id="other", is_deleted=False),
+        ]:
+            self.queryset.first.side_effect = lambda: SimpleNamespace(
+                id="user", tenant_id=tenant
+            )
+            self.assertIsNone(RequestContext(**self.cached_values).tenant)
+
+    def test_context_without_user_does_not_query(self):
+        context = RequestContext(email="dummy@example.com")
+        self.assertIsNone(context.user)
+        self.assertIsNone(context.tenant)
+        self.objects.filter.assert_not_called()
+
+    def set_request(self, context):
+        thread = threading.current_thread()
+        thread.request = SimpleNamespace(
+            request_context=context, user=[context.email]
+        )
+        self.addCleanup(delattr, thread, "request")
+
+    def test_helpers_read_the_request_context(self):
+        context = RequestContext(**self.cached_values)
+        self.set_request(context)
+        self.assertEqual(get_tenant_id_from_email("dummy@example.com"), "tenant")
+        self.objects.filter.assert_not_called()
+        self.assertIs(get_user_obj_from_email("dummy@example.com"), context.user)
+        self.assertEqual(self.queryset.first.call_count, 1)
+
+    def test_save_sets_the_user_by_id(self):
+        self.set_request(RequestContext(**self.cached_values))
+        tenant = Tenant(name="Dummy Tenant")
+        with mock.patch.object(models.Model, "save") as save:
+            tenant.save()
+        save.assert_called_once_with()
+        self.assertEqual(
+            (tenant.created_by_id, tenant.updated_by_id), ("user", "user")
+        )
+        self.objects.filter.assert_not_called()
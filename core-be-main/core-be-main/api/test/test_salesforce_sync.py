@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.salesforce.views import salesforce_sync
+from api.salesforce.views.salesforce_sync import Salesforce
+
+WATERMARK = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestSyncWatermarks(SimpleTestCase):
+    def setUp(self) -> None:
+        # Without logging in to Salesforce
+        self.salesforce = Salesforce.__new__(Salesforce)
+        self.salesforce.errors = []
+        self.salesforce.submit_query = mock.Mock(
+            side_effect=lambda query: f"job-{len(self.queries())}"
+        )
+        self.salesforce.wait_for_jobs = mock.Mock()
+        self.salesforce.get_salesforce_mapping = mock.Mock(
+            return_value={
+                "salesforce_field_mapping": {"Id": "external_id"},
+                "config": [{"CreatedDate": "2024-01-01"}],
+            }
+        )
+
+    def queries(self):
+        return [call.args[0] for call in self.salesforce.submit_query.call_args_list]
+
+    def get_sync_watermarks(self, stored):
+        with mock.patch.object(
+            salesforce_sync, "SalesforceMappingModel"
+        ) as mapping_model:
+            mapping_model.objects.filter.return_value.values_list.return_value = (
+                list(stored.items())
+            )
+            return self.salesforce.get_sync_watermarks("tenant")
+
+    def test_watermarks_of_all_delta_objects_are_returned(self):
+        stored = {s_object: WATERMARK for s_object in Salesforce.DELTA_SYNC_OBJECTS}
+        self.assertEqual(self.get_sync_watermarks(stored), stored)
+
+    def test_missing_watermark_falls_back_to_a_full_sync(self):
+        for missing in Salesforce.DELTA_SYNC_OBJECTS:
+            stored = {
+                s_object: WATERMARK
+                for s_object in Salesforce.DELTA_SYNC_OBJECTS
+                if s_object != missing
+            }
+            self.assertEqual(self.get_sync_watermarks(stored), {})
+
+    def test_full_sync_queries_all_opportunities(self):
+        job_ids = self.salesforce.submit_sync_queries("tenant", watermarks={})
+        self.assertNotIn("ModifiedAccount", job_ids)
+        self.assertNotIn("ModifiedContract", job_ids)
+        opportunity_query = self.queries()[list(job_ids).index("Opportunity")]
+        self.assertNotIn("SystemModstamp", opportunity_query)
+
+    def test_delta_sync_queries_modified_records(self):
+        job_ids = self.salesforce.submit_sync_queries(
+            "tenant",
+            watermarks={
+                s_object: WATERMARK for s_object in Salesforce.DELTA_SYNC_OBJECTS
+            },
+        )
+        queries = dict(zip(job_ids, self.queries()))
+        # Records modified shortly before the watermark are queried again
+        self.assertIn("SystemModstamp > 2024-05-01T11:", queries["Opportunity"])
+        self.assertIn("FROM Account WHERE SystemModstamp", queries["ModifiedAccount"])
+        self.assertIn(
+            "FROM Contract WHERE SystemModstamp", queries["ModifiedContract"]
+        )
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase
+
+from api.salesforce import sync_jobs, sync_orchestrator
+from api.salesforce.sync_jobs import SalesforceSyncJobs, SyncStatus
+from api.salesforce.sync_orchestrator import SalesforceSyncOrchestrator
+
+CONDITION_FAILED = ClientError(
+    {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+)
+
+
+class TestSalesforceSyncJobs(SimpleTestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(sync_jobs.AwsDynamodb, "update_item")
+        self.update_item = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.jobs = SalesforceSyncJobs()
+
+    def form_data(self, index=-1):
+        return self.update_item.call_args_list[index].kwargs["form_data"]
+
+    def test_release_frees_the_slot_of_its_lease(self):
+        lease_id = self.jobs.acquire("tenant", run_id="run")
+        values = self.form_data()["ExpressionAttributeValues"]
+        self.assertEqual(values[":run_id"], "run")
+        self.jobs.release("tenant", lease_id, SyncStatus.COMPLETED)
+        form_data = self.form_data()
+        self.assertEqual(
+            form_data["ConditionExpression"], "contains(lease_ids, :lease_id)"
+        )
+        self.assertIn("running = running - :one", form_data["UpdateExpression"])
+        self.assertEqual(
+            form_data["ExpressionAttributeValues"][":lease_ids"], {lease_id}
+        )
+
+    def test_every_acquire_gets_a_lease_of_its_own(self):
+        self.assertNotEqual(
+            self.jobs.acquire("tenant", run_id="run"),
+            self.jobs.acquire("tenant", run_id="run"),
+        )
+
+    def test_taking_over_replaces_the_leases(self):
+        self.update_item.side_effect = [CONDITION_FAILED, None]
+        lease_id = self.jobs.acquire("tenant")
+        self.assertIsNotNone(lease_id)
+        form_data = self.form_data()
+        self.assertEqual(form_data["ConditionExpression"], "lease_expires_at < :now")
+        self.assertIn("lease_ids = :lease_ids", form_data["UpdateExpression"])
+
+    def test_no_free_slot(self):
+        self.update_item.side_effect = CONDITION_FAILED
+        self.assertIsNone(self.jobs.acquire("tenant"))
+
+    def test_release_of_a_taken_over_lease_changes_nothing(self):
+        self.update_item.side_effect = CONDITION_FAILED
+        self.jobs.release("tenant", "stale-lease", SyncStatus.FAILED, error="Timeout")
+        self.update_item.assert_called_once()
+
+
+class TestSalesforceSyncOrchestrator(SimpleTestCase):
+    def test_skipped_tenant_keeps_its_status(self):
+        orchestrator = SalesforceSyncOrchestrator("secret", max_workers=2)
+        with mock.patch.object(
+            orchestrator,
+            "get_tenant_configs",
+            return_value={"tenant": "config", "other": "config"},
+        ), mock.patch.object(
+            orchestrator,
+            "sync_tenant",
+            side_effect=lambda tenant_id, *args, **kwargs: (
+                SyncStatus.SKIPPED if tenant_id == "tenant" else SyncStatus.COMPLETED
+            ),
+        ), mock.patch.object(
+            sync_orchestrator, "salesforce_sync_jobs"
+        ) as salesforce_sync_jobs:
+            _, statuses = orchestrator.run("dummy@example.com")
+        self.assertEqual(
+            statuses, {"tenant": SyncStatus.SKIPPED, "other": SyncStatus.COMPLETED}
+        )
+        salesforce_sync_jobs.set_status.assert_not_called()
@@ -1,10 +1,11 @@
 from api.tenant.models import Tenant
-from api.user.models import User
+from api.user.models import User, UserRoleMapping
 from api.utils.custom_exception_handler import (
     TenantDoesNotExistsException,
     UserDoesNotExistsException,
 )
 from api.utils.logger import logger
+from api.utils.request_context import get_request_context
 from math import ceil
 
 
@@ -16,6 +17,9 @@ class TrieNode:
 
 
 def get_tenant_id_from_email(email):
+    context = get_request_context(email)
+    if context and context.tenant_id:
+        return context.tenant_id
     user_obj = User.objects.filter(email=email, is_deleted=False)
     if not user_obj:
         logger.error(f"user not found for - {email}")
@@ -28,6 +32,9 @@ def get_tenant_id_from_email(email):
 
 
 def get_user_obj_from_email(email):
+    context = get_request_context(email)
+    if context and context.user:
+        return context.user
     user_obj = User.objects.filter(email=email, is_deleted=False)
     if not user_obj:
         logger.error(f"user not found for - {email}")
@@ -35,6 +42,25 @@ def get_user_obj_from_email(email):
     return user_obj[0]
 
 
+def get_user_role_names(email):
+    context = get_request_context(email)
+    if context and context.user_id:
+        return context.roles
+    user_obj = get_user_obj_from_email(email)
+    return list(
+        UserRoleMapping.objects.filter(
+            user_id=user_obj.id, is_deleted=False
+        ).values_list("user_role_id__name", flat=True)
+    )
+
+
+def get_tenant_obj_from_id(tenant_id):
+    context = get_request_context()
+    if context and str(context.tenant_id) == str(tenant_id) and context.tenant:
+        return context.tenant
+    return Tenant.objects.get(id=tenant_id, is_deleted=False)
+
+
 def generate_unique_common_difference_numbers(start, end):
     if end - start >= 100:
         numbers = 100
@@ -8,14 +8,13 @@ from rest_framework import parsers, status
 from rest_framework.generics import GenericAPIView
 
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
 from api.user.models import OrgHierarchy
 from api.user.models import User
 from api.user.serializers import (
     OrgHierarchyCreateSerializer,
     OrgHierarchyUpdateSerializer,
 )
-from api.user.utils import TrieNode, get_tenant_id_from_email
+from api.user.utils import TrieNode, get_tenant_id_from_email, get_tenant_obj_from_id
 from api.utils.custom_exception_handler import FileNotFoundException
 from api.utils.responses import ResponseBuilder
 
@@ -172,7 +171,7 @@ class OrgHierarchyFromCSVView(GenericAPIView):
     def put(self, request):
         """Create or update OrgHierarchy objects from a CSV file."""
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
         csv_file = request.FILES.get("file")
         if not csv_file:
             raise FileNotFoundException("No file uploaded.")
@@ -14,14 +14,17 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.viewsets import ModelViewSet
 
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
 from api.user.models import User, UserRole, UserRoleMapping, UserHistory
 from api.user.serializers import (
     UserCreateCSVSerializer,
     UserCreateSerializer,
     UserSerializer,
 )
-from api.user.utils import get_tenant_id_from_email, get_user_obj_from_email
+from api.user.utils import (
+    get_tenant_id_from_email,
+    get_user_obj_from_email,
+    get_tenant_obj_from_id,
+)
 from api.utils.aws_utils.aws_user_management import AwsUserManagement
 from api.utils.common.common_utils import CommonUtils
 from api.utils.custom_exception_handler import UserCreationFailedException, FileNotFoundException
@@ -128,7 +131,7 @@ class UserViewSet(ModelViewSet):
                 try:
                     if request.auth and request.auth[0]:
                         tenant_id = get_tenant_id_from_email(request.user[0])
-                        tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                        tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                         user_history_data = {
                             "admin_user_id": request.auth[1],
@@ -222,7 +225,7 @@ class UserViewSet(ModelViewSet):
                 try:
                     if request.auth and request.auth[0]:
                         tenant_id = get_tenant_id_from_email(request.user[0])
-                        tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                        tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                         user_history_data = {
                             "admin_user_id": request.auth[1],
@@ -301,7 +304,7 @@ class UserViewSet(ModelViewSet):
         try:
             if request.auth and request.auth[0]:
                 tenant_id = get_tenant_id_from_email(request.user[0])
-                tenant_obj = Tenant.objects.get(id=tenant_id, is_deleted=False)
+                tenant_obj = get_tenant_obj_from_id(tenant_id)
 
                 user_history_data = {
                     "admin_user_id": request.auth[1],
@@ -421,7 +424,7 @@ class UserFromCSVView(GenericAPIView):
         """Create or update User objects from a CSV file."""
         tenant_id = get_tenant_id_from_email(request.user[0])
         user_id = get_user_obj_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
         csv_file = request.FILES.get("file")
         if not csv_file:
             raise FileNotFoundException("No file uploaded.")
@@ -2,9 +2,9 @@ from rest_framework import status
 from rest_framework.views import APIView
 
 from api.auth.authentication import CognitoAuthentication
-from api.user.models import UserSettings, UserRoleMapping
+from api.user.models import UserSettings
 from api.user.serializers import UserSettingSerializer
-from api.user.utils import get_user_obj_from_email
+from api.user.utils import get_user_obj_from_email, get_user_role_names
 from api.utils.responses import ResponseBuilder
 
 
@@ -28,8 +28,7 @@ class UserProfileView(APIView):
         if user_setting_obj:
             response['is_staff_access'] = user_setting_obj.value
 
-        user_role_map = UserRoleMapping.objects.filter(user_id=user_obj.id, is_deleted=False)
-        response['roles'] = [user_role.user_role_id.name for user_role in user_role_map]
+        response['roles'] = list(get_user_role_names(request.user[0]))
 
         return ResponseBuilder.success(
             data=response,
@@ -8,10 +8,9 @@ from rest_framework.generics import GenericAPIView
 from django.db.models import F
 
 from api.auth.authentication import CognitoAuthentication
-from api.tenant.models import Tenant
 from api.user.models import UserRole
 from api.user.serializers import UserRoleCreateSerializer, UserRoleSerializer
-from api.user.utils import get_tenant_id_from_email
+from api.user.utils import get_tenant_id_from_email, get_tenant_obj_from_id
 from api.utils.custom_exception_handler import FileNotFoundException, \
     UserRoleDoesNotExistsException
 from api.utils.responses import ResponseBuilder
@@ -107,7 +106,7 @@ class UserRoleFromCSVView(GenericAPIView):
     def put(self, request):
         """Create or update UserRole objects from a CSV file."""
         tenant_id = get_tenant_id_from_email(request.user[0])
-        tenant = Tenant.objects.get(id=tenant_id, is_deleted=False)
+        tenant = get_tenant_obj_from_id(tenant_id)
         csv_file = request.FILES.get("file")
         if not csv_file:
             raise FileNotFoundException("No file uploaded.")
@@ -83,6 +83,16 @@ class S3Service:
         except Exception as e:
             raise e
 
+    @staticmethod
+    def get_object_etag(file_path):
+        """The ETag of an object, it changes whenever the object is replaced"""
+        s3_client = boto3.client("s3")
+        try:
+            response = s3_client.head_object(Bucket=S3Service.BUCKET, Key=file_path)
+            return response["ETag"].strip('"')
+        except ClientError as e:
+            raise e
+
     @staticmethod
     def upload_file_to_s3(file_obj, file_path):
         s3_client = boto3.client("s3")
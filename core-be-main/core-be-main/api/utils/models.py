@@ -2,6 +2,8 @@ import uuid
 import threading
 from django.db import models
 
+from api.utils.request_context import get_request_context
+
 
 class AbstractModel(models.Model):
     id = models.UUIDField(
@@ -30,14 +32,20 @@ class AbstractModel(models.Model):
             if request and hasattr(request, 'user') and request.user:
                 try:
                     user_email = request.user[0]
-                    user = User.objects.get(email=user_email, is_deleted=False)
+                    context = get_request_context(user_email)
+                    if context:
+                        user_id = context.user_id
+                    else:
+                        user_id = User.objects.get(
+                            email=user_email, is_deleted=False
+                        ).id
                 except User.DoesNotExist:
-                    user = None
+                    user_id = None
                 except Exception as e:
-                    user = None
-                if not self.created_by:
-                    self.created_by = user
-                self.updated_by = user
+                    user_id = None
+                if not self.created_by_id:
+                    self.created_by_id = user_id
+                self.updated_by_id = user_id
 
         super().save(*args, **kwargs)
 
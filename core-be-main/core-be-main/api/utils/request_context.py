@@ -0,0 +1,57 @@
+import threading
+
+
+class RequestContext:
+    """
+    User id, tenant id and roles of the authenticated request. Resolved once
+    by CognitoAuthentication and read by the helpers and models which would
+    otherwise look them up again.
+
+    Only plain values are shared between requests, the user and tenant
+    instances are loaded once for the request which reads them.
+    """
+
+    def __init__(self, email, user_id=None, tenant_id=None, roles=()):
+        self.email = email
+        self.user_id = user_id
+        self.tenant_id = tenant_id
+        self.roles = list(roles)
+        self._user = None
+        self._user_loaded = False
+
+    @property
+    def user(self):
+        if not self._user_loaded:
+            from api.user.models import User
+
+            if self.user_id:
+                self._user = (
+                    User.objects.filter(id=self.user_id, is_deleted=False)
+                    .select_related("tenant_id")
+                    .first()
+                )
+            self._user_loaded = True
+        return self._user
+
+    @property
+    def tenant(self):
+        if not self.tenant_id or not self.user:
+            return None
+        tenant = self.user.tenant_id
+        if tenant is None or tenant.id != self.tenant_id or tenant.is_deleted:
+            return None
+        return tenant
+
+
+def set_request_context(request, context):
+    # DRF requests wrap the HttpRequest which RequestMiddleware keeps on the thread
+    getattr(request, "_request", request).request_context = context
+
+
+def get_request_context(email=None):
+    """The context of the current request, if given only when it is for the email"""
+    request = getattr(threading.current_thread(), "request", None)
+    context = getattr(request, "request_context", None)
+    if context and (email is None or context.email == email):
+        return context
+    return None
@@ -0,0 +1,92 @@
+import csv
+import io
+import os
+
+# Salesforce rejects ingest uploads above 150MB, it recommends at most 100MB
+# of CSV data per job as the upload is base64 encoded on its side
+SALESFORCE_INGEST_MAX_BYTES = int(
+    os.getenv("SALESFORCE_INGEST_MAX_BYTES", default=100 * 1024 * 1024)
+)
+# Encoded rows are sent in writes of about this size
+SALESFORCE_INGEST_WRITE_SIZE = 64 * 1024
+
+
+class CsvChunk:
+    """
+    Part of a CSV upload of at most max_size bytes, starting at a row.
+
+    Iterating the chunk encodes the header and its rows on the fly, so an
+    upload with the chunk as its body is streamed. The rows of the chunk are
+    known once it was iterated completely, iterating it again replays the same
+    rows, e.g. when the upload is retried.
+    """
+
+    def __init__(
+        self,
+        fieldnames,
+        rows,
+        start=0,
+        max_size=SALESFORCE_INGEST_MAX_BYTES,
+        write_size=SALESFORCE_INGEST_WRITE_SIZE,
+    ):
+        self.fieldnames = fieldnames
+        self.rows = rows
+        self.start = start
+        self.stop = None
+        self.max_size = max_size
+        self.write_size = write_size
+
+    @property
+    def row_count(self):
+        return None if self.stop is None else self.stop - self.start
+
+    def __iter__(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames)
+
+        def pop_encoded():
+            line = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writeheader()
+        pending = [pop_encoded()]
+        size = pending_size = len(pending[0])
+        stop = len(self.rows) if self.stop is None else self.stop
+        index = self.start
+        while index < stop:
+            writer.writerow(self.rows[index])
+            line = pop_encoded()
+            if self.stop is None and index > self.start:
+                if size + len(line) > self.max_size:
+                    break
+            pending.append(line)
+            size += len(line)
+            pending_size += len(line)
+            index += 1
+            if pending_size >= self.write_size:
+                yield b"".join(pending)
+                pending = []
+                pending_size = 0
+        if pending:
+            yield b"".join(pending)
+        self.stop = index
+
+
+def iter_csv_chunks(fieldnames, rows, max_size=SALESFORCE_INGEST_MAX_BYTES):
+    """
+    Splits the rows into CSV chunks of at most max_size bytes. A chunk ends
+    once it was iterated, e.g. by uploading it, so the next chunk is only
+    yielded after that. A single row above max_size gets a chunk of its own.
+    """
+    rows = list(rows)
+    start = 0
+    while start < len(rows):
+        chunk = CsvChunk(fieldnames, rows, start=start, max_size=max_size)
+        yield chunk
+        if chunk.stop is None:
+            # The chunk was not sent, its rows are still skipped
+            for _ in chunk:
+                pass
+        start = chunk.stop
@@ -0,0 +1,105 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.utils.logger import logger
+
+SALESFORCE_JOB_POLL_INTERVAL = float(
+    os.getenv("SALESFORCE_JOB_POLL_INTERVAL", default=1)
+)
+SALESFORCE_JOB_POLL_MAX_INTERVAL = float(
+    os.getenv("SALESFORCE_JOB_POLL_MAX_INTERVAL", default=30)
+)
+SALESFORCE_JOB_TIMEOUT = float(os.getenv("SALESFORCE_JOB_TIMEOUT", default=600))
+SALESFORCE_JOB_POLL_WORKERS = int(os.getenv("SALESFORCE_JOB_POLL_WORKERS", default=4))
+
+
+class SalesforceJobError(Exception):
+    def __init__(self, job_id, state, message):
+        super().__init__(message)
+        self.job_id = job_id
+        self.state = state
+
+
+class BulkJobPoller:
+    """
+    Waits for Salesforce bulk API jobs to complete.
+
+    Every job is polled on its own exponential backoff and the status calls of
+    the jobs due in a round run concurrently. A job which ends as Failed or
+    Aborted, or is still running at the deadline, raises SalesforceJobError.
+    """
+
+    COMPLETE_STATE = "JobComplete"
+    FAILED_STATES = ("Failed", "Aborted")
+
+    def __init__(
+        self,
+        interval=SALESFORCE_JOB_POLL_INTERVAL,
+        max_interval=SALESFORCE_JOB_POLL_MAX_INTERVAL,
+        timeout=SALESFORCE_JOB_TIMEOUT,
+        max_workers=SALESFORCE_JOB_POLL_WORKERS,
+    ):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def _check_status(self, job_id, status):
+        """Returns True once the job completed"""
+        state = status.get("state")
+        if state == self.COMPLETE_STATE:
+            return True
+        if state in self.FAILED_STATES:
+            raise SalesforceJobError(
+                job_id,
+                state,
+                f"Salesforce job {job_id} {state}: {status.get('errorMessage')}",
+            )
+        return False
+
+    def wait(self, job_id, get_job_status, timeout=None):
+        """Waits for a job and returns its final status"""
+        return self.wait_many([job_id], get_job_status, timeout=timeout)[job_id]
+
+    def wait_many(self, job_ids, get_job_status, timeout=None):
+        """Waits for all the jobs and returns their final status by job id"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        intervals = {job_id: self.interval for job_id in job_ids}
+        next_polls = {job_id: time.monotonic() for job_id in job_ids}
+        statuses = {}
+
+        with ThreadPoolExecutor(
+            max_workers=max(min(self.max_workers, len(next_polls)), 1)
+        ) as executor:
+            while next_polls:
+                polled_at = time.monotonic()
+                due = [job_id for job_id, at in next_polls.items() if at <= polled_at]
+                for job_id, status in zip(due, executor.map(get_job_status, due)):
+                    if self._check_status(job_id, status):
+                        statuses[job_id] = status
+                        del next_polls[job_id]
+                        continue
+                    next_polls[job_id] = polled_at + intervals[job_id]
+                    intervals[job_id] = min(intervals[job_id] * 2, self.max_interval)
+
+                if not next_polls:
+                    break
+                if time.monotonic() >= deadline:
+                    job_id = next(iter(next_polls))
+                    raise SalesforceJobError(
+                        job_id,
+                        None,
+                        f"Salesforce jobs {list(next_polls)} did not complete "
+                        f"within {timeout or self.timeout}s",
+                    )
+                logger.info(
+                    "!!! Waiting for jobs to be completed %s !!!", list(next_polls)
+                )
+                time.sleep(
+                    max(min(min(next_polls.values()), deadline) - time.monotonic(), 0)
+                )
+        return statuses
+
+
+bulk_job_poller = BulkJobPoller()
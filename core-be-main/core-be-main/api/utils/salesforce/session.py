@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.utils.logger import logger
+
+SALESFORCE_LOGIN_URL = os.getenv(
+    "SALESFORCE_LOGIN_URL", default="https://login.salesforce.com/services/oauth2/token"
+)
+SALESFORCE_POOL_SIZE = int(os.getenv("SALESFORCE_POOL_SIZE", default=10))
+SALESFORCE_MAX_RETRIES = int(os.getenv("SALESFORCE_MAX_RETRIES", default=3))
+SALESFORCE_RETRY_BACKOFF = float(os.getenv("SALESFORCE_RETRY_BACKOFF", default=0.5))
+# Salesforce does not return the lifetime of password flow tokens, expired
+# tokens are refreshed on the first 401 in any case
+SALESFORCE_TOKEN_TTL = int(os.getenv("SALESFORCE_TOKEN_TTL", default=1800))
+SALESFORCE_REQUEST_TIMEOUT = int(os.getenv("SALESFORCE_REQUEST_TIMEOUT", default=10))
+
+
+def create_salesforce_session(
+    pool_size=SALESFORCE_POOL_SIZE,
+    max_retries=SALESFORCE_MAX_RETRIES,
+    backoff_factor=SALESFORCE_RETRY_BACKOFF,
+):
+    """
+    Session keeping the connections to Salesforce alive between calls.
+    Throttled and failed idempotent requests are retried with backoff, job
+    creation (POST) is never retried as it would create a duplicate job.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "PUT", "PATCH", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+salesforce_session = create_salesforce_session()
+
+
+class SalesforceTokenCache:
+    """
+    Per-process cache of Salesforce access tokens by tenant config.
+
+    Tokens are reused until SALESFORCE_TOKEN_TTL passes or a request with the
+    token is rejected with 401, after which the next call logs in again.
+    """
+
+    def __init__(self, ttl=SALESFORCE_TOKEN_TTL):
+        self.ttl = ttl
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(config):
+        return config.get("url"), config.get("client_id"), config.get("username")
+
+    @staticmethod
+    def login(config):
+        """Get a new access token with the password flow"""
+        logger.info("Generating Access token for accessing salesforce API")
+        response = salesforce_session.post(
+            SALESFORCE_LOGIN_URL,
+            data={
+                "grant_type": "password",
+                "client_id": config.get("client_id"),
+                "client_secret": config.get("client_secret"),
+                "username": config.get("username"),
+                "password": config.get("password"),
+            },
+            timeout=SALESFORCE_REQUEST_TIMEOUT,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Error while getting tokens: {response.text}")
+        logger.info("!!! Access token generated successfully !!!")
+        return response.json()["access_token"]
+
+    def get_token(self, config, refresh=False):
+        key = self.get_key(config)
+        with self._lock:
+            entry = self._tokens.get(key)
+        if entry and not refresh and entry[1] > time.monotonic():
+            return entry[0]
+
+        access_token = self.login(config)
+        with self._lock:
+            self._tokens[key] = (access_token, time.monotonic() + self.ttl)
+        return access_token
+
+    def invalidate(self, config):
+        with self._lock:
+            self._tokens.pop(self.get_key(config), None)
+
+
+salesforce_token_cache = SalesforceTokenCache()
+
+
+def salesforce_request(config, method, url, headers=None, **kwargs):
+    """
+    Send an authorized request to Salesforce over the pooled session. A 401
+    refreshes the access token of the config and the request is sent once
+    more, so the body must not be a one-shot iterator.
+    """
+    kwargs.setdefault("timeout", SALESFORCE_REQUEST_TIMEOUT)
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    for refresh in (False, True):
+        access_token = salesforce_token_cache.get_token(config, refresh=refresh)
+        response = salesforce_session.request(
+            method,
+            url,
+            headers={**headers, "Authorization": "Bearer " + access_token},
+            **kwargs,
+        )
+        if response.status_code != 401 or refresh:
+            return response
+        logger.info("Salesforce access token was rejected, refreshing it")
+        response.close()
@@ -0,0 +1,242 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from api.utils.aws_utils.s3 import S3Service
+from api.utils.logger import logger
+from api.utils.template.doctopdf import DocumentProcessor, DocxToPdfConverter
+from api.utils.template.soffice_pool import LIBREOFFICE_POOL_SIZE
+
+CONTRACT_BATCH_RENDER_WORKERS = int(
+    os.getenv("CONTRACT_BATCH_RENDER_WORKERS", default=2)
+)
+# Contracts are rendered by threads, "process" renders them in worker
+# processes where the platform supports it, AWS Lambda has no /dev/shm for them
+CONTRACT_BATCH_RENDER_POOL = os.getenv("CONTRACT_BATCH_RENDER_POOL", default="thread")
+# Conversions are handed to the warm LibreOffice instances, more threads than
+# instances only queue up in the pool
+CONTRACT_BATCH_CONVERT_WORKERS = int(
+    os.getenv("CONTRACT_BATCH_CONVERT_WORKERS", default=LIBREOFFICE_POOL_SIZE)
+)
+CONTRACT_BATCH_UPLOAD_WORKERS = int(
+    os.getenv("CONTRACT_BATCH_UPLOAD_WORKERS", default=8)
+)
+# A batch is generated within the request, API Gateway gives up on it after 29s
+CONTRACT_BATCH_TIMEOUT = float(os.getenv("CONTRACT_BATCH_TIMEOUT", default=25))
+# Seconds a warm LibreOffice instance takes to convert a contract
+CONTRACT_BATCH_CONVERT_SECONDS = float(
+    os.getenv("CONTRACT_BATCH_CONVERT_SECONDS", default=5)
+)
+# As many contracts as the conversion threads get through within the timeout
+CONTRACT_BATCH_MAX_ITEMS = int(
+    os.getenv(
+        "CONTRACT_BATCH_MAX_ITEMS",
+        default=max(CONTRACT_BATCH_CONVERT_WORKERS, 1)
+        * max(int(CONTRACT_BATCH_TIMEOUT // CONTRACT_BATCH_CONVERT_SECONDS), 1),
+    )
+)
+
+
+class ContractBatchItem:
+    """A contract of a batch, holds the status of its generation"""
+
+    def __init__(
+        self,
+        template_s3_url,
+        output_s3_path,
+        data_dict,
+        file_name,
+        compiled_template=None,
+    ):
+        self.template_s3_url = template_s3_url
+        self.output_s3_path = output_s3_path
+        self.data_dict = data_dict
+        self.file_name = file_name
+        self.compiled_template = compiled_template
+        self.success = False
+        self.message = None
+        self.output_path = None
+        self.signature_count = {}
+
+    def fail(self, message):
+        self.success = False
+        self.message = message
+
+
+class ContractBatchPipeline:
+    """
+    Generates the contracts of a batch as a pipeline.
+
+    Every distinct template is downloaded once, compiled templates are not
+    downloaded and not scanned for placeholders. The contracts are rendered by
+    a pool of worker threads, or processes when render_pool is "process", a
+    rendered contract goes straight to the conversion threads and its PDF to
+    the upload threads, so the stages overlap. An item which fails does not
+    stop the others, its status is kept on the item. Conversions get the time
+    left of the timeout of the run, an item not converted by then fails.
+    """
+
+    def __init__(
+        self,
+        render_workers=CONTRACT_BATCH_RENDER_WORKERS,
+        convert_workers=CONTRACT_BATCH_CONVERT_WORKERS,
+        upload_workers=CONTRACT_BATCH_UPLOAD_WORKERS,
+        render_pool=CONTRACT_BATCH_RENDER_POOL,
+        timeout=CONTRACT_BATCH_TIMEOUT,
+    ):
+        self.render_workers = max(render_workers, 1)
+        self.convert_workers = max(convert_workers, 1)
+        self.upload_workers = max(upload_workers, 1)
+        self.render_pool = render_pool
+        self.timeout = timeout
+
+    def download_templates(
+        self, workspace, template_s3_urls, compiled_templates=None
+    ):
+        """
+        Downloads the templates, returns the local path and error by URL.
+        Compiled templates by URL are written from their content.
+        """
+        compiled_templates = compiled_templates or {}
+        template_dir = os.path.join(workspace, "templates")
+        os.makedirs(template_dir, exist_ok=True)
+        urls = sorted(set(template_s3_urls))
+        with ThreadPoolExecutor(
+            max_workers=min(self.upload_workers, len(urls) or 1)
+        ) as executor:
+            futures = {}
+            for index, url in enumerate(urls):
+                path = os.path.join(template_dir, f"{index}.docx")
+                if url in compiled_templates:
+                    futures[url] = executor.submit(compiled_templates[url].write, path)
+                else:
+                    futures[url] = executor.submit(
+                        S3Service.download_file_obj_from_s3, url, path
+                    )
+        paths = {}
+        errors = {}
+        for index, url in enumerate(urls):
+            try:
+                futures[url].result()
+                paths[url] = os.path.join(template_dir, f"{index}.docx")
+            except Exception as e:
+                logger.error(f"Downloading template {url} failed: {str(e)}")
+                errors[url] = str(e)
+        return paths, errors
+
+    @staticmethod
+    def _upload(item, pdf_file_path, docx_path):
+        try:
+            item.output_path = DocxToPdfConverter.upload_pdf(
+                pdf_file_path, docx_path, item.output_s3_path
+            )
+            item.success = True
+            item.message = "Conversion successful"
+        except Exception as e:
+            logger.error(f"Uploading {pdf_file_path} failed: {str(e)}")
+            item.fail(str(e))
+
+    def _convert(self, item, docx_path, upload_executor, deadline):
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            item.fail("Contract generation timed out")
+            return
+        converter = DocxToPdfConverter(
+            output_dir=os.path.join(os.path.dirname(docx_path), "pdf")
+        )
+        success, message, pdf_file_path = converter.convert_docx_to_local_pdf(
+            docx_path, timeout=timeout
+        )
+        if not success:
+            item.fail(message)
+            return
+        upload_executor.submit(self._upload, item, pdf_file_path, docx_path)
+
+    def _rendered(
+        self, item, docx_path, convert_executor, upload_executor, deadline, future
+    ):
+        try:
+            item.signature_count = future.result()
+        except Exception as e:
+            logger.error(f"Rendering {docx_path} failed: {str(e)}")
+            item.fail(str(e))
+            return
+        convert_executor.submit(
+            self._convert, item, docx_path, upload_executor, deadline
+        )
+
+    def _get_render_executor(self, max_workers):
+        if self.render_pool == "process":
+            try:
+                return ProcessPoolExecutor(max_workers=max_workers)
+            except (ImportError, OSError, NotImplementedError) as e:
+                logger.warning(
+                    f"Process pool unavailable, rendering in threads: {str(e)}"
+                )
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    def run(self, items):
+        """Generates the contracts of the items and sets their status"""
+        if not items:
+            return items
+        deadline = time.monotonic() + self.timeout
+        workspace = tempfile.mkdtemp(prefix="contract-batch-")
+        try:
+            templates, errors = self.download_templates(
+                workspace,
+                [item.template_s3_url for item in items],
+                {
+                    item.template_s3_url: item.compiled_template
+                    for item in items
+                    if item.compiled_template
+                },
+            )
+            render_executor = self._get_render_executor(
+                min(self.render_workers, len(items))
+            )
+            convert_executor = ThreadPoolExecutor(max_workers=self.convert_workers)
+            upload_executor = ThreadPoolExecutor(max_workers=self.upload_workers)
+            try:
+                for index, item in enumerate(items):
+                    if item.template_s3_url not in templates:
+                        item.fail(errors[item.template_s3_url])
+                        continue
+                    item_dir = os.path.join(workspace, str(index))
+                    docx_path = os.path.join(item_dir, f"{item.file_name}.docx")
+                    try:
+                        os.makedirs(item_dir)
+                        future = render_executor.submit(
+                            DocumentProcessor.place_data_in_docx,
+                            templates[item.template_s3_url],
+                            docx_path,
+                            item.data_dict,
+                            item.compiled_template.placeholders
+                            if item.compiled_template
+                            else None,
+                        )
+                    except Exception as e:
+                        # e.g. a process pool which broke down
+                        logger.error(f"Rendering {docx_path} failed: {str(e)}")
+                        item.fail(str(e))
+                        continue
+                    future.add_done_callback(
+                        partial(
+                            self._rendered,
+                            item,
+                            docx_path,
+                            convert_executor,
+                            upload_executor,
+                            deadline,
+                        )
+                    )
+            finally:
+                # Every stage feeds the next one, they are drained in order
+                render_executor.shutdown(wait=True)
+                convert_executor.shutdown(wait=True)
+                upload_executor.shutdown(wait=True)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        return items
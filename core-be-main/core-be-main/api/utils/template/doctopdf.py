@@ -1,9 +1,13 @@
+import fcntl
+import io
 import os
 import re
 import shutil
 import subprocess
 import tarfile
-from io import BytesIO
+import tempfile
+import threading
+import time
 
 import brotli
 import docx2txt
@@ -11,130 +15,196 @@ from docxtpl import DocxTemplate
 
 from api.utils.aws_utils.s3 import S3Service
 from api.utils.logger import logger
+from api.utils.template.soffice_pool import (
+    LIBREOFFICE_CONVERT_TIMEOUT,
+    LIBREOFFICE_POOL_ENABLED,
+    get_soffice_pool,
+)
+
+
+class BrotliReader(io.RawIOBase):
+    """Readable stream decompressing a Brotli file block by block"""
+
+    def __init__(self, file, block_size=1024 * 1024):
+        self.file = file
+        self.block_size = block_size
+        self.decompressor = brotli.Decompressor()
+        self.buffer = b""
+        self.offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self.offset == len(self.buffer):
+            block = self.file.read(self.block_size)
+            if not block:
+                return 0
+            self.buffer = memoryview(self.decompressor.process(block))
+            self.offset = 0
+        size = min(len(b), len(self.buffer) - self.offset)
+        b[:size] = self.buffer[self.offset : self.offset + size]
+        self.offset += size
+        return size
 
 
 class DocxToPdfConverter:
-    def __init__(self):
+    LIBREOFFICE_ARCHIVE = "/opt/lo.tar.br"
+
+    def __init__(self, output_dir=None):
         self.libreoffice_path = None
         self.libreoffice_install_dir = "/tmp/libre"
-        self.output_dir = "/tmp/output_dir"
+        # A directory of its own is created for the conversion when not given
+        self.output_dir = output_dir
+
+    @property
+    def libreoffice_marker(self):
+        """Written once LibreOffice was extracted completely"""
+        return os.path.join(self.libreoffice_install_dir, ".extracted")
+
+    def extract_libreoffice(self):
+        """
+        Extract the LibreOffice archive, streaming the decompressed tar into
+        its members without holding the archive in memory
+        """
+        logger.info(
+            "Extracting tar stream to {} for caching".format(
+                self.libreoffice_install_dir
+            )
+        )
+        # Left over from an extraction which did not finish
+        shutil.rmtree(self.libreoffice_install_dir, ignore_errors=True)
+        with open(self.LIBREOFFICE_ARCHIVE, "rb") as brotli_file:
+            reader = io.BufferedReader(BrotliReader(brotli_file), 1024 * 1024)
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                tar.extractall(self.libreoffice_install_dir)
+        with open(self.libreoffice_marker, "w"):
+            pass
+        logger.info("Done caching LibreOffice!")
 
     def load_libreoffice(self):
         """
         Load LibreOffice or use a cached copy if available.
         """
-        if os.path.exists(self.libreoffice_install_dir) and os.path.isdir(
-                self.libreoffice_install_dir
-        ):
+        if os.path.exists(self.libreoffice_marker):
             logger.info("Using cached copy of LibreOffice")
         else:
             logger.info(
                 "No cached copy of LibreOffice exists, extracting tar stream from Brotli file."
             )
-            buffer = BytesIO()
-            file_path = "/opt/lo.tar.br"
-            with open(file_path, "rb") as brotli_file:
-                decompressor = brotli.Decompressor()
-                while True:
-                    chunk = brotli_file.read(1024)
-                    buffer.write(decompressor.process(chunk))
-                    if len(chunk) < 1024:
-                        break
-                buffer.seek(0)
-
-            logger.info(
-                "Extracting tar stream to {} for caching".format(
-                    self.libreoffice_install_dir
-                )
-            )
-            with tarfile.open(fileobj=buffer) as tar:
-                tar.extractall(self.libreoffice_install_dir)
-            logger.info("Done caching LibreOffice!")
+            # Concurrent requests wait for the one extracting LibreOffice
+            with open(f"{self.libreoffice_install_dir}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if not os.path.exists(self.libreoffice_marker):
+                        self.extract_libreoffice()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
 
         self.libreoffice_path = os.path.join(
             self.libreoffice_install_dir, "instdir", "program", "soffice.bin"
         )
         logger.info(f'{self.libreoffice_path = }')
 
-    def convert_docx_to_pdf(self, input_docx_path, output_s3_path):
+    def get_libreoffice_env(self):
+        """Environment variables for running LibreOffice"""
+        font_config_file = os.path.join(
+            self.libreoffice_install_dir,
+            "instdir",
+            "share",
+            "fonts",
+            "truetype",
+            "fc_local.conf",
+        )
+        font_config_path = os.path.join(
+            self.libreoffice_install_dir,
+            "instdir",
+            "share",
+            "fonts",
+            "truetype",
+        )
+
+        env = os.environ.copy()
+        env["SAL_USE_VCLPLUGIN"] = "gen"
+        env["OOO_FORCE_DESKTOP"] = "headless"
+        env["FONTCONFIG_FILE"] = font_config_file
+        env["FONTCONFIG_PATH"] = font_config_path
+        return env
+
+    def run_conversion(
+        self, input_docx_path, env, timeout=LIBREOFFICE_CONVERT_TIMEOUT
+    ):
         """
-        Convert a DOCX file to PDF and upload the resulting PDF to an S3 bucket.
+        Convert with a warm LibreOffice instance of the process pool, or with
+        a LibreOffice process of its own when the pool is disabled
+        """
+        if LIBREOFFICE_POOL_ENABLED == "true":
+            get_soffice_pool(self.libreoffice_path, env).convert(
+                input_docx_path, self.output_dir, timeout=timeout
+            )
+            return
+        command = [
+            self.libreoffice_path,
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            self.output_dir,
+            input_docx_path,
+        ]
+        subprocess.run(command, env=env, timeout=timeout)
+
+    def convert_docx_to_local_pdf(self, input_docx_path, timeout=None):
+        """
+        Convert a DOCX file to a PDF file in the output directory.
 
         Args:
             input_docx_path (str): The local path to the input DOCX file.
-            output_s3_path (str): The S3 bucket path where the PDF should be uploaded.
+            timeout (float): Seconds the conversion and its retry may take in
+                all. Each attempt may take LIBREOFFICE_CONVERT_TIMEOUT if None.
 
         Returns:
             tuple: A tuple containing a boolean indicating the success of the conversion, a message string,
-                   and the S3 key for the uploaded PDF (if successful). If the conversion fails, the S3 key is None.
+                   and the local path of the PDF (if successful). If the conversion fails, the path is None.
         """
         self.load_libreoffice()
         try:
             if os.path.exists(self.libreoffice_path):
                 # Set up environment variables for LibreOffice
-                font_config_file = os.path.join(
-                    self.libreoffice_install_dir,
-                    "instdir",
-                    "share",
-                    "fonts",
-                    "truetype",
-                    "fc_local.conf",
-                )
-                font_config_path = os.path.join(
-                    self.libreoffice_install_dir,
-                    "instdir",
-                    "share",
-                    "fonts",
-                    "truetype",
-                )
-
-                env = os.environ.copy()
-                env["SAL_USE_VCLPLUGIN"] = "gen"
-                env["OOO_FORCE_DESKTOP"] = "headless"
-                env["FONTCONFIG_FILE"] = font_config_file
-                env["FONTCONFIG_PATH"] = font_config_path
+                env = self.get_libreoffice_env()
 
                 # Create a temporary directory for output PDF
+                if self.output_dir is None:
+                    self.output_dir = tempfile.mkdtemp(prefix="docx-to-pdf-")
                 os.makedirs(self.output_dir, exist_ok=True)
+                # LibreOffice names the PDF after the DOCX file
+                pdf_file_path = os.path.join(
+                    self.output_dir,
+                    os.path.splitext(os.path.basename(input_docx_path))[0] + ".pdf",
+                )
 
                 # Log the conversion process
                 logger.info(f"Converting {input_docx_path} to PDF...")
 
-                command = [
-                    self.libreoffice_path,
-                    "--convert-to",
-                    "pdf",
-                    "--outdir",
-                    self.output_dir,
-                    input_docx_path,
-                ]
-
+                deadline = None if timeout is None else time.monotonic() + timeout
                 # Retry the conversion if it fails the first time
                 for _ in range(2):  # Retry twice
-                    subprocess.run(command, env=env)
-                    # Find the generated PDF file in the output directory
-                    pdf_files = [
-                        f for f in os.listdir(self.output_dir) if f.endswith(".pdf")
-                    ]
-                    if pdf_files:
-                        # Get the path to the generated PDF file
-                        pdf_file_path = os.path.join(self.output_dir, pdf_files[0])
-
-                        # Generate the S3 key for the PDF file
-                        pdf_filename = os.path.basename(input_docx_path).replace(
-                            ".docx", ".pdf"
+                    attempt_timeout = LIBREOFFICE_CONVERT_TIMEOUT
+                    if deadline is not None:
+                        attempt_timeout = min(
+                            attempt_timeout, deadline - time.monotonic()
                         )
-                        output_s3_key = os.path.join(output_s3_path, pdf_filename)
-
-                        logger.info(f'Uploading file to {output_s3_key}')
-                        # Upload the PDF file to S3 using the S3Service method
-                        S3Service.upload_file_from_path(pdf_file_path, output_s3_key)
-
+                        if attempt_timeout <= 0:
+                            break
+                    try:
+                        self.run_conversion(
+                            input_docx_path, env, timeout=attempt_timeout
+                        )
+                    except subprocess.TimeoutExpired as e:
+                        logger.error(f"Conversion timed out: {str(e)}")
+                    if os.path.exists(pdf_file_path):
                         # Log the successful conversion
                         logger.info(f"Conversion of {input_docx_path} successful")
-
-                        # Return the S3 output path to the user
-                        return True, "Conversion successful", output_s3_key
+                        return True, "Conversion successful", pdf_file_path
 
                     else:
                         # Log a retry if no PDF file found
@@ -165,14 +235,55 @@ class DocxToPdfConverter:
             # Log general error
             logger.error(f"Error: {str(e)}")
             return False, f"Error: {str(e)}", None
+
+    @staticmethod
+    def upload_pdf(pdf_file_path, input_docx_path, output_s3_path):
+        """Upload the PDF of a DOCX file, returns the S3 key of the PDF"""
+        # Generate the S3 key for the PDF file
+        pdf_filename = os.path.basename(input_docx_path).replace(".docx", ".pdf")
+        output_s3_key = os.path.join(output_s3_path, pdf_filename)
+
+        logger.info(f'Uploading file to {output_s3_key}')
+        # Upload the PDF file to S3 using the S3Service method
+        S3Service.upload_file_from_path(pdf_file_path, output_s3_key)
+        return output_s3_key
+
+    def convert_docx_to_pdf(self, input_docx_path, output_s3_path):
+        """
+        Convert a DOCX file to PDF and upload the resulting PDF to an S3 bucket.
+
+        Args:
+            input_docx_path (str): The local path to the input DOCX file.
+            output_s3_path (str): The S3 bucket path where the PDF should be uploaded.
+
+        Returns:
+            tuple: A tuple containing a boolean indicating the success of the conversion, a message string,
+                   and the S3 key for the uploaded PDF (if successful). If the conversion fails, the S3 key is None.
+        """
+        try:
+            success, message, pdf_file_path = self.convert_docx_to_local_pdf(
+                input_docx_path
+            )
+            if not success:
+                return False, message, None
+            output_s3_key = self.upload_pdf(
+                pdf_file_path, input_docx_path, output_s3_path
+            )
+            # Return the S3 output path to the user
+            return True, message, output_s3_key
+        except Exception as e:
+            # Log general error
+            logger.error(f"Error: {str(e)}")
+            return False, f"Error: {str(e)}", None
         finally:
             # Clean up the temporary directory
             if self.output_dir and os.path.isdir(self.output_dir):
-                shutil.rmtree(self.output_dir)
+                shutil.rmtree(self.output_dir, ignore_errors=True)
 
     @staticmethod
     def process_contract_template_to_pdf(
-            template_s3_url, output_s3_path, data_dict, file_name):
+            template_s3_url, output_s3_path, data_dict, file_name,
+            compiled_template=None):
         """
         Process a contract template by filling in data, converting it to PDF, and uploading it to an S3 bucket.
 
@@ -180,6 +291,8 @@ class DocxToPdfConverter:
             template_s3_url (str): The S3 URL of the contract template.
             output_s3_path (str): The S3 bucket path where the PDF should be uploaded.
             data_dict (dict): A dictionary containing data to be filled into the template.
+            compiled_template (CompiledTemplate): The compiled template, the template is
+                downloaded and scanned when not given.
 
         Returns:
             tuple: A tuple containing a boolean indicating the success of the process, a message string,
@@ -187,26 +300,32 @@ class DocxToPdfConverter:
         """
         signature_count = {}
         output_path = None
+        # Create a unique temporary directory in /tmp
+        temp_dir = tempfile.mkdtemp(prefix="doc-tp-pdf-")
         try:
-            # Create a unique temporary directory in /tmp
-            temp_dir = "/tmp/doc-tp-pdf"
-            os.makedirs(temp_dir, exist_ok=True)
 
             # Extract the filename from the S3 URL to preserve it
             template_filename = f"{file_name}.docx"
-            # Download the template from S3 with the original filename
-            local_template_path = os.path.join(temp_dir, template_filename)
-            S3Service.download_file_obj_from_s3(template_s3_url, local_template_path)
             # Process the template by placing data
             processed_template_path = os.path.join(
                 temp_dir, template_filename
             )
-            signature_count = DocumentProcessor.place_data_in_docx(
-                local_template_path, processed_template_path, data_dict
-            )
+            if compiled_template:
+                signature_count = compiled_template.render(
+                    processed_template_path, data_dict
+                )
+            else:
+                # Download the template from S3 with the original filename
+                local_template_path = os.path.join(temp_dir, template_filename)
+                S3Service.download_file_obj_from_s3(
+                    template_s3_url, local_template_path
+                )
+                signature_count = DocumentProcessor.place_data_in_docx(
+                    local_template_path, processed_template_path, data_dict
+                )
 
             # Convert the processed template to PDF
-            converter = DocxToPdfConverter()
+            converter = DocxToPdfConverter(output_dir=os.path.join(temp_dir, "pdf"))
             success, message, output_path = converter.convert_docx_to_pdf(
                 processed_template_path, output_s3_path
             )
@@ -217,28 +336,61 @@ class DocxToPdfConverter:
             return False, str(e), output_path, signature_count
         finally:
             # Clean up the temporary directory
-            if output_path and os.path.isdir(output_path):
-                shutil.rmtree(output_path)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def prewarm_libreoffice():
+    """
+    Extract LibreOffice and start the warm LibreOffice instances, so the
+    first contract of a container does not pay for it. Runs at container init
+    when LIBREOFFICE_PREWARM is set.
+    """
+    try:
+        converter = DocxToPdfConverter()
+        converter.load_libreoffice()
+        if LIBREOFFICE_POOL_ENABLED == "true" and os.path.exists(
+            converter.libreoffice_path
+        ):
+            get_soffice_pool(
+                converter.libreoffice_path, converter.get_libreoffice_env()
+            )
+    except Exception as e:
+        logger.error(f"Prewarming LibreOffice failed: {str(e)}")
+
+
+def start_libreoffice_prewarm():
+    """Prewarm LibreOffice in the background"""
+    thread = threading.Thread(
+        target=prewarm_libreoffice, name="libreoffice-prewarm", daemon=True
+    )
+    thread.start()
+    return thread
 
 
 class DocumentProcessor:
     @staticmethod
-    def place_data_in_docx(input_file, output_file, data_dict):
+    def place_data_in_docx(input_file, output_file, data_dict, placeholders=None):
         """
         Fill in data in a Docx file using the provided data dictionary and save it to another file.
 
         Args:
-            input_file (str): The path to the input Docx file.
+            input_file (str): The path to the input Docx file, or a file object of it.
             output_file (str): The path to save the output Docx file with data filled in.
             data_dict (dict): A dictionary containing data to fill into the template.
+            placeholders (dict): The signature placeholders of the input file, as returned by
+                scan_signature_placeholders. The input file is scanned when not given.
 
         Raises:
             Exception: If an error occurs while processing the document.
         """
         try:
-            # Count and add signature placeholders to data_dict
-            signature_count = DocumentProcessor.count_and_add_signature_placeholders(
-                input_file, data_dict
+            if placeholders is None:
+                placeholders = DocumentProcessor.scan_signature_placeholders(
+                    input_file
+                )
+            # Add signature placeholders to data_dict
+            signature_count = DocumentProcessor.add_signature_placeholders(
+                placeholders, data_dict
             )
             # Render the document
             doc = DocxTemplate(input_file)
@@ -248,6 +400,68 @@ class DocumentProcessor:
         except Exception as e:
             raise e
 
+    @staticmethod
+    def scan_signature_placeholders(input_file):
+        """
+        Count the number of signature placeholders in the input document.
+
+        Args:
+            input_file (str): The path to the input Docx file, or a file object of it.
+
+        Returns:
+            dict: A dictionary containing counts of account, customer, and total signatures.
+        """
+        # Extract text from the Word document using docx2txt
+        text = docx2txt.process(input_file)
+
+        # Count the number of {{ account_signature_n }} placeholders
+        account_placeholder_pattern = r"{{\s*account_signature_(\d+)\s*}}"
+        account_signature_count = len(re.findall(account_placeholder_pattern, text))
+
+        # Count the number of {{ customer_signature_n }} placeholders
+        customer_placeholder_pattern = r"{{\s*customer_signature_(\d+)\s*}}"
+        customer_signature_count = len(re.findall(customer_placeholder_pattern, text))
+
+        # Return counts of account, customer, and total signatures in a dictionary
+        return {
+            "account_signature_count": account_signature_count,
+            "customer_signature_count": customer_signature_count,
+            "total_signature_count": account_signature_count
+            + customer_signature_count,
+        }
+
+    @staticmethod
+    def add_signature_placeholders(placeholders, data_dict):
+        """
+        Add the signature placeholders counted in a document to the data dictionary.
+
+        Args:
+            placeholders (dict): The counts returned by scan_signature_placeholders.
+            data_dict (dict): A dictionary to which the signature placeholders will be added.
+
+        Returns:
+            dict: A dictionary containing counts of account, customer, and total signatures.
+        """
+        account_signature_count = placeholders["account_signature_count"]
+        customer_signature_count = placeholders["customer_signature_count"]
+
+        # Add account_signature_n keys to data_dict with increasing numbers
+        for i in range(1, account_signature_count + 1):
+            data_dict[f"account_signature_{i}"] = f"[sig|req|signer{i}]"
+
+        # Add customer_signature_n keys to data_dict with increasing numbers
+        for i in range(1, customer_signature_count + 1):
+            data_dict[
+                f"customer_signature_{i}"
+            ] = f"[sig|req|signer{account_signature_count + i}]"
+
+        return {
+            "account_signature_count": account_signature_count,
+            "customer_signature_count": customer_signature_count,
+            "total_signature_count": account_signature_count
+            + customer_signature_count,
+        }
+
     @staticmethod
     def count_and_add_signature_placeholders(input_file, data_dict):
         """
@@ -264,54 +478,7 @@ class DocumentProcessor:
             Exception: If an error occurs while counting signature placeholders.
         """
         try:
-            # Extract text from the Word document using docx2txt
-            text = docx2txt.process(input_file)
-            # Initialize counts for account, customer, and total signatures
-            account_signature_count = 0
-            customer_signature_count = 0
-
-            # Initialize lists to store signature placeholders and their values
-            account_signature_placeholders = []
-            customer_signature_placeholders = []
-
-            # Count the number of {{ account_signature_n }} placeholders and store their values
-            account_placeholder_pattern = r"{{\s*account_signature_(\d+)\s*}}"
-
-            # Find and store account signatures within the extracted text
-            account_matches = re.findall(account_placeholder_pattern, text)
-            account_signature_count += len(account_matches)
-            account_signature_placeholders.extend(account_matches)
-
-            # Count the number of {{ customer_signature_n }} placeholders and store their values
-            customer_placeholder_pattern = r"{{\s*customer_signature_(\d+)\s*}}"
-
-            # Find and store customer signatures within the extracted text
-            customer_matches = re.findall(customer_placeholder_pattern, text)
-            customer_signature_count += len(customer_matches)
-            customer_signature_placeholders.extend(customer_matches)
-
-            # Add account_signature_n keys to data_dict with increasing numbers
-            for i, placeholder in enumerate(account_signature_placeholders, start=1):
-                signature_key = f"account_signature_{i}"
-                data_dict[signature_key] = f"[sig|req|signer{i}]"
-
-            # Add customer_signature_n keys to data_dict with increasing numbers
-            for i, placeholder in enumerate(customer_signature_placeholders, start=1):
-                signature_key = f"customer_signature_{i}"
-                data_dict[
-                    signature_key
-                ] = f"[sig|req|signer{account_signature_count + i}]"
-
-            # Count total signatures as a sum of account and customer signatures
-            total_signature_count = account_signature_count + customer_signature_count
-
-            # Return counts of account, customer, and total signatures in a dictionary
-            signature_counts = {
-                "account_signature_count": account_signature_count,
-                "customer_signature_count": customer_signature_count,
-                "total_signature_count": total_signature_count,
-            }
-            return signature_counts
-
+            placeholders = DocumentProcessor.scan_signature_placeholders(input_file)
+            return DocumentProcessor.add_signature_placeholders(placeholders, data_dict)
         except Exception as e:
             raise e
@@ -0,0 +1,175 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+from api.utils.logger import logger
+
+LIBREOFFICE_POOL_ENABLED = os.getenv("LIBREOFFICE_POOL_ENABLED", default="true")
+LIBREOFFICE_POOL_SIZE = int(os.getenv("LIBREOFFICE_POOL_SIZE", default=1))
+LIBREOFFICE_START_TIMEOUT = float(os.getenv("LIBREOFFICE_START_TIMEOUT", default=30))
+LIBREOFFICE_CONVERT_TIMEOUT = float(
+    os.getenv("LIBREOFFICE_CONVERT_TIMEOUT", default=120)
+)
+LIBREOFFICE_PROFILE_DIR = "/tmp/libre_profiles"
+
+
+class SofficeInstance:
+    """
+    A headless LibreOffice kept running with a user profile of its own.
+
+    Conversions run `soffice.bin --convert-to` with the profile of the
+    instance. The new process hands the conversion over to the running
+    instance through its IPC pipe and waits for it, so it skips the cold
+    start of LibreOffice. If the instance died the new process converts on its
+    own, which is slow but still correct.
+    """
+
+    def __init__(self, soffice_path, env, profile_dir):
+        self.soffice_path = soffice_path
+        self.env = env
+        self.profile_dir = profile_dir
+        self.process = None
+
+    @property
+    def profile_url(self):
+        return f"-env:UserInstallation=file://{self.profile_dir}"
+
+    def is_healthy(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout=LIBREOFFICE_START_TIMEOUT):
+        logger.info("Starting LibreOffice instance with profile %s", self.profile_dir)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.process = subprocess.Popen(
+            [
+                self.soffice_path,
+                self.profile_url,
+                "--headless",
+                "--invisible",
+                "--nodefault",
+                "--nologo",
+                "--norestore",
+                "--nolockcheck",
+            ],
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # The instance accepts requests once it locked its profile
+        lock_file = os.path.join(self.profile_dir, ".lock")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.exists(lock_file) or not self.is_healthy():
+                break
+            time.sleep(0.1)
+        if not self.is_healthy():
+            logger.error("LibreOffice instance %s did not start", self.profile_dir)
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        # A killed instance leaves its profile locked
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def convert(self, input_path, output_dir, timeout=LIBREOFFICE_CONVERT_TIMEOUT):
+        """Convert a document to PDF, raises subprocess.TimeoutExpired"""
+        if not self.is_healthy():
+            logger.info("LibreOffice instance %s is down", self.profile_dir)
+            self.restart()
+        subprocess.run(
+            [
+                self.soffice_path,
+                self.profile_url,
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                output_dir,
+                input_path,
+            ],
+            env=self.env,
+            timeout=timeout,
+        )
+
+
+class SofficePool:
+    """
+    Pool of warm LibreOffice instances converting documents to PDF.
+
+    A conversion takes a free instance, waiting for one at most timeout
+    seconds, restarts it when it died and restarts it again after the
+    conversion timed out, as the instance may hang on the document. The wait
+    for the instance counts towards the timeout of the conversion.
+    """
+
+    def __init__(self, soffice_path, env, size=LIBREOFFICE_POOL_SIZE):
+        self.instances = [
+            SofficeInstance(
+                soffice_path, env, os.path.join(LIBREOFFICE_PROFILE_DIR, str(index))
+            )
+            for index in range(max(size, 1))
+        ]
+        self._free = queue.Queue()
+        for instance in self.instances:
+            self._free.put(instance)
+
+    def start(self):
+        for instance in self.instances:
+            if not instance.is_healthy():
+                instance.start()
+
+    def stop(self):
+        for instance in self.instances:
+            instance.stop()
+
+    def convert(self, input_path, output_dir, timeout=LIBREOFFICE_CONVERT_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        try:
+            instance = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise subprocess.TimeoutExpired("soffice", timeout)
+        try:
+            instance.convert(
+                input_path,
+                output_dir,
+                timeout=max(deadline - time.monotonic(), 1),
+            )
+        except subprocess.TimeoutExpired:
+            logger.error(
+                "Conversion of %s timed out, restarting LibreOffice", input_path
+            )
+            instance.restart()
+            raise
+        finally:
+            self._free.put(instance)
+
+
+_soffice_pool = None
+_soffice_pool_lock = threading.Lock()
+
+
+def get_soffice_pool(soffice_path, env):
+    """The pool of the process, created and started on first use"""
+    global _soffice_pool
+    with _soffice_pool_lock:
+        if _soffice_pool is None:
+            _soffice_pool = SofficePool(soffice_path, env)
+            _soffice_pool.start()
+            atexit.register(_soffice_pool.stop)
+        return _soffice_pool
@@ -0,0 +1,101 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from api.utils.aws_utils.s3 import S3Service
+from api.utils.logger import logger
+from api.utils.template.doctopdf import DocumentProcessor
+
+CONTRACT_TEMPLATE_CACHE_SIZE = int(
+    os.getenv("CONTRACT_TEMPLATE_CACHE_SIZE", default=32)
+)
+
+
+class CompiledTemplate:
+    """
+    A version of a contract template ready for rendering: the DOCX content
+    and the signature placeholders found in it.
+    """
+
+    def __init__(self, version, content, placeholders):
+        self.version = version
+        self.content = content
+        self.placeholders = placeholders
+
+    @classmethod
+    def from_content(cls, version, content):
+        placeholders = DocumentProcessor.scan_signature_placeholders(
+            io.BytesIO(content)
+        )
+        return cls(version, content, placeholders)
+
+    def render(self, output_file, data_dict):
+        """Renders the template without scanning it, returns the signature count"""
+        return DocumentProcessor.place_data_in_docx(
+            io.BytesIO(self.content), output_file, data_dict, self.placeholders
+        )
+
+    def write(self, path):
+        with open(path, "wb") as file:
+            file.write(self.content)
+
+
+class ContractTemplateCache:
+    """
+    Compiled contract templates by ContractTemplate id, least recently used
+    ones are evicted. A template is only served in the version it was
+    compiled from.
+    """
+
+    def __init__(self, size=CONTRACT_TEMPLATE_CACHE_SIZE):
+        self.size = size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template_id, version):
+        with self._lock:
+            compiled = self._templates.get(str(template_id))
+            if compiled is None or compiled.version != version:
+                return None
+            self._templates.move_to_end(str(template_id))
+            return compiled
+
+    def put(self, template_id, compiled):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._templates[str(template_id)] = compiled
+            self._templates.move_to_end(str(template_id))
+            while len(self._templates) > self.size:
+                self._templates.popitem(last=False)
+
+
+contract_template_cache = ContractTemplateCache()
+
+
+def get_compiled_template(template, version):
+    """
+    The compiled template of a ContractTemplate in its current S3 version.
+
+    Templates uploaded before placeholders were stored, or replaced on S3
+    since, are compiled from S3 and their placeholders stored again. Returns
+    None when the version is not known.
+    """
+    if not version:
+        return None
+    compiled = contract_template_cache.get(template.id, version)
+    if compiled is not None:
+        return compiled
+
+    content = S3Service.retrieve_s3_file_as_object(template.s3_doc_file_path).read()
+    if template.template_version == version and template.placeholders is not None:
+        compiled = CompiledTemplate(version, content, template.placeholders)
+    else:
+        logger.info(f"Compiling contract template {template.id} version {version}")
+        compiled = CompiledTemplate.from_content(version, content)
+        template.template_version = version
+        template.placeholders = compiled.placeholders
+        template.save(update_fields=["template_version", "placeholders"])
+    contract_template_cache.put(template.id, compiled)
+    return compiled
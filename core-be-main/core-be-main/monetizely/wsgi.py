@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monetizely.production")
 
 application = get_wsgi_application()
+
+if os.getenv("LIBREOFFICE_PREWARM") == "true":
+    from api.utils.template.doctopdf import start_libreoffice_prewarm
+
+    start_libreoffice_prewarm()